@@ -2,16 +2,57 @@
 
 from .node import Node
 from .edge import Edge
+from .graph import CSRGraph
+from .matching import Matching
+from .metrics import Metrics
+from .components import ComponentDecomposition
 from .node_classification import NodeClassification
 from .find_sensitive_control_hub import FindSensitiveControlHub
-from .control_schemes import ControlSchemes
+from .control_schemes import ControlSchemes, ControlScheme
+from .edge_criticality import EdgeCriticality
+from .pairwise_knockout import PairwiseKnockout
+from .approximate_sensitivity import ApproximateSensitivity
+from .sensitivity import SensitivityEngine
 from .control_hub_validator import ControlHubValidator
+from .session import ControlSession
+from .service import AnalysisService, AnalysisServer, ServiceClient
+from .result_cache import ResultCache
+from .results import ClassificationResult, SensitivityResult, KnockoutResult, CriticalityResult, PairwiseResult, ApproximateSensitivityResult
+from .writers import register_writer, write_report
+from .generators import scale_free_network, erdos_renyi_network
+from .sparse import to_scipy, scipy_matching
 
 __all__ = [
     "Node",
     "Edge",
+    "CSRGraph",
+    "Matching",
+    "Metrics",
+    "ComponentDecomposition",
     "NodeClassification",
     "FindSensitiveControlHub",
     "ControlSchemes",
+    "ControlScheme",
+    "EdgeCriticality",
+    "PairwiseKnockout",
+    "ApproximateSensitivity",
+    "SensitivityEngine",
     "ControlHubValidator",
+    "ControlSession",
+    "AnalysisService",
+    "AnalysisServer",
+    "ServiceClient",
+    "ResultCache",
+    "ClassificationResult",
+    "SensitivityResult",
+    "KnockoutResult",
+    "CriticalityResult",
+    "PairwiseResult",
+    "ApproximateSensitivityResult",
+    "register_writer",
+    "write_report",
+    "scale_free_network",
+    "erdos_renyi_network",
+    "to_scipy",
+    "scipy_matching",
 ]
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+"""Estimate the sensitivity of control hubs from a sample of edge deletions."""
+
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+import math
+import random
+
+try:
+    import networkx as nx  # type: ignore
+except Exception:  # pragma: no cover
+    nx = None
+
+from .graph import CSRGraph
+from .metrics import Metrics, timed
+from .node_classification import NodeClassification
+from .result_cache import ResultCache
+from .results import ApproximateSensitivityResult
+from .sensitivity import SensitivityEngine
+from .writers import write_report
+
+
+class ApproximateSensitivity:
+    """Estimate how many edge deletions cost every control hub.
+
+    The sensitivity of a control hub is the share of the edges whose
+    deletion costs it its status. :class:`FindSensitiveControlHub` evaluates
+    every candidate edge; this class evaluates a random sample of them and
+    reports an estimate with a confidence interval per hub, stopping as soon
+    as every interval is narrow enough. Only edges of the baseline matching
+    can cost hubs (see :class:`SensitivityEngine`), so the sample is drawn
+    from them and the other edges count as known zeros.
+
+    With ``stratify`` the candidates are split into strata by the total
+    degree of their endpoints, on a logarithmic scale, and sampled from
+    every stratum in proportion to its size. This narrows the intervals
+    when the effect of a deletion follows the degree of its endpoints, and
+    widens them slightly when it does not.
+
+    Edges are drawn without replacement, so the estimate becomes exact once
+    every candidate is evaluated. The intervals are normal approximations of
+    the stratified estimator. The share in every stratum is smoothed with
+    one lost and one kept pseudo-deletion, split among the strata by size,
+    so that hubs not yet lost still get a bound.
+    """
+
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, precision: float = 0.0001, confidence: float = 0.95, stratify: bool = False, seed: Optional[int] = None, batch_size: int = 256, max_edges: Optional[int] = None, progress: Optional[Callable[[int, int, float], None]] = None, output_file: Optional[str] = "./result/approximate_sensitivity.txt", classification: Optional[NodeClassification] = None, cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None, backend: str = "python"):
+        """Sample edge deletions until the estimates reach ``precision``.
+
+        Parameters
+        ----------
+        input_file : str, optional
+            Path to a ``.net`` file describing the network.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object to use instead of ``input_file``, see
+            :func:`load_graph`.
+        precision : float, optional
+            Largest accepted half-width of the confidence intervals, as a
+            share of all edges.
+        confidence : float, optional
+            Confidence level of the intervals.
+        stratify : bool, optional
+            Stratify the sample by the degree of the edge endpoints.
+        seed : int, optional
+            Seed of the sample; the same seed draws the same edges.
+        batch_size : int, optional
+            Number of edges evaluated between two checks of the intervals.
+        max_edges : int, optional
+            Stop after evaluating this many edges even if ``precision`` is
+            not reached.
+        progress : callable, optional
+            Called as ``progress(evaluated, total, width)`` after every
+            batch, with the number of edges evaluated so far, the number of
+            candidate edges and the widest half-width.
+        output_file : str, optional
+            File where the estimates are written, again after every
+            :meth:`refine`. ``None`` writes nothing; see :meth:`result`.
+        classification : NodeClassification, optional
+            Classification of the same network to reuse. Computed if not
+            given.
+        cache : ResultCache, optional
+            Cache to serve the classification from. The estimates depend on
+            the sample and are not cached.
+        report_format : str, optional
+            Writer used for ``output_file``, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the classification counters, the ``approximate.*``
+            stage times and the ``edges_sampled`` counter.
+        backend : {"python", "scipy"}, optional
+            Matching solver of the classification, see
+            :class:`NodeClassification`.
+        """
+
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if classification is None:
+            classification = NodeClassification(input_file, graph=graph, output_file=None, cache=cache,
+                                                metrics=metrics, backend=backend)
+        self.engine = SensitivityEngine(classification)
+        self.graph = classification.graph
+        self.nodeNum = self.graph.nodeNum
+        self.edgeNum = self.graph.edgeNum
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.progress = progress
+        self.output_file = output_file
+        self.report_format = report_format
+        self.metrics = metrics
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        candidates = self.engine.matched_edges()
+        self._strata = self._stratify(candidates) if stratify else [candidates]
+        rng = random.Random(seed)
+        for stratum in self._strata:
+            rng.shuffle(stratum)
+        self._taken = [0] * len(self._strata)
+        # lost hub -> number of sampled edges costing it, per stratum
+        self._hits: Dict[int, List[int]] = {}
+        self.edges_total = len(candidates)
+        self.edges_evaluated = 0
+        self.width = self._half_width([0] * len(self._strata))
+        self.refine(precision, max_edges)
+
+    def _stratify(self, edges: List[int]) -> List[List[int]]:
+        """Split ``edges`` by the bit length of the total degree of their endpoints."""
+
+        g = self.graph
+        degree = [g.outOffset[i + 1] - g.outOffset[i] + g.inOffset[i + 1] - g.inOffset[i]
+                  for i in range(self.nodeNum + 1)]
+        strata: Dict[int, List[int]] = {}
+        for e in edges:
+            strata.setdefault((degree[g.src[e]] + degree[g.des[e]]).bit_length(), []).append(e)
+        return [strata[k] for k in sorted(strata)]
+
+    def _interval(self, hits: Sequence[int]) -> Tuple[float, float, float]:
+        """Estimate and confidence bounds of a hub lost to ``hits`` sampled edges per stratum."""
+
+        estimate = 0.0
+        variance = 0.0
+        known = 0
+        possible = 0
+        total = self.edgeNum or 1
+        for stratum, n, x in zip(self._strata, self._taken, hits):
+            size = len(stratum)
+            w = size / total
+            known += x
+            possible += x + size - n
+            if n == 0:
+                variance += w * w / 4
+                continue
+            estimate += w * x / n
+            if n < size:
+                prior = size / self.edges_total
+                p = (x + prior) / (n + 2 * prior)
+                variance += w * w * p * (1 - p) / n * (size - n) / (size - 1)
+        half = self._z * math.sqrt(variance)
+        low = max(estimate - half, known / total)
+        high = max(min(estimate + half, possible / total), low)
+        return min(max(estimate, low), high), low, high
+
+    def _half_width(self, hits: Sequence[int]) -> float:
+        _, low, high = self._interval(hits)
+        return (high - low) / 2
+
+    def _draw(self, budget: int) -> List[Tuple[int, int]]:
+        """Next batch of at most ``budget`` ``(stratum, edge)``, split in proportion to the strata sizes.
+
+        What rounding leaves of ``budget`` goes one edge at a time to the
+        strata with edges left that got none, least sampled first, so small
+        strata are not starved and ``budget`` is never exceeded.
+        """
+
+        strata, taken = self._strata, self._taken
+        open_strata = [k for k in range(len(strata)) if taken[k] < len(strata[k])]
+        open_size = sum(len(strata[k]) for k in open_strata)
+        take = {k: min(len(strata[k]) - taken[k], budget * len(strata[k]) // open_size) for k in open_strata}
+        left = budget - sum(take.values())
+        for k in sorted((k for k in open_strata if take[k] == 0), key=lambda k: taken[k] / len(strata[k])):
+            if left == 0:
+                break
+            take[k] = 1
+            left -= 1
+        batch = []
+        for k in open_strata:
+            n = taken[k]
+            batch.extend((k, e) for e in strata[k][n:n + take[k]])
+            taken[k] += take[k]
+        return batch
+
+    def refine(self, precision: float = 0.0001, max_edges: Optional[int] = None) -> ApproximateSensitivityResult:
+        """Continue sampling until the intervals are at most ``precision`` wide.
+
+        Edges already evaluated are kept, so a quick estimate can be refined
+        later with a smaller ``precision`` or a larger ``max_edges``. Returns
+        the new :meth:`result`.
+        """
+
+        if precision < 0:
+            raise ValueError("precision must not be negative")
+        evaluated = self.edges_evaluated
+        with timed(self.metrics, "approximate.sample"):
+            while (self.width > precision and self.edges_evaluated < self.edges_total
+                   and (max_edges is None or self.edges_evaluated < max_edges)):
+                budget = self.batch_size if max_edges is None else min(self.batch_size, max_edges - self.edges_evaluated)
+                for k, e in self._draw(budget):
+                    for hub in self.engine.lost_hubs(e):
+                        self._hits.setdefault(hub, [0] * len(self._strata))[k] += 1
+                self.edges_evaluated = sum(self._taken)
+                self.width = max([self._half_width([0] * len(self._strata))]
+                                 + [self._half_width(h) for h in self._hits.values()])
+                if self.progress is not None:
+                    self.progress(self.edges_evaluated, self.edges_total, self.width)
+        if self.metrics is not None:
+            self.metrics.count("edges_sampled", self.edges_evaluated - evaluated)
+
+        if self.output_file is not None:
+            with timed(self.metrics, "approximate.report"):
+                write_report(self.result(), self.output_file, self.report_format)
+        return self.result()
+
+    def result(self) -> ApproximateSensitivityResult:
+        """Return the current estimates."""
+
+        return ApproximateSensitivityResult({hub: self._interval(h) for hub, h in self._hits.items()},
+                                            self._interval([0] * len(self._strata))[2], self.confidence,
+                                            self.edges_evaluated, self.edges_total)
@@ -0,0 +1,74 @@
+"""Iterative augmenting path search shared by the Hopcroft–Karp routines."""
+
+from typing import List, Sequence
+
+
+def augment_from(root: int, offset: Sequence[int], target: Sequence[int], arc: List[int], dist_root: List[int], dist_other: List[int], mate_root: List[int], mate_other: List[int]) -> bool:
+    """Search a layered augmenting path starting at the unmatched ``root``.
+
+    The search walks from one bipartite side ("root" side) to the other
+    ("other" side) along ``target[offset[n]:offset[n + 1]]`` and back along
+    the matching, following the distance layers of the preceding BFS exactly
+    like the classic recursive DFS:
+
+    * an other-side node is entered only if its distance is one more than
+      the current node's and is cleared to ``0`` once visited;
+    * if it is unmatched the path is flipped into the matching.
+
+    Recursion is replaced by an explicit stack, so path length is not bound
+    by the interpreter recursion limit. ``arc`` holds for every root-side
+    node the position in ``target`` where its scan continues (current-arc);
+    it must be reset to ``offset`` at the start of every phase. Skipped
+    positions can never become eligible again within a phase, so the
+    resulting matching is identical to the recursive search.
+
+    Parameters
+    ----------
+    root : int
+        Unmatched node on the root side.
+    offset, target : sequence of int
+        CSR adjacency from the root side to the other side.
+    arc : list[int]
+        Current-arc positions, updated in place.
+    dist_root, dist_other : list[int]
+        BFS layers of both sides. ``dist_other`` is updated in place.
+    mate_root, mate_other : list[int]
+        Matching of both sides, ``0`` meaning unmatched. Updated in place
+        when an augmenting path is found.
+
+    Returns
+    -------
+    bool
+        ``True`` if the matching was augmented.
+    """
+
+    stack = [root]
+    path: List[int] = []
+    while stack:
+        node = stack[-1]
+        k = arc[node]
+        end = offset[node + 1]
+        level = dist_root[node] + 1
+        while k < end:
+            other = target[k]
+            k += 1
+            if dist_other[other] == level:
+                dist_other[other] = 0
+                nxt = mate_other[other]
+                path.append(other)
+                if nxt == 0:
+                    arc[node] = k
+                    for n, o in zip(stack, path):
+                        mate_other[o] = n
+                        mate_root[n] = o
+                    return True
+                stack.append(nxt)
+                break
+        else:
+            arc[node] = k
+            stack.pop()
+            if path:
+                path.pop()
+            continue
+        arc[node] = k
+    return False
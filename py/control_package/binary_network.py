@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+"""Compact binary network format with memory-mapped loading.
+
+Layout (native byte order, every array ``int32``)::
+
+    header   magic "CHNB", version, byte-order mark, node_num, edge_num,
+             reserved (always 0, keeps the 64-bit fields 8-byte aligned),
+             name blob size, size and mtime of the source file
+    src, des                         edge_num + 1 entries each (slot 0 unused)
+    outOffset, outTarget, outEdge    CSR by source
+    inOffset, inTarget, inEdge       CSR by destination
+    nameOffset                       node_num + 2 entries
+    name blob                        UTF-8 labels, an empty label means none
+
+The arrays are exactly the buffers of :class:`CSRGraph`, so loading maps the
+file and hands slices of it to the graph without copying or parsing.
+"""
+
+from array import array
+from typing import List, Optional
+import mmap
+import os
+import struct
+import tempfile
+
+from .graph import CSRGraph
+
+MAGIC = b"CHNB"
+VERSION = 2
+_BOM = 0x01020304
+_HEADER = struct.Struct("=4sIIIIIQQq")
+
+#: Suffix appended to a ``.net`` path to name its binary sidecar.
+SIDECAR_SUFFIX = "b"
+
+
+def _source_stamp(source: Optional[str]):
+    """Return ``(size, mtime_ns)`` of ``source`` or zeros."""
+
+    if source is None:
+        return 0, 0
+    st = os.stat(source)
+    return st.st_size, st.st_mtime_ns
+
+
+def write_binary_network(graph: CSRGraph, path: str, source: Optional[str] = None) -> None:
+    """Write ``graph`` to ``path`` in the binary format.
+
+    The file is written to a temporary name first and moved into place, so
+    concurrent readers never observe a partial file.
+
+    Parameters
+    ----------
+    graph : CSRGraph
+        Network to store.
+    path : str
+        Destination file.
+    source : str, optional
+        File the graph was parsed from. Its size and modification time are
+        recorded so that :func:`read_binary_network` can detect stale copies.
+    """
+
+    size, mtime = _source_stamp(source)
+
+    n = graph.nodeNum
+    names = graph.names
+    blob = bytearray()
+    name_offset = array("i", [0, 0])
+    for i in range(1, n + 1):
+        name = names[i] if i < len(names) else None
+        if name:
+            blob += name.encode("utf-8")
+        name_offset.append(len(blob))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, _BOM, n, graph.edgeNum, 0, len(blob), size, mtime))
+            for arr in (graph.src, graph.des, graph.outOffset, graph.outTarget, graph.outEdge,
+                        graph.inOffset, graph.inTarget, graph.inEdge, name_offset):
+                f.write(array("i", arr).tobytes())
+            f.write(blob)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_binary_network(path: str, source: Optional[str] = None) -> CSRGraph:
+    """Memory-map ``path`` and return the stored :class:`CSRGraph`.
+
+    The graph arrays are read-only views into the mapping, which stays open
+    as long as the graph is referenced.
+
+    Parameters
+    ----------
+    path : str
+        Binary network file.
+    source : str, optional
+        If given, raise :class:`ValueError` unless ``path`` was written from
+        the current version of this file.
+    """
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < _HEADER.size:
+        raise ValueError(f"{path} is not a binary network file")
+    magic, version, bom, n, m, reserved, blob_size, size, mtime = _HEADER.unpack_from(mm, 0)
+    if magic != MAGIC or bom != _BOM or reserved != 0:
+        raise ValueError(f"{path} is not a binary network file for this platform")
+    if version != VERSION:
+        raise ValueError(f"unsupported binary network version {version}")
+    if source is not None and (size, mtime) != _source_stamp(source):
+        raise ValueError(f"{path} is stale for {source}")
+
+    body = memoryview(mm)[_HEADER.size:]
+    sizes = [m + 1, m + 1, n + 2, m, m, n + 2, m, m, n + 2]
+    if len(body) != 4 * sum(sizes) + blob_size:
+        raise ValueError(f"{path} is truncated or corrupt")
+    views = []
+    pos = 0
+    for size in sizes:
+        views.append(body[pos:pos + 4 * size].cast("i"))
+        pos += 4 * size
+    blob = body[pos:]
+
+    name_offset = views.pop()
+    names: List[Optional[str]] = [None] * (n + 1)
+    for i in range(1, n + 1):
+        lo, hi = name_offset[i], name_offset[i + 1]
+        if hi > lo:
+            names[i] = bytes(blob[lo:hi]).decode("utf-8")
+    return CSRGraph.from_buffers(n, *views, names=names)
+
+
+def sidecar_path(filename: str) -> str:
+    """Return the path of the binary sidecar cached for ``filename``."""
+
+    return filename + SIDECAR_SUFFIX
+
+
+def convert_pajek(filename: str, output: Optional[str] = None) -> str:
+    """Convert a Pajek ``.net`` file to the binary format.
+
+    Parameters
+    ----------
+    filename : str
+        Source ``.net`` file.
+    output : str, optional
+        Destination path. Defaults to the sidecar path of ``filename``.
+
+    Returns
+    -------
+    str
+        Path of the written binary file.
+    """
+
+    from .utils import load_graph
+
+    if output is None:
+        output = sidecar_path(filename)
+    write_binary_network(load_graph(filename, cache=False), output, source=filename)
+    return output
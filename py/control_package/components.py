@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+"""Connected components of the bipartite split of a network."""
+
+from array import array
+from typing import Dict, Iterable, List, Tuple
+import multiprocessing
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from .graph import CSRGraph
+from .matching import Matching
+
+
+def _solve(graph: CSRGraph) -> Tuple[List[int], List[int]]:
+    """Maximum matching of ``graph`` as marker lists (pool task)."""
+
+    matching = Matching(graph).maximize()
+    return matching.markedSrc, matching.markedDes
+
+
+class ComponentDecomposition:
+    """Split the source and destination copies of a network into components.
+
+    Source copy ``s`` and destination copy ``d`` are connected when the edge
+    ``s -> d`` exists. Matchings, alternating paths and therefore heads and
+    tails never cross from one component to another, so every component can
+    be solved on its own. Copies without edges are left out (component
+    ``0``); they are unmatched in every matching.
+
+    Attributes
+    ----------
+    componentNum : int
+        Number of components with at least one edge, numbered from ``1``.
+    srcComponent, desComponent : array('i')
+        Component of the source/destination copy of every node.
+    componentEdges : list[array('i')]
+        Edge ids of every component in increasing order; slot ``0`` is empty.
+    """
+
+    def __init__(self, graph: CSRGraph):
+        """Label the components of ``graph`` by union-find over its edges."""
+
+        self.graph = graph
+        n = graph.nodeNum
+        # copies 1..n are sources, n + 1..2n destinations
+        parent = list(range(2 * n + 1))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        src, des = graph.src, graph.des
+        for k in range(1, graph.edgeNum + 1):
+            a = find(src[k])
+            b = find(n + des[k])
+            if a != b:
+                parent[a] = b
+
+        label: Dict[int, int] = {}
+        self.componentEdges: List[array] = [array("i")]
+        self.srcComponent = array("i", bytes(4 * (n + 1)))
+        self.desComponent = array("i", bytes(4 * (n + 1)))
+        for k in range(1, graph.edgeNum + 1):
+            root = find(src[k])
+            c = label.get(root)
+            if c is None:
+                c = label[root] = len(self.componentEdges)
+                self.componentEdges.append(array("i"))
+            self.componentEdges[c].append(k)
+            self.srcComponent[src[k]] = c
+            self.desComponent[des[k]] = c
+        self.componentNum = len(self.componentEdges) - 1
+
+    def subgraph(self, components: Iterable[int]) -> Tuple[CSRGraph, List[int]]:
+        """Return the edges of ``components`` as a graph of their own.
+
+        Node ids are renumbered in increasing order and edges keep their
+        relative order, so the matching routines visit them exactly as they
+        would in the full graph. With NumPy installed the edges are gathered
+        and renumbered with array operations.
+
+        Returns
+        -------
+        tuple
+            The subgraph and the list mapping its node ids to node ids of the
+            full graph (slot ``0`` unused).
+        """
+
+        g = self.graph
+        if np is not None:
+            edges = np.sort(np.concatenate([np.asarray(self.componentEdges[c], dtype=np.intc)
+                                            for c in components] or [np.zeros(0, dtype=np.intc)]))
+            src = np.asarray(g.src, dtype=np.intc)[edges]
+            des = np.asarray(g.des, dtype=np.intc)[edges]
+            used = np.unique(np.concatenate((src, des)))
+            names = [None] + [g.names[v] if v < len(g.names) else None for v in used.tolist()]
+            sub = CSRGraph.from_arrays(np.searchsorted(used, src) + 1, np.searchsorted(used, des) + 1,
+                                       node_num=len(used), names=names)
+            return sub, [0] + used.tolist()
+
+        edges = sorted(k for c in components for k in self.componentEdges[c])
+        used = sorted({g.src[k] for k in edges} | {g.des[k] for k in edges})
+        nodes = [0] + used
+        local = {v: i for i, v in enumerate(nodes)}
+        names = [None] + [g.names[v] if v < len(g.names) else None for v in used]
+        sub = CSRGraph(len(used), [local[g.src[k]] for k in edges], [local[g.des[k]] for k in edges], names)
+        return sub, nodes
+
+    def maximum_matching(self, workers: int = 1, batch_limit: int = 1024) -> Matching:
+        """Solve every component separately and merge the matchings.
+
+        Components with fewer than ``batch_limit`` edges are solved together
+        in one batch, so every phase layers all of them in a single
+        :func:`~control_package.layering.layer` sweep, vectorized once the
+        batch is large enough. The larger ones are solved one by one, in a
+        process pool if ``workers`` is greater than ``1``. With NumPy
+        installed the matchings are scattered back into the full graph with
+        array operations. The result equals the matching found on the whole
+        graph by :meth:`Matching.maximize`.
+        """
+
+        small = [c for c in range(1, self.componentNum + 1) if len(self.componentEdges[c]) < batch_limit]
+        large = [c for c in range(1, self.componentNum + 1) if len(self.componentEdges[c]) >= batch_limit]
+        groups = ([small] if small else []) + [[c] for c in large]
+        parts = [self.subgraph(group) for group in groups]
+
+        if workers > 1 and len(large) > 1:
+            if "fork" in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context("fork")
+            else:  # pragma: no cover - platform dependent
+                ctx = multiprocessing.get_context()
+            with ctx.Pool(min(workers, len(parts))) as pool:
+                solved = pool.map(_solve, [sub for sub, _ in parts])
+        else:
+            solved = [_solve(sub) for sub, _ in parts]
+
+        if np is not None:
+            marked_src = np.zeros(self.graph.nodeNum + 1, dtype=np.int64)
+            marked_des = np.zeros(self.graph.nodeNum + 1, dtype=np.int64)
+            for (_, nodes), (local_src, _) in zip(parts, solved):
+                nodes = np.asarray(nodes)
+                local_src = np.asarray(local_src)
+                matched = np.flatnonzero(local_src)
+                s, d = nodes[matched], nodes[local_src[matched]]
+                marked_src[s] = d
+                marked_des[d] = s
+            return Matching(self.graph, marked_src.tolist(), marked_des.tolist())
+
+        result = Matching(self.graph)
+        for (sub, nodes), (marked_src, _) in zip(parts, solved):
+            for i in range(1, sub.nodeNum + 1):
+                if marked_src[i]:
+                    s, d = nodes[i], nodes[marked_src[i]]
+                    result.markedSrc[s] = d
+                    result.markedDes[d] = s
+        return result
@@ -2,19 +2,28 @@ from __future__ import annotations
 
 """Utilities to validate control hubs using a local Ollama model."""
 
-from typing import List
+from typing import IO, TYPE_CHECKING, List, Optional, Sequence
+import asyncio
 import os
-import subprocess
 from .node_classification import NodeClassification
-from .utils import load_network
+from .result_cache import ResultCache
+from .writers import write_report
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .service import ServiceClient
 
 
 class ControlHubValidator:
     """Query an Ollama model to analyze control hub functions."""
 
-    def __init__(self, input_file: str, model: str = "llama2", output_file: str = "./result/control_hub_validation.txt"):
+    def __init__(self, input_file: str, model: str = "llama2", output_file: str = "./result/control_hub_validation.txt", cache: Optional[ResultCache] = None, concurrency: int = 4, batch_size: int = 1, timeout: Optional[float] = None, command: Sequence[str] = ("ollama", "run"), client: Optional[ServiceClient] = None):
         """Compute control hubs for ``input_file`` and validate via ``model``.
 
+        Without a running event loop the hubs are validated right away, as
+        before. Inside one (Jupyter, an async service) the constructor only
+        classifies the network and the caller runs
+        ``await validator.validate_async()``.
+
         Parameters
         ----------
         input_file : str
@@ -22,40 +31,121 @@ class ControlHubValidator:
         model : str, optional
             Name of the local Ollama model to use.
         output_file : str, optional
-            Destination path for the validation results.
+            Destination path for the validation results. Answers are written
+            as they arrive, so the lines are not sorted.
+        cache : ResultCache, optional
+            Cache the control hubs are fetched from instead of classifying
+            the network again. Successful model answers are stored in it as
+            well, keyed by model and prompt, so reruns only query new hubs.
+        concurrency : int, optional
+            Maximum number of model processes running at the same time.
+        batch_size : int, optional
+            Number of hubs asked about in one prompt.
+        timeout : float, optional
+            Seconds after which a query is abandoned.
+        command : sequence of str, optional
+            Command prefix run as ``[*command, model, prompt]``.
+        client : ServiceClient, optional
+            Running analysis service to take the control hubs and node names
+            from, instead of classifying the network in this process.
         """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
         self.input_file = input_file
         self.model = model
         self.output_file = output_file
+        self.cache = cache
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.command = list(command)
 
         base = os.path.splitext(os.path.basename(input_file))[0]
         node_file = f"./result/{base}_nodeType.txt"
-        self.classifier = NodeClassification(input_file, output_file=node_file)
-        _, _, self.names = load_network(input_file)
-        self.validate()
+        if client is not None:
+            self.classifier = client.classification(input_file)
+            write_report(self.classifier, node_file)
+            self.names = client.names(input_file)
+        else:
+            self.classifier = NodeClassification(input_file, output_file=node_file, cache=cache)
+            self.names = self.classifier.graph.names
+        if not _loop_running():
+            self.validate()
+
+    def _name(self, hub: int) -> str:
+        name = self.names[hub] if hub < len(self.names) else None
+        return name if name is not None else str(hub)
 
-    def _query_model(self, prompt: str) -> str:
+    def _prompt(self, names: List[str]) -> str:
+        """Return the prompt asking about the hubs called ``names``."""
+        if len(names) == 1:
+            return f"Explain the role of {names[0]} in cancer."
+        return (f"Explain the role of each of the following genes in cancer: {', '.join(names)}. "
+                "Start the paragraph about every gene with its name.")
+
+    async def _query_model(self, prompt: str) -> str:
         """Return the model response for ``prompt`` or an error message."""
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(None, "model_answer", model=self.model, prompt=prompt)
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached["answer"]
+        argv = self.command + [self.model, prompt]
         try:
-            result = subprocess.run(
-                ["ollama", "run", self.model, prompt],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            return result.stdout.strip()
+            proc = await asyncio.create_subprocess_exec(
+                *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
         except Exception as exc:  # pragma: no cover - environment dependent
             return f"Failed to query model: {exc}"
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return f"Failed to query model: no answer within {self.timeout} seconds"
+        if proc.returncode != 0:
+            return f"Failed to query model: {argv!r} exited with status {proc.returncode}"
+        answer = stdout.decode("utf-8", errors="replace").strip()
+        if key is not None:
+            # evicted once in validate_async, not after every answer
+            await asyncio.to_thread(self.cache.put, key, {"answer": answer}, False)
+        return answer
+
+    async def _ask(self, names: List[str], limit: asyncio.Semaphore, out: IO[str]) -> None:
+        async with limit:
+            answer = await self._query_model(self._prompt(names))
+        out.write(f"{', '.join(names)}: {answer}\n")
+        out.flush()
+
+    async def validate_async(self) -> None:
+        """Coroutine behind :meth:`validate`, for callers with a running loop."""
+        names = [self._name(hub) for hub in sorted(self.classifier.Control_hub)]
+        batches = [names[i:i + self.batch_size] for i in range(0, len(names), self.batch_size)]
+        limit = asyncio.Semaphore(self.concurrency)
+        with open(self.output_file, "w") as out:
+            await asyncio.gather(*(self._ask(batch, limit, out) for batch in batches))
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.evict)
 
     def validate(self) -> None:
-        """Query the model about each control hub and write results."""
-        results: List[str] = []
-        for hub in sorted(self.classifier.Control_hub):
-            name = self.names[hub] if hub < len(self.names) else str(hub)
-            prompt = f"Explain the role of {name} in cancer."
-            answer = self._query_model(prompt)
-            results.append(f"{name}: {answer}\n")
+        """Query the model about each control hub and write results.
+
+        Raises
+        ------
+        RuntimeError
+            If called from a running event loop; await :meth:`validate_async`
+            there instead.
+        """
+        if _loop_running():
+            raise RuntimeError("an event loop is running; use 'await validator.validate_async()' instead")
+        asyncio.run(self.validate_async())
 
-        with open(self.output_file, "w") as f:
-            f.writelines(results)
 
+def _loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
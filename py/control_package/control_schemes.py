@@ -2,58 +2,263 @@ from __future__ import annotations
 
 """Computation of maximum matching based control schemes."""
 
-from typing import List, Set, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence, Set, Optional, Tuple, Union
+import random
 
 try:
     import networkx as nx  # type: ignore
 except Exception:  # pragma: no cover
     nx = None
 
-from .node import Node
-from .edge import Edge
-from .utils import load_network
+from .graph import CSRGraph
+from .metrics import Metrics, timed
+from .result_cache import ResultCache
+from .utils import load_graph
 from .random_hk import RandomHK
+from .writers import write_report
+
+
+@dataclass
+class ControlScheme:
+    """One control scheme drawn by :meth:`ControlSchemes.sample`.
+
+    Attributes
+    ----------
+    index : int
+        1-based position of the scheme in the sample.
+    matchedEdgeList : set[int]
+        Edge ids of the maximum matching.
+    driverNode : set[int]
+        Nodes without a matched incoming edge.
+    tailNode : set[int]
+        Nodes without a matched outgoing edge.
+    """
+
+    index: int
+    matchedEdgeList: Set[int]
+    driverNode: Set[int]
+    tailNode: Set[int]
+
+    def to_text(self) -> str:
+        return (f"maximum matching edgeID for scheme{self.index}:\n"
+                + " ".join(str(e) for e in sorted(self.matchedEdgeList)) + "\n"
+                + f"minimum driver node set for scheme{self.index}:\n"
+                + " ".join(str(n) for n in sorted(self.driverNode)) + "\n")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "matchedEdgeList": sorted(self.matchedEdgeList),
+            "driverNode": sorted(self.driverNode),
+            "tailNode": sorted(self.tailNode),
+        }
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        rows: List[Sequence[Any]] = [("matched_edge", e) for e in sorted(self.matchedEdgeList)]
+        rows += [("driver_node", n) for n in sorted(self.driverNode)]
+        rows += [("tail_node", n) for n in sorted(self.tailNode)]
+        return ("set", "id"), rows
 
 
 class ControlSchemes:
     """Compute maximum matching and driver nodes for a network."""
 
-    def __init__(self, input_file: Optional[str] = None, *, graph: Optional['nx.Graph'] = None, output_file: str = "./result/find_schemes.txt"):
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, output_file: Optional[str] = "./result/find_schemes.txt", cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None):
         """Run maximum matching on the given network.
 
         Parameters
         ----------
         input_file : str, optional
             Path to a ``.net`` file describing the network.
-        graph : :class:`networkx.Graph`, optional
-            Graph object to use instead of ``input_file``.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object to use instead of ``input_file``, see
+            :func:`load_graph`.
         output_file : str, optional
-            File where the resulting scheme is written.
+            File where the resulting scheme is written. ``None`` writes
+            nothing; the scheme is available as ``scheme``.
+        cache : ResultCache, optional
+            Cache to serve the scheme from, and to store it in after computing
+            it.
+        report_format : str, optional
+            Writer used for ``output_file``, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the loading and matching counters and times of
+            :meth:`find`.
         """
 
-        if graph is not None and nx is None:
-            raise ImportError("networkx is required to use the graph parameter")
-        node_num, edges_list, names = load_network(input_file, graph)
-        self.nodeNum = node_num
-        self.edgeNum = len(edges_list)
-        self.nodeSrc: List[Node] = [Node(i) for i in range(node_num + 1)]
-        self.nodeDes: List[Node] = [Node(i) for i in range(node_num + 1)]
-        self.edge: List[Edge | None] = [None] * (self.edgeNum + 1)
-        for idx, e in enumerate(edges_list, start=1):
-            self.edge[idx] = e
-            self.nodeSrc[e.src].node_edges.append(idx)
-            self.nodeDes[e.des].node_edges.append(idx)
+        self.metrics = metrics
+        self.graph: CSRGraph = load_graph(input_file, graph, metrics=metrics)
+        self.nodeNum = self.graph.nodeNum
+        self.edgeNum = self.graph.edgeNum
+
+        # per-node role frequencies accumulated by sample()
+        self.sampleNum = 0
+        self.driverCount: List[int] = [0] * (self.nodeNum + 1)
+        self.tailCount: List[int] = [0] * (self.nodeNum + 1)
+        self.middleCount: List[int] = [0] * (self.nodeNum + 1)
 
         self.output_file = output_file
+        self.report_format = report_format
+        self.cache = cache
+        self.scheme: Optional[ControlScheme] = None
         self.find()
 
-    def find(self):
+    def find(self) -> ControlScheme:
         """Execute the Hopcroft–Karp routine and write results."""
-        hk = RandomHK(self.nodeSrc, self.nodeDes, self.edge)
-        hk.find()
-
-        with open(self.output_file, "w") as f:
-            f.write("maximum matching edgeID for scheme1:\n")
-            f.write(" ".join(str(e) for e in sorted(hk.matchedEdgeList)) + "\n")
-            f.write("minimum driver node set for scheme1:\n")
-            f.write(" ".join(str(n) for n in sorted(hk.driverNode)) + "\n")
+        key = None
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(self.graph, "control_schemes")
+            cached = self.cache.get(key)
+        if cached is not None:
+            self.scheme = ControlScheme(1, set(cached["matchedEdgeList"]), set(cached["driverNode"]), set(cached["tailNode"]))
+        else:
+            matching = self.graph.maximum_matching(metrics=self.metrics)
+            hk = RandomHK(self.graph, matching=matching, metrics=self.metrics)
+            hk.find()
+            self.scheme = ControlScheme(1, hk.matchedEdgeList, hk.driverNode, hk.tailNode)
+            if key is not None:
+                self.cache.put(key, self.scheme.to_dict())
+
+        if self.output_file is not None:
+            with timed(self.metrics, "schemes.report"):
+                write_report(self.scheme, self.output_file, self.report_format)
+        return self.scheme
+
+    def sample(self, n: int, seed: Optional[int] = None, swaps: Optional[int] = None) -> Iterator[ControlScheme]:
+        """Yield ``n`` random control schemes.
+
+        Sampling starts from a maximum matching found by :class:`RandomHK`
+        with a shuffled search order, so different seeds start from
+        different matchings. Every scheme is derived from the previous one
+        by ``swaps`` random alternating-path or alternating-cycle exchanges,
+        which keep the matching maximum. Schemes are produced lazily, so
+        arbitrarily many can be consumed in constant memory.
+        ``driverCount``, ``tailCount`` and ``middleCount`` are reset when
+        sampling starts and updated as every scheme is yielded.
+
+        Parameters
+        ----------
+        n : int
+            Number of schemes to draw.
+        seed : int, optional
+            Seed making the sequence of schemes reproducible.
+        swaps : int, optional
+            Random exchanges between consecutive schemes. Defaults to the
+            number of nodes.
+        """
+
+        rng = random.Random(seed)
+        if swaps is None:
+            swaps = self.nodeNum
+        self.sampleNum = 0
+        self.driverCount = [0] * (self.nodeNum + 1)
+        self.tailCount = [0] * (self.nodeNum + 1)
+        self.middleCount = [0] * (self.nodeNum + 1)
+
+        start = RandomHK(self.graph, rng=rng)
+        start.augment()
+        mate_src = start.markedSrc
+        mate_des = start.markedDes
+        # unmatched nodes of either side with their positions, kept in step
+        # with the matching by _random_swap
+        free_src = [i for i in range(1, self.nodeNum + 1) if mate_src[i] == 0]
+        free_des = [i for i in range(1, self.nodeNum + 1) if mate_des[i] == 0]
+        pos_des = [0] * (self.nodeNum + 1)
+        for i, d in enumerate(free_des):
+            pos_des[d] = i
+        for index in range(1, n + 1):
+            if self.nodeNum > 0:
+                for _ in range(swaps):
+                    self._random_swap(rng, mate_src, mate_des, free_src, free_des, pos_des)
+
+            scheme = ControlScheme(index, set(), set(), set())
+            for i in range(1, self.nodeNum + 1):
+                if mate_des[i] == 0:
+                    scheme.driverNode.add(i)
+                    self.driverCount[i] += 1
+                else:
+                    scheme.matchedEdgeList.add(self.graph.find_edge(mate_des[i], i))
+                if mate_src[i] == 0:
+                    scheme.tailNode.add(i)
+                    self.tailCount[i] += 1
+                if mate_des[i] != 0 and mate_src[i] != 0:
+                    self.middleCount[i] += 1
+            self.sampleNum += 1
+            yield scheme
+
+    def _random_swap(self, rng: random.Random, mate_src: List[int], mate_des: List[int], free_src: List[int], free_des: List[int], pos_des: List[int]) -> None:
+        """Apply one random exchange that keeps the matching maximum.
+
+        With equal probability a random driver takes over a random
+        in-neighbour from its partner, a random tail takes over a random
+        out-neighbour from its partner (both flip an alternating path of
+        length two), or a random alternating walk is started from a matched
+        node and flipped if it closes into a cycle or ends on a driver.
+        """
+
+        g = self.graph
+        kind = rng.randrange(3)
+
+        if kind == 0:
+            if not free_des:
+                return
+            i = rng.randrange(len(free_des))
+            node = free_des[i]
+            lo, hi = g.inOffset[node], g.inOffset[node + 1]
+            if lo == hi:
+                return
+            s = g.inTarget[rng.randrange(lo, hi)]
+            old = mate_src[s]
+            mate_des[old] = 0
+            mate_src[s] = node
+            mate_des[node] = s
+            free_des[i] = old
+            pos_des[old] = i
+            return
+
+        if kind == 1:
+            if not free_src:
+                return
+            i = rng.randrange(len(free_src))
+            node = free_src[i]
+            lo, hi = g.outOffset[node], g.outOffset[node + 1]
+            if lo == hi:
+                return
+            d = g.outTarget[rng.randrange(lo, hi)]
+            old = mate_des[d]
+            mate_src[old] = 0
+            mate_des[d] = node
+            mate_src[node] = d
+            free_src[i] = old
+            return
+
+        node = rng.randint(1, self.nodeNum)
+        start = mate_src[node]
+        if start == 0:
+            return
+        path = []
+        seen = {node}
+        s = node
+        while True:
+            lo, hi = g.outOffset[s], g.outOffset[s + 1]
+            d = g.outTarget[rng.randrange(lo, hi)]
+            if d == mate_src[s]:
+                return
+            path.append((s, d))
+            if d == start:
+                break
+            nxt = mate_des[d]
+            if nxt == 0:
+                mate_des[start] = 0
+                free_des[pos_des[d]] = start
+                pos_des[start] = pos_des[d]
+                break
+            if nxt in seen:
+                return
+            seen.add(nxt)
+            s = nxt
+        for s, d in path:
+            mate_src[s] = d
+            mate_des[d] = s
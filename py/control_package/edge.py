@@ -6,5 +6,7 @@ from dataclasses import dataclass
 class Edge:
     """Directed edge between ``src`` and ``des`` nodes."""
 
+    __slots__ = ("src", "des")
+
     src: int
     des: int
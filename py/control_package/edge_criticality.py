@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+"""Classify edges by their membership in the maximum matchings."""
+
+from array import array
+from typing import AbstractSet, List, Optional, Sequence, Union
+
+try:
+    import networkx as nx  # type: ignore
+except Exception:  # pragma: no cover
+    nx = None
+
+from .graph import CSRGraph
+from .metrics import Metrics, timed
+from .node_classification import NodeClassification
+from .result_cache import ResultCache
+from .results import CriticalityResult
+from .utils import load_graph
+from .writers import write_report
+
+#: Edge in no maximum matching.
+REDUNDANT = 0
+#: Edge in some but not all maximum matchings.
+ORDINARY = 1
+#: Edge in every maximum matching.
+CRITICAL = 2
+#: Name of every label value.
+LABELS = CriticalityResult.NAMES
+
+
+def _cycle_components(graph: CSRGraph, mate_src: Sequence[int], mate_des: Sequence[int]) -> List[int]:
+    """Strongly connected components of the matched pairs.
+
+    Every matched pair is represented by its source ``s``; an edge
+    ``s -> d`` outside the matching leads to the pair of ``d``. Pairs in a
+    common component lie on an alternating cycle. Returns the component id
+    of every source, or ``0`` for unmatched sources and pairs that lie on no
+    cycle, found with an iterative Tarjan search.
+    """
+
+    n = graph.nodeNum
+    offset = graph.outOffset
+    target = graph.outTarget
+    index = [0] * (n + 1)
+    low = [0] * (n + 1)
+    on_stack = [False] * (n + 1)
+    comp = [0] * (n + 1)
+    stack: List[int] = []
+    counter = 0
+    comp_num = 0
+    for root in range(1, n + 1):
+        if index[root] or mate_src[root] == 0:
+            continue
+        counter += 1
+        index[root] = low[root] = counter
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offset[root])]
+        while work:
+            s, k = work[-1]
+            end = offset[s + 1]
+            descended = False
+            while k < end:
+                d = target[k]
+                k += 1
+                t = mate_des[d]
+                if t == 0 or t == s:
+                    continue
+                if not index[t]:
+                    work[-1] = (s, k)
+                    counter += 1
+                    index[t] = low[t] = counter
+                    stack.append(t)
+                    on_stack[t] = True
+                    work.append((t, offset[t]))
+                    descended = True
+                    break
+                if on_stack[t] and index[t] < low[s]:
+                    low[s] = index[t]
+            if descended:
+                continue
+            work.pop()
+            if work and low[s] < low[work[-1][0]]:
+                low[work[-1][0]] = low[s]
+            if low[s] == index[s]:
+                members = []
+                while True:
+                    t = stack.pop()
+                    on_stack[t] = False
+                    members.append(t)
+                    if t == s:
+                        break
+                if len(members) > 1:
+                    comp_num += 1
+                    for t in members:
+                        comp[t] = comp_num
+    return comp
+
+
+def edge_labels(graph: CSRGraph, mate_src: Sequence[int], mate_des: Sequence[int], head: AbstractSet[int], tail: AbstractSet[int]) -> array:
+    """Label every edge from one maximum matching and its heads and tails.
+
+    An edge belongs to some maximum matching exactly when it is matched, or
+    starts at a tail (a source copy that is unmatched in some maximum
+    matching), or ends at a head, or lies on an alternating cycle. A matched
+    edge is avoidable under the same conditions. Matchings are sets of edge
+    ids, so parallel copies of a matched pair make each other ordinary.
+
+    Parameters
+    ----------
+    graph : CSRGraph
+        Network the matching belongs to.
+    mate_src, mate_des : sequence of int
+        A maximum matching, as the marker lists of :class:`Matching`.
+    head, tail : set of int
+        Head and tail nodes of the network.
+
+    Returns
+    -------
+    array('b')
+        :data:`CRITICAL`, :data:`ORDINARY` or :data:`REDUNDANT` for every
+        edge id (slot ``0`` unused).
+    """
+
+    n = graph.nodeNum
+    offset = graph.outOffset
+    target = graph.outTarget
+    edge_ids = graph.outEdge
+    comp = _cycle_components(graph, mate_src, mate_des)
+    labels = array("b", bytes(graph.edgeNum + 1))
+    for s in range(1, n + 1):
+        mate = mate_src[s]
+        start, end = offset[s], offset[s + 1]
+        if mate:
+            copies = [edge_ids[k] for k in range(start, end) if target[k] == mate]
+            # the first copy realises the pair, see CSRGraph.find_edge
+            avoidable = len(copies) > 1 or s in tail or mate in head or comp[s] != 0
+            labels[copies[0]] = ORDINARY if avoidable else CRITICAL
+            for e in copies[1:]:
+                labels[e] = ORDINARY
+        for k in range(start, end):
+            d = target[k]
+            if d == mate:
+                continue
+            t = mate_des[d]
+            if s in tail or d in head or (comp[s] != 0 and comp[s] == comp[t]):
+                labels[edge_ids[k]] = ORDINARY
+    return labels
+
+
+class EdgeCriticality:
+    """Label every edge as critical, ordinary or redundant.
+
+    An edge is *critical* if it is in every maximum matching, *redundant* if
+    it is in none and *ordinary* otherwise. The labels follow from one
+    maximum matching in linear time, without deleting any edge.
+    """
+
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, output_file: Optional[str] = "./result/edge_criticality.txt", classification: Optional[NodeClassification] = None, cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None):
+        """Compute the edge labels.
+
+        Parameters
+        ----------
+        input_file : str, optional
+            Path to a ``.net`` file describing the network.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object to use instead of ``input_file``, see
+            :func:`load_graph`.
+        output_file : str, optional
+            File where the labels are written. ``None`` writes nothing; see
+            :meth:`result`.
+        classification : NodeClassification, optional
+            Classification of the same network to reuse. Computed if not
+            given.
+        cache : ResultCache, optional
+            Cache to serve the labels from, and to store them in after
+            computing them.
+        report_format : str, optional
+            Writer used for ``output_file``, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the classification counters and the ``criticality.*``
+            stage times.
+        """
+
+        if classification is not None:
+            self.graph = classification.graph
+        else:
+            self.graph = load_graph(input_file, graph, metrics=metrics)
+        self.nodeNum = self.graph.nodeNum
+        self.edgeNum = self.graph.edgeNum
+
+        key = None
+        cached = None
+        if cache is not None:
+            key = cache.key(self.graph, "edge_criticality")
+            cached = cache.get(key)
+        if cached is not None:
+            self.labels = array("b", cached["labels"])
+        else:
+            if classification is None:
+                classification = NodeClassification(graph=self.graph, output_file=None, cache=cache,
+                                                    metrics=metrics)
+            with timed(metrics, "criticality.labels"):
+                self.labels = edge_labels(self.graph, classification.markedSrc, classification.markedDes,
+                                          classification.Head, classification.Tail)
+            if key is not None:
+                cache.put(key, {"labels": self.labels.tolist()})
+
+        if output_file is not None:
+            with timed(metrics, "criticality.report"):
+                write_report(self.result(), output_file, report_format)
+
+    def edges(self, label: int) -> List[int]:
+        """Ids of the edges labelled ``label``."""
+
+        return [e for e in range(1, self.edgeNum + 1) if self.labels[e] == label]
+
+    def label(self, edge_idx: int) -> str:
+        """Name of the label of ``edge_idx``."""
+
+        return LABELS[self.labels[edge_idx]]
+
+    def result(self) -> CriticalityResult:
+        """Return the edge labels."""
+
+        return CriticalityResult(self.graph.src, self.graph.des, self.labels)
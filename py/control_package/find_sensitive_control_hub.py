@@ -2,38 +2,134 @@ from __future__ import annotations
 
 """Utilities to detect sensitive control hubs."""
 
-from typing import List, Set, Optional
+from typing import Dict, Iterable, List, Set, Optional, Tuple, Union
+import multiprocessing
+import os
+import tempfile
 
 try:
     import networkx as nx  # type: ignore
 except Exception:  # pragma: no cover
     nx = None
 
-from .utils import load_network
+from .graph import CSRGraph
+from .matching import Matching
+from .metrics import Metrics, timed
 from .node_classification import NodeClassification
+from .result_cache import ResultCache
+from .results import KnockoutResult, SensitivityResult
+from .utils import load_graph
+from .writers import write_report
+from .sensitivity import SensitivityEngine
+
+
+# Instance evaluated by the pool workers. It is installed by the pool
+# initializer so that forked workers inherit it instead of receiving a
+# pickled copy with every task.
+_worker_finder: Optional["FindSensitiveControlHub"] = None
+
+
+def _init_worker(finder: "FindSensitiveControlHub") -> None:
+    global _worker_finder
+    _worker_finder = finder
+
+
+def _lost_in_chunk(chunk: List[int]) -> Set[int]:
+    return _worker_finder._lost_hubs(chunk)
+
+
+def _knockout_chunk(chunk: List[Union[int, Tuple[int, ...]]]) -> Dict[Union[int, Tuple[int, ...]], Set[int]]:
+    return _worker_finder._knockout_impact(chunk)
 
 
 class FindSensitiveControlHub:
-    """Identify control hubs sensitive to edge removal."""
+    """Identify control hubs sensitive to edge removal and node knockouts."""
+
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, output_file: Optional[str] = "./result/sensitive_control_hub.txt", method: str = "incremental", workers: int = 1, knockout: Union[bool, Iterable[Union[int, Iterable[int]]]] = False, knockout_file: Optional[str] = "./result/knockout_control_hub.txt", cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None, backend: str = "python", node_type_file: Optional[str] = "./result/nodeType.txt"):
+        """Find the control hubs lost by deleting any single edge.
 
-    def __init__(self, input_file: Optional[str] = None, *, graph: Optional['nx.Graph'] = None, output_file: str = "./result/sensitive_control_hub.txt"):
-        if graph is not None and nx is None:
-            raise ImportError("networkx is required to use the graph parameter")
-        node_type = NodeClassification(input_file, graph=graph)
+        Parameters
+        ----------
+        input_file : str, optional
+            Path to a ``.net`` file describing the network.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object to use instead of ``input_file``, see
+            :func:`load_graph`.
+        output_file : str, optional
+            File where the sensitive control hubs are written. ``None``
+            writes nothing; see :meth:`result`.
+        method : {"incremental", "rebuild"}, optional
+            ``"incremental"`` evaluates every deletion against the baseline
+            matching with :class:`SensitivityEngine`. ``"rebuild"`` is the
+            original routine that reclassifies a rewritten network per edge
+            from scratch in ``"legacy"`` mode, independent of the incremental
+            engine, and is kept to cross-check results.
+        workers : int, optional
+            Number of worker processes used for the sweep. ``1`` runs it in
+            the calling process.
+        knockout : bool or iterable, optional
+            Also screen node knockouts. ``True`` knocks out every node on its
+            own; an iterable gives the node ids, or tuples of node ids
+            knocked out together, to screen. The result is stored in
+            ``knockout_impact``.
+        knockout_file : str, optional
+            File where the knockout screen is written. ``None`` writes
+            nothing; see :meth:`knockout_result`.
+        cache : ResultCache, optional
+            Cache to serve the classification and both screens from, and to
+            store them in after computing them.
+        report_format : str, optional
+            Writer used for both files, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the counters and times of the classification and of
+            both screens. Work done in worker processes is timed but not
+            counted in detail.
+        backend : {"python", "scipy"}, optional
+            Matching solver of the classification, see
+            :class:`NodeClassification`.
+        node_type_file : str, optional
+            File where the baseline classification is written. ``None``
+            writes nothing.
+        """
+        if method not in ("incremental", "rebuild"):
+            raise ValueError(f"unknown method: {method}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        node_type = NodeClassification(input_file, graph=graph, output_file=node_type_file, workers=workers,
+                                       cache=cache, report_format=report_format, metrics=metrics, backend=backend)
         self.init_control_hub = node_type.Control_hub
-        node_num, edges_list, names = load_network(input_file, graph)
-        self.nodeNum = node_num
-        self.edgeNum = len(edges_list)
-        self.names = names
-        self.edges_list = edges_list
+        self.metrics = metrics
+        self.method = method
+        self.workers = workers
+        self.engine = SensitivityEngine(node_type)
+        self.baseline_matching: Matching = node_type.matching
+        self.graph = node_type.graph
+        self.nodeNum = self.graph.nodeNum
+        self.edgeNum = self.graph.edgeNum
+        self.names = self.graph.names
         self.output_file = output_file
-        self.temp_file = "./net/temp.net"
+        self.report_format = report_format
+        self.cache = cache
         self.sensitive_control_hub: Set[int] = set()
+        if knockout is True:
+            self.knockout_targets: List[Union[int, Tuple[int, ...]]] = list(range(1, self.nodeNum + 1))
+        elif knockout is False:
+            self.knockout_targets = []
+        else:
+            self.knockout_targets = [k if isinstance(k, int) else tuple(k) for k in knockout]
+        self.knockout_file = knockout_file
+        self.knockout_impact: Dict[Union[int, Tuple[int, ...]], Set[int]] = {}
         self.find()
+        if self.knockout_targets:
+            self.find_knockouts()
 
-    def _write_network_without_edge(self, edge_idx: int):
-        """Write a temporary network file with one edge removed."""
-        with open(self.temp_file, "w") as f:
+    def _write_network_without_edge(self, edge_idx: int, path: str):
+        """Write the network to ``path`` with one edge removed."""
+        self._write_network_without_edges({edge_idx}, path)
+
+    def _write_network_without_edges(self, removed: Set[int], path: str):
+        """Write the network to ``path`` with the edges in ``removed`` removed."""
+        with open(path, "w") as f:
             f.write(f"*Vertices {self.nodeNum}\n")
             for i in range(1, self.nodeNum + 1):
                 name = self.names[i] if i < len(self.names) else ""
@@ -42,20 +138,140 @@ class FindSensitiveControlHub:
                 else:
                     f.write(f"{i}\t{name}\n")
             f.write("*Edges\n")
-            for j, e in enumerate(self.edges_list, start=1):
-                if j != edge_idx:
-                    f.write(f"{e.src}\t{e.des}\n")
+            for j in range(1, self.edgeNum + 1):
+                if j not in removed:
+                    f.write(f"{self.graph.src[j]}\t{self.graph.des[j]}\n")
+
+    def _candidate_edges(self) -> List[int]:
+        """Edge ids whose deletion has to be evaluated."""
+        if self.method == "incremental":
+            return self.engine.matched_edges()
+        return list(range(1, self.edgeNum + 1))
+
+    def _lost_hubs(self, edges: Iterable[int]) -> Set[int]:
+        """Return the control hubs lost by deleting any edge in ``edges``."""
+        lost: Set[int] = set()
+        if self.method == "incremental":
+            for hubs in self.engine.sweep(edges).values():
+                lost.update(hubs)
+            return lost
+
+        # every caller gets its own scratch file so that concurrent sweeps
+        # never overwrite each other's networks
+        fd, temp_file = tempfile.mkstemp(suffix=".net")
+        os.close(fd)
+        try:
+            for idx in edges:
+                self._write_network_without_edge(idx, temp_file)
+                temp_graph = load_graph(temp_file, cache=False)
+                # classified from scratch by the original routine, sharing no
+                # matching or search code with the incremental engine
+                temp_ch = NodeClassification(graph=temp_graph, output_file=None, mode="legacy")
+                for hub in self.init_control_hub:
+                    if hub not in temp_ch.Control_hub:
+                        lost.add(hub)
+        finally:
+            os.remove(temp_file)
+        return lost
+
+    def _knockout_impact(self, targets: Iterable[Union[int, Tuple[int, ...]]]) -> Dict[Union[int, Tuple[int, ...]], Set[int]]:
+        """Map every knockout in ``targets`` that costs hubs to the hubs it costs."""
+        if self.method == "incremental":
+            return self.engine.knockout_sweep(targets)
+
+        impact: Dict[Union[int, Tuple[int, ...]], Set[int]] = {}
+        fd, temp_file = tempfile.mkstemp(suffix=".net")
+        os.close(fd)
+        try:
+            for target in targets:
+                nodes = {target} if isinstance(target, int) else set(target)
+                removed = {j for j in range(1, self.edgeNum + 1)
+                           if self.graph.src[j] in nodes or self.graph.des[j] in nodes}
+                self._write_network_without_edges(removed, temp_file)
+                temp_graph = load_graph(temp_file, cache=False)
+                temp_ch = NodeClassification(graph=temp_graph, output_file=None, mode="legacy")
+                lost = {hub for hub in self.init_control_hub
+                        if hub not in nodes and hub not in temp_ch.Control_hub}
+                if lost:
+                    impact[target] = lost
+        finally:
+            os.remove(temp_file)
+        return impact
+
+    def _chunks_in_pool(self, func, items: List):
+        """Split ``items`` into chunks and yield ``func`` of each from a process pool."""
+        if "fork" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("fork")
+        else:  # pragma: no cover - platform dependent
+            ctx = multiprocessing.get_context()
+        n_chunks = min(len(items), self.workers * 4)
+        chunks = [items[i::n_chunks] for i in range(n_chunks)]
+        with ctx.Pool(self.workers, initializer=_init_worker, initargs=(self,)) as pool:
+            yield from pool.imap_unordered(func, chunks)
+
+    def _lost_hubs_parallel(self, edges: List[int]) -> Set[int]:
+        """Split ``edges`` into chunks and evaluate them in a process pool."""
+        lost: Set[int] = set()
+        for hubs in self._chunks_in_pool(_lost_in_chunk, edges):
+            lost.update(hubs)
+        return lost
 
     def find(self):
         """Compute sensitive control hubs by edge removal."""
-        for idx in range(1, self.edgeNum + 1):
-            self._write_network_without_edge(idx)
-            temp_ch = NodeClassification(self.temp_file)
-            for hub in self.init_control_hub:
-                if hub not in temp_ch.Control_hub:
-                    self.sensitive_control_hub.add(hub)
-
-        with open(self.output_file, "w") as f:
-            f.write("sensitive control hub id:\n")
-            for h in sorted(self.sensitive_control_hub):
-                f.write(f"{h}\n")
+        key = None
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(self.graph, "sensitive_control_hub", method=self.method)
+            cached = self.cache.get(key)
+        if cached is not None:
+            self.sensitive_control_hub.update(cached["sensitive_control_hub"])
+        else:
+            with timed(self.metrics, "sensitivity.sweep"):
+                edges = self._candidate_edges()
+                if self.workers > 1 and len(edges) > 1:
+                    self.sensitive_control_hub.update(self._lost_hubs_parallel(edges))
+                else:
+                    self.sensitive_control_hub.update(self._lost_hubs(edges))
+            if self.metrics is not None:
+                self.metrics.count("edges_evaluated", len(edges))
+            if key is not None:
+                self.cache.put(key, self.result().to_dict())
+
+        if self.output_file is not None:
+            with timed(self.metrics, "sensitivity.report"):
+                write_report(self.result(), self.output_file, self.report_format)
+
+    def result(self) -> SensitivityResult:
+        """Return the control hubs sensitive to edge removal."""
+        return SensitivityResult(self.sensitive_control_hub)
+
+    def knockout_result(self) -> KnockoutResult:
+        """Return the knockout screen."""
+        return KnockoutResult(self.knockout_targets, self.knockout_impact)
+
+    def find_knockouts(self):
+        """Screen the node knockouts in ``knockout_targets``."""
+        targets = self.knockout_targets
+        key = None
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(self.graph, "knockout_control_hub", method=self.method, targets=targets)
+            cached = self.cache.get(key)
+        if cached is not None:
+            for target, hubs in cached["knockout_impact"]:
+                self.knockout_impact[target if isinstance(target, int) else tuple(target)] = set(hubs)
+        else:
+            with timed(self.metrics, "knockout.sweep"):
+                if self.workers > 1 and len(targets) > 1:
+                    for impact in self._chunks_in_pool(_knockout_chunk, targets):
+                        self.knockout_impact.update(impact)
+                else:
+                    self.knockout_impact.update(self._knockout_impact(targets))
+            if self.metrics is not None:
+                self.metrics.count("knockouts_evaluated", len(targets))
+            if key is not None:
+                self.cache.put(key, self.knockout_result().to_dict())
+
+        if self.knockout_file is not None:
+            with timed(self.metrics, "knockout.report"):
+                write_report(self.knockout_result(), self.knockout_file, self.report_format)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+"""Seeded random directed networks for benchmarks and experiments."""
+
+from array import array
+from typing import Optional
+import random
+
+from .graph import CSRGraph
+
+
+def scale_free_network(node_num: int, alpha: float = 0.41, beta: float = 0.54, delta_in: float = 0.2, delta_out: float = 0.0, seed: Optional[int] = None) -> CSRGraph:
+    """Directed scale-free network of Bollobás, Borgs, Chayes and Riordan.
+
+    Starting from a single self-loop, every step adds one edge: with
+    probability ``alpha`` from a new node to an existing one, with
+    probability ``beta`` between two existing nodes, and otherwise from an
+    existing node to a new one. Existing endpoints are chosen with
+    probability proportional to in-degree plus ``delta_in`` (targets) or
+    out-degree plus ``delta_out`` (sources), which gives power-law in- and
+    out-degree distributions. Self-loops and parallel edges may occur. The
+    network has about ``node_num / (1 - beta)`` edges.
+
+    Parameters
+    ----------
+    node_num : int
+        Number of nodes to grow.
+    alpha, beta : float, optional
+        Probabilities of the first two kinds of step.
+    delta_in, delta_out : float, optional
+        Degree offsets of the preferential choices.
+    seed : int, optional
+        Seed making the network reproducible.
+    """
+
+    if node_num < 1:
+        raise ValueError("node_num must be at least 1")
+    if alpha < 0 or beta < 0 or alpha + beta >= 1:
+        raise ValueError("alpha and beta must be non-negative and sum to less than 1")
+    rng = random.Random(seed)
+    src = array("i", [1])
+    des = array("i", [1])
+    n = 1
+
+    def pick(ends: array, delta: float) -> int:
+        # an edge endpoint is picked proportionally to degree, a uniform node
+        # proportionally to the offset
+        m = len(ends)
+        if rng.random() * (m + delta * n) < m:
+            return ends[rng.randrange(m)]
+        return rng.randint(1, n)
+
+    while n < node_num:
+        r = rng.random()
+        if r < alpha:
+            n += 1
+            s, d = n, pick(des, delta_in)
+        elif r < alpha + beta:
+            s, d = pick(src, delta_out), pick(des, delta_in)
+        else:
+            s = pick(src, delta_out)
+            n += 1
+            d = n
+        src.append(s)
+        des.append(d)
+    return CSRGraph(n, src, des)
+
+
+def erdos_renyi_network(node_num: int, mean_degree: float = 3.0, seed: Optional[int] = None) -> CSRGraph:
+    """Directed random network with uniformly drawn edges.
+
+    ``round(mean_degree * node_num)`` edges are drawn independently between
+    distinct nodes, so ``mean_degree`` is the mean out-degree (and
+    in-degree). Parallel edges may occur.
+
+    Parameters
+    ----------
+    node_num : int
+        Number of nodes.
+    mean_degree : float, optional
+        Mean out-degree.
+    seed : int, optional
+        Seed making the network reproducible.
+    """
+
+    if node_num < 2:
+        raise ValueError("node_num must be at least 2")
+    rng = random.Random(seed)
+    edge_num = round(mean_degree * node_num)
+    src = array("i", bytes(4 * edge_num))
+    des = array("i", bytes(4 * edge_num))
+    for k in range(edge_num):
+        s = rng.randint(1, node_num)
+        d = rng.randint(1, node_num - 1)
+        if d >= s:
+            d += 1
+        src[k] = s
+        des[k] = d
+    return CSRGraph(node_num, src, des)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+"""Compact array-backed graph shared by the matching routines."""
+
+from array import array
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+from .edge import Edge
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .components import ComponentDecomposition
+    from .matching import Matching
+    from .metrics import Metrics
+
+
+def _ints(values) -> array:
+    """Copy a NumPy array into an ``array('i')``."""
+
+    result = array("i")
+    result.frombytes(np.ascontiguousarray(values, dtype=np.intc).tobytes())
+    return result
+
+
+class CSRGraph:
+    """Directed graph stored as compressed sparse rows in both directions.
+
+    Nodes are numbered ``1..nodeNum`` and edges ``1..edgeNum`` as in the rest
+    of the package; slot ``0`` of every per-node and per-edge array is unused.
+
+    Attributes
+    ----------
+    src, des : array('i')
+        Endpoints of every edge, indexed by edge id.
+    outOffset : array('i')
+        ``outTarget[outOffset[n]:outOffset[n + 1]]`` are the destinations of
+        the edges leaving node ``n`` and ``outEdge`` holds their edge ids.
+    inOffset : array('i')
+        ``inTarget[inOffset[n]:inOffset[n + 1]]`` are the sources of the
+        edges entering node ``n`` and ``inEdge`` holds their edge ids.
+    names : list[str | None]
+        Optional node labels, indexed by node id.
+
+    Within a node the edges keep their input order, so traversals visit them
+    in the same order as the original per-node edge lists.
+    """
+
+    __slots__ = (
+        "nodeNum",
+        "edgeNum",
+        "src",
+        "des",
+        "outOffset",
+        "outTarget",
+        "outEdge",
+        "inOffset",
+        "inTarget",
+        "inEdge",
+        "names",
+        "_matching",
+        "_components",
+    )
+
+    def __init__(self, node_num: int, src: Iterable[int], des: Iterable[int], names: Optional[List[Optional[str]]] = None):
+        """Build the graph from parallel endpoint sequences.
+
+        Parameters
+        ----------
+        node_num : int
+            Number of nodes.
+        src, des : iterable of int
+            Source and destination of edge ``1``, ``2``, ... in order.
+        names : list[str | None], optional
+            Node labels indexed by node id.
+        """
+
+        self.nodeNum = node_num
+        self.src = array("i", [0])
+        self.src.extend(src)
+        self.des = array("i", [0])
+        self.des.extend(des)
+        if len(self.src) != len(self.des):
+            raise ValueError("src and des must have the same length")
+        self.edgeNum = len(self.src) - 1
+        self.names = names if names is not None else [None] * (node_num + 1)
+        self._matching: Optional["Matching"] = None
+        self._components: Optional["ComponentDecomposition"] = None
+
+        self.outOffset, self.outTarget, self.outEdge = self._compress(self.src, self.des)
+        self.inOffset, self.inTarget, self.inEdge = self._compress(self.des, self.src)
+
+    @classmethod
+    def from_edges(cls, node_num: int, edges: Sequence[Edge], names: Optional[List[Optional[str]]] = None) -> "CSRGraph":
+        """Create a graph from a list of :class:`Edge` objects."""
+
+        return cls(node_num, (e.src for e in edges), (e.des for e in edges), names)
+
+    @classmethod
+    def from_arrays(cls, src: Sequence[int], des: Sequence[int], node_num: Optional[int] = None, names: Optional[List[Optional[str]]] = None, base: int = 1) -> "CSRGraph":
+        """Create a graph from integer arrays of edge endpoints.
+
+        With NumPy installed the adjacency is sorted with array operations
+        and no Python object is created per edge; otherwise the arrays are
+        iterated. Edge ids follow the array order.
+
+        Parameters
+        ----------
+        src, des : sequence of int
+            Source and destination of every edge, for example NumPy arrays.
+        node_num : int, optional
+            Number of nodes. Defaults to the largest node id.
+        names : list[str | None], optional
+            Node labels indexed by node id.
+        base : int, optional
+            Id of the first node in ``src`` and ``des``; ``0`` for zero-based
+            arrays, which are shifted to the package's one-based ids.
+
+        Raises
+        ------
+        ValueError
+            If the arrays differ in length or hold ids outside the nodes.
+        """
+
+        if np is None:
+            shift = 1 - base
+            src = [s + shift for s in src]
+            des = [d + shift for d in des]
+            if len(src) != len(des):
+                raise ValueError("src and des must have the same length")
+            if node_num is None:
+                node_num = max(max(src, default=0), max(des, default=0))
+            if src and (min(min(src), min(des)) < 1 or max(max(src), max(des)) > node_num):
+                raise ValueError("node ids out of range")
+            return cls(node_num, src, des, names)
+
+        src = np.asarray(src, dtype=np.int64).ravel() + (1 - base)
+        des = np.asarray(des, dtype=np.int64).ravel() + (1 - base)
+        if len(src) != len(des):
+            raise ValueError("src and des must have the same length")
+        if node_num is None:
+            node_num = int(max(src.max(initial=0), des.max(initial=0)))
+        if len(src) and (min(src.min(), des.min()) < 1 or max(src.max(), des.max()) > node_num):
+            raise ValueError("node ids out of range")
+
+        def compress(key, other):
+            # a stable sort keeps every node's edges in input order, exactly
+            # like the counting sort of _compress
+            order = np.argsort(key, kind="stable")
+            offset = np.zeros(node_num + 2, dtype=np.int64)
+            np.cumsum(np.bincount(key, minlength=node_num + 1), out=offset[1:])
+            return _ints(offset), _ints(other[order]), _ints(order + 1)
+
+        out_offset, out_target, out_edge = compress(src, des)
+        in_offset, in_target, in_edge = compress(des, src)
+        zero = np.zeros(1, dtype=np.int64)
+        return cls.from_buffers(node_num, _ints(np.concatenate((zero, src))), _ints(np.concatenate((zero, des))),
+                                out_offset, out_target, out_edge, in_offset, in_target, in_edge, names)
+
+    @classmethod
+    def from_scipy(cls, matrix, names: Optional[List[Optional[str]]] = None) -> "CSRGraph":
+        """Create a graph from a square ``scipy.sparse`` adjacency matrix.
+
+        Every stored non-zero entry ``(i, j)`` becomes an edge from node
+        ``i + 1`` to node ``j + 1``, in the order of :meth:`tocoo`, which is
+        row by row for CSR input. Any sparse format is accepted.
+        """
+
+        rows, cols = matrix.shape
+        if rows != cols:
+            raise ValueError("adjacency matrix must be square")
+        coo = matrix.tocoo()
+        keep = coo.data != 0
+        return cls.from_arrays(coo.row[keep], coo.col[keep], rows, names, base=0)
+
+    @classmethod
+    def from_buffers(cls, node_num: int, src: Sequence[int], des: Sequence[int], out_offset: Sequence[int], out_target: Sequence[int], out_edge: Sequence[int], in_offset: Sequence[int], in_target: Sequence[int], in_edge: Sequence[int], names: Optional[List[Optional[str]]] = None) -> "CSRGraph":
+        """Wrap already compressed arrays without copying them.
+
+        The buffers (``array``, ``memoryview`` or similar integer sequences)
+        must follow the attribute layout documented on the class.
+        """
+
+        self = cls.__new__(cls)
+        self.nodeNum = node_num
+        self.edgeNum = len(src) - 1
+        self.src = src
+        self.des = des
+        self.outOffset = out_offset
+        self.outTarget = out_target
+        self.outEdge = out_edge
+        self.inOffset = in_offset
+        self.inTarget = in_target
+        self.inEdge = in_edge
+        self.names = names if names is not None else [None] * (node_num + 1)
+        self._matching = None
+        self._components = None
+        return self
+
+    def maximum_matching(self, workers: int = 1, metrics: Optional["Metrics"] = None) -> "Matching":
+        """Return a maximum matching of the graph, computed on first use.
+
+        The same object is handed to every caller, so it must be copied
+        before it is modified. With ``workers`` greater than ``1`` the
+        components of :meth:`components` are solved in a process pool; the
+        matching is the same either way. ``metrics`` times the computation
+        as stage ``matching`` and, without workers, counts its phases.
+        """
+
+        if self._matching is None:
+            from .metrics import timed
+
+            with timed(metrics, "matching"):
+                if workers > 1:
+                    self._matching = self.components().maximum_matching(workers)
+                else:
+                    from .matching import Matching
+
+                    self._matching = Matching(self).maximize(metrics)
+        return self._matching
+
+    def components(self) -> "ComponentDecomposition":
+        """Return the components of the bipartite split, computed on first use."""
+
+        if self._components is None:
+            from .components import ComponentDecomposition
+
+            self._components = ComponentDecomposition(self)
+        return self._components
+
+    def _compress(self, key: array, other: array):
+        """Counting-sort edge ids by ``key`` into offset/target/edge arrays."""
+
+        n = self.nodeNum
+        offset = array("i", bytes(4 * (n + 2)))
+        for i in range(1, self.edgeNum + 1):
+            offset[key[i] + 1] += 1
+        for i in range(1, n + 2):
+            offset[i] += offset[i - 1]
+        pos = array("i", offset)
+        target = array("i", bytes(4 * self.edgeNum))
+        edge_ids = array("i", bytes(4 * self.edgeNum))
+        for i in range(1, self.edgeNum + 1):
+            k = key[i]
+            p = pos[k]
+            target[p] = other[i]
+            edge_ids[p] = i
+            pos[k] = p + 1
+        return offset, target, edge_ids
+
+    def edges(self) -> List[Edge]:
+        """Return the edges as a list of :class:`Edge` objects."""
+
+        return [Edge(self.src[i], self.des[i]) for i in range(1, self.edgeNum + 1)]
+
+    def out_edges(self, node: int) -> array:
+        """Ids of the edges leaving ``node``."""
+
+        return self.outEdge[self.outOffset[node]:self.outOffset[node + 1]]
+
+    def in_edges(self, node: int) -> array:
+        """Ids of the edges entering ``node``."""
+
+        return self.inEdge[self.inOffset[node]:self.inOffset[node + 1]]
+
+    def find_edge(self, src: int, des: int) -> int:
+        """Return the first edge id from ``src`` to ``des`` or ``0``."""
+
+        target = self.outTarget
+        for k in range(self.outOffset[src], self.outOffset[src + 1]):
+            if target[k] == des:
+                return self.outEdge[k]
+        return 0
+
+    def without(self, nodes: Iterable[int] = (), edges: Iterable[int] = ()) -> "CSRGraph":
+        """Return a copy without the edges of ``nodes`` and the edges ``edges``.
+
+        Node ids are kept, so knocked-out nodes stay behind isolated. The
+        remaining edges keep their order: edge ``e`` is renumbered ``e``
+        minus the number of removed ids below it.
+        """
+
+        drop = set(edges)
+        for node in nodes:
+            drop.update(self.out_edges(node))
+            drop.update(self.in_edges(node))
+        if np is not None:
+            # drop the positions of the removed edges from both adjacencies;
+            # no sort is needed as the order of the rest is unchanged
+            keep = np.ones(self.edgeNum + 1, dtype=bool)
+            keep[0] = False
+            keep[list(drop)] = False
+            new_id = np.cumsum(keep) * keep
+
+            def compress(offset, target, edge_ids):
+                edge_ids = np.asarray(edge_ids)
+                kept = keep[edge_ids]
+                position = np.concatenate(([0], np.cumsum(kept)))
+                return (_ints(position[np.asarray(offset)]), _ints(np.asarray(target)[kept]),
+                        _ints(new_id[edge_ids[kept]]))
+
+            zero = np.zeros(1, dtype=np.intc)
+            src = _ints(np.concatenate((zero, np.asarray(self.src)[keep])))
+            des = _ints(np.concatenate((zero, np.asarray(self.des)[keep])))
+            return CSRGraph.from_buffers(self.nodeNum, src, des, *compress(self.outOffset, self.outTarget, self.outEdge),
+                                         *compress(self.inOffset, self.inTarget, self.inEdge), names=self.names)
+        keep = [e for e in range(1, self.edgeNum + 1) if e not in drop]
+        return CSRGraph(self.nodeNum, [self.src[e] for e in keep], [self.des[e] for e in keep], self.names)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+"""Breadth-first layering shared by the Hopcroft–Karp routines."""
+
+from array import array
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+#: Graphs with fewer nodes are layered by the plain loop; below this size
+#: the fixed cost of the array operations outweighs what they save.
+VECTORIZE_MIN_NODES = 2048
+
+
+def layer(offset: Sequence[int], target: Sequence[int], mate_root: List[int], mate_other: List[int], dist_root: Sequence[int], dist_other: Sequence[int]) -> Tuple[bool, List[int]]:
+    """Compute the BFS layers of one Hopcroft–Karp phase.
+
+    The search starts from every unmatched node of the root side, walks to
+    the other side along ``target[offset[n]:offset[n + 1]]`` and back along
+    the matching, and layers the whole reachable part of the graph. Both
+    distance lists are overwritten: ``0`` marks unreached nodes (and the
+    roots), every reached node gets one more than the node it was reached
+    from. The distances are the same whether the layers are computed with
+    NumPy, for graphs of at least :data:`VECTORIZE_MIN_NODES` nodes when it
+    is installed, or with the plain loop.
+
+    Parameters
+    ----------
+    offset, target : sequence of int
+        CSR adjacency from the root side to the other side.
+    mate_root, mate_other : list[int]
+        Matching of both sides, ``0`` meaning unmatched.
+    dist_root, dist_other : list[int] or array('q')
+        Distances, updated in place. The NumPy path writes straight into
+        ``array('q')`` buffers and has to copy into lists.
+
+    Returns
+    -------
+    tuple
+        Whether an unmatched node of the other side was reached, that is
+        whether an augmenting path exists, and the root-side nodes in the
+        order they were layered (by layer; the order within a layer depends
+        on the method).
+    """
+
+    if np is not None and len(mate_root) > VECTORIZE_MIN_NODES:
+        return _layer_vectorized(offset, target, mate_root, mate_other, dist_root, dist_other)
+
+    flag = False
+    node_num = len(mate_root) - 1
+    queue = []
+    for i in range(1, node_num + 1):
+        dist_root[i] = 0
+        dist_other[i] = 0
+        if mate_root[i] == 0:
+            queue.append(i)
+    idx = 0
+    while idx < len(queue):
+        node = queue[idx]
+        idx += 1
+        for k in range(offset[node], offset[node + 1]):
+            other = target[k]
+            if dist_other[other] == 0:
+                dist_other[other] = dist_root[node] + 1
+                if mate_other[other] == 0:
+                    flag = True
+                else:
+                    if dist_root[mate_other[other]] == 0:
+                        dist_root[mate_other[other]] = dist_other[other] + 1
+                        queue.append(mate_other[other])
+    return flag, queue
+
+
+def _distances(dist: Sequence[int], size: int):
+    """Return a writable int64 view of ``dist``, or a new array to copy back."""
+
+    if isinstance(dist, array) and dist.typecode == "q":
+        view = np.frombuffer(dist, dtype=np.int64)
+        view.fill(0)
+        return view, False
+    return np.zeros(size, dtype=np.int64), True
+
+
+def _layer_vectorized(offset: Sequence[int], target: Sequence[int], mate_root: List[int], mate_other: List[int], dist_root: Sequence[int], dist_other: Sequence[int]) -> Tuple[bool, List[int]]:
+    """:func:`layer` expanding one whole layer per step with NumPy gathers."""
+
+    size = len(mate_root)
+    off = np.frombuffer(offset, dtype=np.intc) if not isinstance(offset, list) else np.array(offset)
+    tgt = np.frombuffer(target, dtype=np.intc) if not isinstance(target, list) else np.array(target)
+    mate_o = np.fromiter(mate_other, dtype=np.int64, count=size)
+    d_root, copy_root = _distances(dist_root, size)
+    d_other, copy_other = _distances(dist_other, size)
+
+    # the unmatched root-side nodes are those no other-side node is matched to
+    matched = np.zeros(size, dtype=bool)
+    matched[mate_o] = True
+    frontier = np.flatnonzero(~matched[1:]) + 1
+    layers = [frontier]
+    stamp = np.empty(size, dtype=np.int64)
+    flag = False
+    level = 0
+    while frontier.size:
+        starts = off[frontier].astype(np.int64)
+        counts = off[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        # positions starts[i] .. starts[i] + counts[i] - 1 of every node,
+        # concatenated
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        others = tgt[np.arange(total) + shift]
+        others = others[d_other[others] == 0]
+        if not others.size:
+            break
+        # keep one copy of every node reached through several edges
+        rank = np.arange(others.size)
+        stamp[others] = rank
+        others = others[stamp[others] == rank]
+        d_other[others] = level + 1
+        mates = mate_o[others]
+        if not flag and not mates.all():
+            flag = True
+        mates = mates[mates != 0]
+        # a matched root-side node is only reached through its mate, which
+        # is in ``others`` once, so no duplicates arise here
+        mates = mates[d_root[mates] == 0]
+        d_root[mates] = level + 2
+        layers.append(mates)
+        frontier = mates
+        level += 2
+
+    if copy_root:
+        dist_root[:] = d_root.tolist()
+    if copy_other:
+        dist_other[:] = d_other.tolist()
+    return flag, np.concatenate(layers).tolist()
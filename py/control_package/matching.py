@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+"""Maximum matching shared between the analyses of one graph."""
+
+from typing import TYPE_CHECKING, List, Optional, Set
+
+from .graph import CSRGraph
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .metrics import Metrics
+
+
+class Matching:
+    """Matching of the bipartite split of a :class:`CSRGraph`.
+
+    ``markedSrc[s]`` is the destination matched to source ``s`` and
+    ``markedDes[d]`` the source matched to destination ``d``; ``0`` means
+    unmatched. The lists use the same layout as the marker arrays of
+    :class:`NodeClassification` and :class:`RandomHK`, so a matching can be
+    handed to either of them as a warm start.
+    """
+
+    __slots__ = ("graph", "markedSrc", "markedDes")
+
+    def __init__(self, graph: CSRGraph, marked_src: Optional[List[int]] = None, marked_des: Optional[List[int]] = None):
+        """Wrap the given marker lists, or start from the empty matching.
+
+        Parameters
+        ----------
+        graph : CSRGraph
+            Graph the matching belongs to.
+        marked_src, marked_des : list[int], optional
+            Marker lists to copy. Both or neither must be given.
+        """
+
+        self.graph = graph
+        n = graph.nodeNum
+        if marked_src is None or marked_des is None:
+            self.markedSrc = [0] * (n + 1)
+            self.markedDes = [0] * (n + 1)
+        else:
+            self.markedSrc = list(marked_src)
+            self.markedDes = list(marked_des)
+
+    def copy(self) -> "Matching":
+        """Return an independent copy."""
+
+        return Matching(self.graph, self.markedSrc, self.markedDes)
+
+    def size(self) -> int:
+        """Number of matched pairs."""
+
+        return sum(1 for d in self.markedSrc if d != 0)
+
+    def matched_edges(self) -> Set[int]:
+        """Ids of the edges realising the matched pairs."""
+
+        return {self.graph.find_edge(s, d) for s, d in enumerate(self.markedSrc) if d != 0}
+
+    def maximize(self, metrics: Optional["Metrics"] = None) -> "Matching":
+        """Augment the matching in place until it is maximum.
+
+        Runs the Hopcroft–Karp phases of :class:`RandomHK` starting from the
+        current pairs, so an already maximum matching costs a single BFS.
+        The phases are counted in ``metrics`` if given. Returns ``self``.
+        """
+
+        from .random_hk import RandomHK
+
+        hk = RandomHK(self.graph, matching=self, metrics=metrics)
+        hk.augment()
+        self.markedSrc = hk.markedSrc
+        self.markedDes = hk.markedDes
+        return self
+
+    def transfer(self, graph: CSRGraph) -> "Matching":
+        """Return the pairs of this matching that are edges of ``graph``.
+
+        ``graph`` must use the same node ids, typically a copy of the graph
+        with some edges removed. The result is a valid, not necessarily
+        maximum, matching of ``graph`` that can warm-start its solvers.
+        """
+
+        result = Matching(graph)
+        for s, d in enumerate(self.markedSrc):
+            if d != 0 and s <= graph.nodeNum and d <= graph.nodeNum and graph.find_edge(s, d):
+                result.markedSrc[s] = d
+                result.markedDes[d] = s
+        return result
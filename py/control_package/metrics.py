@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+"""Opt-in counters and stage timings for the analyses.
+
+Every routine that accepts a ``metrics`` argument records into the given
+:class:`Metrics` and does no bookkeeping at all when it is ``None``. Stages
+are disjoint, so their times add up to the instrumented part of a run.
+"""
+
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Optional, Sequence
+import time
+
+
+class Metrics:
+    """Counters and per-stage wall times collected during a run.
+
+    Attributes
+    ----------
+    counters : dict[str, int]
+        ``hk_phases`` counts Hopcroft–Karp BFS layerings, including the last
+        one that finds no augmenting path; ``dfs_calls`` the searches the
+        DFS rounds started, ``augmenting_paths`` the paths they found and
+        ``dfs_arcs`` the edges they advanced over; ``edges_scanned`` the
+        edges looked at by both. ``edges_evaluated`` and ``knockouts_evaluated`` count what
+        :class:`FindSensitiveControlHub` screened, ``pairs_evaluated`` what
+        :class:`PairwiseKnockout` did, ``edges_sampled`` the deletions
+        :class:`ApproximateSensitivity` drew and ``reach_visits`` the nodes
+        whose reachability :class:`ControlSession` re-examined.
+    timings : dict[str, float]
+        Seconds spent in every stage, in the order the stages first ran.
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, str, float], None]] = None):
+        """Create empty counters.
+
+        Parameters
+        ----------
+        callback : callable, optional
+            Called as ``callback(kind, name, value)`` whenever something is
+            recorded: ``kind`` is ``"stage"`` with the seconds a stage took,
+            or ``"count"`` with the amount a counter grew by.
+        """
+
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, float] = {}
+        self.callback = callback
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add ``n`` to counter ``name``."""
+
+        self.counters[name] = self.counters.get(name, 0) + n
+        if self.callback is not None:
+            self.callback("count", name, n)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context manager adding the time spent inside it to stage ``name``."""
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            if self.callback is not None:
+                self.callback("stage", name, elapsed)
+
+    def record_layering(self, queue: Sequence[int], offset: Sequence[int]) -> None:
+        """Record one BFS layering that dequeued the nodes in ``queue``."""
+
+        self.count("hk_phases")
+        self.count("edges_scanned", sum(offset[n + 1] - offset[n] for n in queue))
+
+    def record_augmentation(self, calls: int, found: int, arc: Sequence[int], offset: Sequence[int]) -> None:
+        """Record a DFS round of ``calls`` searches that found ``found`` paths and left ``arc`` behind."""
+
+        scanned = sum(arc[n] - offset[n] for n in range(1, len(offset) - 1))
+        self.count("dfs_calls", calls)
+        self.count("augmenting_paths", found)
+        self.count("dfs_arcs", scanned)
+        self.count("edges_scanned", scanned)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"timings": dict(self.timings), "counters": dict(self.counters)}
+
+    def report(self) -> str:
+        """Return the stage times and counters as a text table."""
+
+        total = sum(self.timings.values())
+        lines = [f"{'stage':28s} {'seconds':>10s} {'share':>7s}\n"]
+        for name, seconds in self.timings.items():
+            share = seconds / total if total > 0 else 0.0
+            lines.append(f"{name:28s} {seconds:10.4f} {share:7.1%}\n")
+        lines.append(f"{'total':28s} {total:10.4f}\n")
+        if self.counters:
+            lines.append("\n")
+            for name, value in self.counters.items():
+                lines.append(f"{name:28s} {value:10d}\n")
+        return "".join(lines)
+
+
+def timed(metrics: Optional[Metrics], name: str) -> ContextManager:
+    """Return ``metrics.stage(name)``, or a no-op context without metrics."""
+
+    return nullcontext() if metrics is None else metrics.stage(name)
@@ -2,59 +2,128 @@ from __future__ import annotations
 
 """Classify nodes into head, tail and control hub categories."""
 
-from typing import List, Set, Optional
+from array import array
+from typing import List, Set, Optional, Union
 
 try:
     import networkx as nx  # type: ignore
 except Exception:  # pragma: no cover
     nx = None
 
-from .node import Node
-from .edge import Edge
-from .utils import load_network
+from .augmenting import augment_from
+from .graph import CSRGraph
+from .layering import layer
+from .matching import Matching
+from .metrics import Metrics, timed
+from .result_cache import ResultCache
+from .results import ClassificationResult
+from .sparse import scipy_matching
+from .utils import load_graph
+from .writers import write_report
 
 
 class NodeClassification:
     """Identify head, tail and control hub nodes in a directed network."""
 
-    def __init__(self, input_file: Optional[str] = None, *, graph: Optional['nx.Graph'] = None, output_file: str = "./result/nodeType.txt"):
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, output_file: Optional[str] = "./result/nodeType.txt", mode: str = "alternating", matching: Optional[Matching] = None, workers: int = 1, cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None, backend: str = "python"):
         """Compute the node types.
 
         Parameters
         ----------
         input_file : str, optional
             Path to a ``.net`` file defining the network.
-        graph : :class:`networkx.Graph`, optional
-            Graph object describing the network. Overrides ``input_file`` if
-            provided.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object describing the network, in any form accepted by
+            :func:`load_graph`. Overrides ``input_file`` if provided.
         output_file : str, optional
-            Location where a text report will be written.
+            Location where the report will be written. ``None`` writes
+            nothing; the roles are available from :meth:`result`.
+        mode : {"alternating", "legacy"}, optional
+            ``"alternating"`` computes one maximum matching and reads heads
+            and tails off it by alternating-path reachability. ``"legacy"``
+            solves the matching twice, once per side, as the original
+            implementation did.
+        matching : Matching, optional
+            Warm start for the ``"alternating"`` mode; only the augmentations
+            it is missing are computed. A matching of another graph with the
+            same node ids is restricted to the edges of this one. Defaults to
+            the maximum matching cached on the graph.
+        workers : int, optional
+            Worker processes used to solve the components of the graph when
+            its maximum matching has not been computed yet.
+        cache : ResultCache, optional
+            Cache to serve the classification from, and to store it in after
+            computing it. Not used together with ``matching``.
+        report_format : str, optional
+            Writer used for ``output_file``, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the loading and matching counters and times, and the
+            ``classification.*`` stages of :meth:`judge`.
+        backend : {"python", "scipy"}, optional
+            Solver of the maximum matching in the ``"alternating"`` mode.
+            ``"scipy"`` uses the C Hopcroft–Karp of
+            ``scipy.sparse.csgraph``; its matching may pair other nodes than
+            the graph's own but yields the same roles. It is not cached on
+            the graph.
         """
 
-        if graph is not None and nx is None:
-            raise ImportError("networkx is required to use the graph parameter")
-        node_num, edges_list, names = load_network(input_file, graph)
+        if mode not in ("alternating", "legacy"):
+            raise ValueError(f"unknown mode: {mode}")
+        if backend not in ("python", "scipy"):
+            raise ValueError(f"unknown backend: {backend}")
+        self.metrics = metrics
+        self.graph: CSRGraph = load_graph(input_file, graph, metrics=metrics)
+        node_num = self.graph.nodeNum
         self.nodeNum = node_num
-        self.edgeNum = len(edges_list)
-        self.nodeSrc: List[Node] = [Node(i) for i in range(node_num + 1)]
-        self.nodeDes: List[Node] = [Node(i) for i in range(node_num + 1)]
-        self.edge: List[Edge | None] = [None] * (self.edgeNum + 1)
-        for idx, e in enumerate(edges_list, start=1):
-            self.edge[idx] = e
-            self.nodeSrc[e.src].node_edges.append(idx)
-            self.nodeDes[e.des].node_edges.append(idx)
-
-        self.markedSrc = [0] * (node_num + 1)
-        self.markedDes = [0] * (node_num + 1)
-        self.distSrc = [0] * (node_num + 1)
-        self.distDes = [0] * (node_num + 1)
-        self.unMatchedNode: List[int] = []
-
+        self.edgeNum = self.graph.edgeNum
         self.Control_hub: Set[int] = set()
         self.Head: Set[int] = set()
         self.Tail: Set[int] = set()
+        self.mode = mode
+        self.report_format = report_format
+
+        key = None
+        if cache is not None and matching is None:
+            key = cache.key(self.graph, "node_classification", mode=mode, backend=backend)
+            cached = cache.get(key)
+            if cached is not None:
+                self.markedSrc = cached["markedSrc"]
+                self.markedDes = cached["markedDes"]
+                self.Head.update(cached["Head"])
+                self.Tail.update(cached["Tail"])
+                self.Control_hub.update(cached["Control_hub"])
+                self.matching = Matching(self.graph, self.markedSrc, self.markedDes)
+                self._write_report(output_file)
+                return
+
+        if mode == "alternating":
+            if matching is None and backend == "scipy":
+                with timed(metrics, "matching"):
+                    matching = scipy_matching(self.graph)
+            elif matching is None:
+                matching = self.graph.maximum_matching(workers, metrics)
+            elif matching.graph is not self.graph:
+                matching = matching.transfer(self.graph)
+            self.markedSrc = list(matching.markedSrc)
+            self.markedDes = list(matching.markedDes)
+        else:
+            self.markedSrc = [0] * (node_num + 1)
+            self.markedDes = [0] * (node_num + 1)
+        self.distSrc = array("q", bytes(8 * (node_num + 1)))
+        self.distDes = array("q", bytes(8 * (node_num + 1)))
+        self.arcSrc: List[int] = list(self.graph.outOffset)
+        self.arcDes: List[int] = list(self.graph.inOffset)
+        self.unMatchedNode: List[int] = []
 
         self.judge(output_file)
+        if key is not None:
+            cache.put(key, {
+                "markedSrc": self.markedSrc,
+                "markedDes": self.markedDes,
+                "Head": sorted(self.Head),
+                "Tail": sorted(self.Tail),
+                "Control_hub": sorted(self.Control_hub),
+            })
 
     def initialize(self):
         """Reset matching markers and distance arrays."""
@@ -65,115 +134,110 @@ class NodeClassification:
             self.distDes[i] = 0
         self.unMatchedNode = []
 
-    def judge(self, output_file: str):
+    def judge(self, output_file: Optional[str]):
         """Compute node categories and write them to ``output_file``."""
 
+        metrics = self.metrics
+        out_offset = self.graph.outOffset
+        in_offset = self.graph.inOffset
+
         # Step1, find tail nodes
-        self.initialize()
-        while self.BFS_APU():
-            for src in range(1, self.nodeNum + 1):
-                if self.markedSrc[src] == 0:
-                    self.DFS_APU(src)
-        self.Tail.update(self.unMatchedNode)
+        with timed(metrics, "classification.tails"):
+            if self.mode == "legacy":
+                self.initialize()
+            while True:
+                more = self.BFS_APU()
+                if metrics is not None:
+                    metrics.record_layering(self.unMatchedNode, out_offset)
+                if not more:
+                    break
+                calls = found = 0
+                for src in range(1, self.nodeNum + 1):
+                    if self.markedSrc[src] == 0:
+                        calls += 1
+                        found += self.DFS_APU(src)
+                if metrics is not None:
+                    metrics.record_augmentation(calls, found, self.arcSrc, out_offset)
+            self.Tail.update(self.unMatchedNode)
 
         # Step2, find head nodes
-        self.initialize()
-        while self.BFS_APD():
-            for des in range(1, self.nodeNum + 1):
-                if self.markedDes[des] == 0:
-                    self.DFS_APD(des)
-        self.Head.update(self.unMatchedNode)
+        with timed(metrics, "classification.heads"):
+            if self.mode == "legacy":
+                self.initialize()
+                while True:
+                    more = self.BFS_APD()
+                    if metrics is not None:
+                        metrics.record_layering(self.unMatchedNode, in_offset)
+                    if not more:
+                        break
+                    calls = found = 0
+                    for des in range(1, self.nodeNum + 1):
+                        if self.markedDes[des] == 0:
+                            calls += 1
+                            found += self.DFS_APD(des)
+                    if metrics is not None:
+                        metrics.record_augmentation(calls, found, self.arcDes, in_offset)
+            else:
+                # The matching from step 1 is maximum, so a single layering
+                # pass from the unmatched destinations finds no augmenting
+                # path and reaches exactly the nodes that are unmatched in
+                # some maximum matching.
+                self.BFS_APD()
+                if metrics is not None:
+                    metrics.record_layering(self.unMatchedNode, in_offset)
+            self.Head.update(self.unMatchedNode)
+            self.matching = Matching(self.graph, self.markedSrc, self.markedDes)
 
         # Step3, control hubs
-        for i in range(1, self.nodeNum + 1):
-            if i not in self.Head and i not in self.Tail:
-                self.Control_hub.add(i)
-
-        with open(output_file, "w") as f:
+        with timed(metrics, "classification.hubs"):
             for i in range(1, self.nodeNum + 1):
-                if i in self.Head and i not in self.Tail:
-                    f.write(f"{i}: head\n")
-                elif i in self.Tail and i not in self.Head:
-                    f.write(f"{i}: Tail\n")
-                elif i in self.Head:
-                    f.write(f"{i}: Head,Tail\n")
-                elif i in self.Control_hub:
-                    f.write(f"{i}: Control_hub\n")
+                if i not in self.Head and i not in self.Tail:
+                    self.Control_hub.add(i)
+
+        self._write_report(output_file)
+
+    def result(self) -> ClassificationResult:
+        """Return the node categories."""
+        return ClassificationResult(self.nodeNum, self.Head, self.Tail, self.Control_hub)
+
+    def _write_report(self, output_file: Optional[str]):
+        """Write the node categories to ``output_file`` unless it is ``None``."""
+        if output_file is not None:
+            with timed(self.metrics, "classification.report"):
+                write_report(self.result(), output_file, self.report_format)
 
     def BFS_APU(self) -> bool:
         """BFS on the source side used by Hopcroft–Karp."""
 
-        flag = False
-        self.unMatchedNode = []
-        for i in range(1, self.nodeNum + 1):
-            self.distDes[i] = 0
-            self.distSrc[i] = 0
-            if self.markedSrc[i] == 0:
-                self.unMatchedNode.append(i)
-        idx = 0
-        while idx < len(self.unMatchedNode):
-            src = self.unMatchedNode[idx]
-            idx += 1
-            for edg in self.nodeSrc[src].node_edges:
-                des = self.edge[edg].des
-                if self.distDes[des] == 0:
-                    self.distDes[des] = self.distSrc[src] + 1
-                    if self.markedDes[des] == 0:
-                        flag = True
-                    else:
-                        if self.distSrc[self.markedDes[des]] == 0:
-                            self.distSrc[self.markedDes[des]] = self.distDes[des] + 1
-                            self.unMatchedNode.append(self.markedDes[des])
+        self.arcSrc = list(self.graph.outOffset)
+        flag, self.unMatchedNode = layer(self.graph.outOffset, self.graph.outTarget, self.markedSrc,
+                                         self.markedDes, self.distSrc, self.distDes)
         return flag
 
     def DFS_APU(self, src: int) -> bool:
-        """DFS helper for augmenting paths from source side."""
-
-        for edg in self.nodeSrc[src].node_edges:
-            des = self.edge[edg].des
-            if self.distDes[des] == self.distSrc[src] + 1:
-                self.distDes[des] = 0
-                if self.markedDes[des] == 0 or self.DFS_APU(self.markedDes[des]):
-                    self.markedDes[des] = src
-                    self.markedSrc[src] = des
-                    return True
-        return False
+        """DFS helper for augmenting paths from source side.
+
+        Runs without recursion and resumes every node's edge scan where the
+        previous search of the phase stopped.
+        """
+
+        return augment_from(src, self.graph.outOffset, self.graph.outTarget, self.arcSrc,
+                            self.distSrc, self.distDes, self.markedSrc, self.markedDes)
 
     def BFS_APD(self) -> bool:
         """BFS on the destination side used by Hopcroft–Karp."""
 
-        flag = False
-        self.unMatchedNode = []
-        for i in range(1, self.nodeNum + 1):
-            self.distSrc[i] = 0
-            self.distDes[i] = 0
-            if self.markedDes[i] == 0:
-                self.unMatchedNode.append(i)
-        idx = 0
-        while idx < len(self.unMatchedNode):
-            des = self.unMatchedNode[idx]
-            idx += 1
-            for edg in self.nodeDes[des].node_edges:
-                src = self.edge[edg].src
-                if self.distSrc[src] == 0:
-                    self.distSrc[src] = self.distDes[des] + 1
-                    if self.markedSrc[src] == 0:
-                        flag = True
-                    else:
-                        if self.distDes[self.markedSrc[src]] == 0:
-                            self.distDes[self.markedSrc[src]] = self.distSrc[src] + 1
-                            self.unMatchedNode.append(self.markedSrc[src])
+        self.arcDes = list(self.graph.inOffset)
+        flag, self.unMatchedNode = layer(self.graph.inOffset, self.graph.inTarget, self.markedDes,
+                                         self.markedSrc, self.distDes, self.distSrc)
         return flag
 
     def DFS_APD(self, des: int) -> bool:
-        """DFS helper for augmenting paths from destination side."""
-
-        for edg in self.nodeDes[des].node_edges:
-            src = self.edge[edg].src
-            if self.distSrc[src] == self.distDes[des] + 1:
-                self.distSrc[src] = 0
-                if self.markedSrc[src] == 0 or self.DFS_APD(self.markedSrc[src]):
-                    self.markedSrc[src] = des
-                    self.markedDes[des] = src
-                    return True
-        return False
+        """DFS helper for augmenting paths from destination side.
+
+        Runs without recursion and resumes every node's edge scan where the
+        previous search of the phase stopped.
+        """
+
+        return augment_from(des, self.graph.inOffset, self.graph.inTarget, self.arcDes,
+                            self.distDes, self.distSrc, self.markedDes, self.markedSrc)
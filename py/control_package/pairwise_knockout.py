@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+"""Screen pairs of edge deletions or node knockouts for combined effects."""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+import heapq
+import multiprocessing
+
+try:
+    import networkx as nx  # type: ignore
+except Exception:  # pragma: no cover
+    nx = None
+
+from .edge_criticality import CRITICAL, _cycle_components, edge_labels
+from .graph import CSRGraph
+from .metrics import Metrics, timed
+from .node_classification import NodeClassification
+from .result_cache import ResultCache
+from .results import PairwiseResult
+from .sensitivity import SensitivityEngine
+from .writers import write_report
+
+Pair = Tuple[int, int]
+
+# Screen evaluated by the pool workers, installed by the pool initializer
+# like the finder of FindSensitiveControlHub.
+_worker_screen: Optional["PairwiseKnockout"] = None
+
+
+def _init_worker(screen: "PairwiseKnockout") -> None:
+    global _worker_screen
+    _worker_screen = screen
+
+
+def _pairs_in_chunk(chunk: List[Tuple[int, List[int]]]) -> Tuple[int, List[Tuple[Pair, List[int]]]]:
+    return _worker_screen._evaluate(chunk)
+
+
+def _tail_forest(graph: CSRGraph, mate_src: List[int], mate_des: List[int]) -> List[int]:
+    """Breadth-first forest of the tails, grown from the unmatched sources.
+
+    The parent of a matched tail is the tail with an edge to its partner, so
+    following parents walks an alternating path back to an unmatched source.
+    Returns the parent of every source, ``0`` for unmatched sources and
+    ``-1`` for sources that are no tail.
+    """
+
+    n = graph.nodeNum
+    offset = graph.outOffset
+    target = graph.outTarget
+    parent = [-1] * (n + 1)
+    queue = [s for s in range(1, n + 1) if mate_src[s] == 0]
+    for s in queue:
+        parent[s] = 0
+    idx = 0
+    while idx < len(queue):
+        s = queue[idx]
+        idx += 1
+        for k in range(offset[s], offset[s + 1]):
+            t = mate_des[target[k]]
+            if t and parent[t] < 0:
+                parent[t] = s
+                queue.append(t)
+    return parent
+
+
+def _head_forest(graph: CSRGraph, mate_src: List[int], mate_des: List[int]) -> List[int]:
+    """Mirror image of :func:`_tail_forest` for the heads."""
+
+    n = graph.nodeNum
+    offset = graph.inOffset
+    target = graph.inTarget
+    parent = [-1] * (n + 1)
+    queue = [d for d in range(1, n + 1) if mate_des[d] == 0]
+    for d in queue:
+        parent[d] = 0
+    idx = 0
+    while idx < len(queue):
+        d = queue[idx]
+        idx += 1
+        for k in range(offset[d], offset[d + 1]):
+            t = mate_src[target[k]]
+            if t and parent[t] < 0:
+                parent[t] = d
+                queue.append(t)
+    return parent
+
+
+class PairwiseKnockout:
+    """Find control hubs that survive every single deletion but not a pair.
+
+    Pairs are screened before they are evaluated. Deleting an edge or
+    knocking out a node only costs hubs when the maximum matching shrinks,
+    and a pair can only cost more than its two halves when the first
+    deletion takes away what made the second one harmless: an alternating
+    path or cycle that lets the matching avoid it.
+
+    * For edges this screen is exact. A pair containing an edge that is in
+      every maximum matching loses nothing beyond that edge, and only an
+      ordinary matched edge ``a`` can make another edge ``b`` indispensable.
+      Every ordinary matched edge gets a *certificate*, one alternating
+      path or cycle that flips it out of the matching. ``b`` can only become
+      indispensable without ``a`` if it is brought into the matching by the
+      certificate of ``a``, or if its own certificate shares a node copy
+      with it.
+    * For nodes the same idea is a heuristic. Every node gets a *slack
+      path*: the certificate of a copy that can be left unmatched, or else
+      the path that rematches its destination copy once its source copy is
+      gone. A pair is screened when the slack path of one node touches the
+      other node, its partners or its slack path. Pairs whose effect
+      travels further, through the nodes freed by a knockout, are missed,
+      and on small random networks that is over a tenth of the harmful
+      pairs. Pass ``exhaustive=True`` to evaluate every pair instead, or
+      pass the pairs of interest explicitly as ``pairs``.
+
+    Every screened pair is evaluated exactly. The network without the first
+    half is classified from the baseline matching, which is repaired by the
+    few augmentations it lacks, and the second half is evaluated on it with
+    :class:`SensitivityEngine`. Pairs are grouped by their first half, so
+    most reduced networks serve many pairs.
+    """
+
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, mode: str = "edge", pairs: Optional[Iterable[Iterable[int]]] = None, top: Optional[int] = 20, exhaustive: bool = False, workers: int = 1, output_file: Optional[str] = "./result/pairwise_knockout.txt", stream_file: Optional[str] = None, classification: Optional[NodeClassification] = None, cache: Optional[ResultCache] = None, report_format: str = "text", metrics: Optional[Metrics] = None, backend: str = "python"):
+        """Screen the pairs.
+
+        Parameters
+        ----------
+        input_file : str, optional
+            Path to a ``.net`` file describing the network.
+        graph : :class:`networkx.Graph`, CSRGraph, sparse matrix or tuple, optional
+            Graph object to use instead of ``input_file``, see
+            :func:`load_graph`.
+        mode : {"edge", "node"}, optional
+            Delete pairs of edges or knock out pairs of nodes.
+        pairs : iterable of pairs, optional
+            Edge ids or node ids to evaluate together, instead of the
+            screened pairs.
+        top : int, optional
+            Number of most harmful pairs kept in the result. ``None`` keeps
+            all of them.
+        exhaustive : bool, optional
+            Evaluate every pair instead of the screened ones. Needed to find
+            every harmful node pair; the edge screen misses none.
+        workers : int, optional
+            Number of worker processes evaluating the pairs. ``1`` runs
+            the evaluation in the calling process.
+        output_file : str, optional
+            File where the result is written. ``None`` writes nothing; see
+            :meth:`result`.
+        stream_file : str, optional
+            File that receives every harmful pair, in the text format, as
+            soon as it is found. Not written when the result is served from
+            ``cache``.
+        classification : NodeClassification, optional
+            Classification of the same network to reuse. Computed if not
+            given.
+        cache : ResultCache, optional
+            Cache to serve the result from, and to store it in after
+            computing it.
+        report_format : str, optional
+            Writer used for ``output_file``, see :mod:`.writers`.
+        metrics : Metrics, optional
+            Collects the classification counters, the ``pairwise.*`` stage
+            times and the ``pairs_evaluated`` counter.
+        backend : {"python", "scipy"}, optional
+            Matching solver of the classification, see
+            :class:`NodeClassification`.
+        """
+
+        if mode not in ("edge", "node"):
+            raise ValueError(f"unknown mode: {mode}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if top is not None and top < 1:
+            raise ValueError("top must be at least 1")
+        if classification is None:
+            classification = NodeClassification(input_file, graph=graph, output_file=None, cache=cache,
+                                                metrics=metrics, backend=backend)
+        self.engine = SensitivityEngine(classification)
+        self.graph = classification.graph
+        self.nodeNum = self.graph.nodeNum
+        self.edgeNum = self.graph.edgeNum
+        self.mode = mode
+        self.top = top
+        self.exhaustive = exhaustive
+        self.workers = workers
+        self.output_file = output_file
+        self.stream_file = stream_file
+        self.cache = cache
+        self.report_format = report_format
+        self.metrics = metrics
+        self.pairs: Optional[List[Pair]] = None
+        if pairs is not None:
+            self.pairs = sorted({self._pair(p) for p in pairs})
+        # hubs that survive every single deletion of the screened kind
+        self.robust: Set[int] = set()
+        self.control_hubs: Set[int] = set()
+        self.pairs_found = 0
+        self.pairs_evaluated = 0
+        self._heap: List[Tuple[int, int, int, List[int]]] = []
+        self.find()
+
+    def _pair(self, pair: Iterable[int]) -> Pair:
+        items = tuple(pair)
+        limit = self.edgeNum if self.mode == "edge" else self.nodeNum
+        if len(items) != 2 or items[0] == items[1] or not all(1 <= i <= limit for i in items):
+            raise ValueError(f"invalid {self.mode} pair: {items}")
+        return min(items), max(items)
+
+    def _edge_certificates(self) -> Dict[int, Tuple[Set[int], List[int]]]:
+        """Certificates of the matched edges that are in some but not all maximum matchings.
+
+        Returns, per edge id, the node copies the certificate touches (source
+        copies as node ids, destination copies as negated ids) and the edges
+        flipping it brings into the matching.
+        """
+
+        graph = self.graph
+        mate_src = self.engine.markedSrc
+        mate_des = self.engine.markedDes
+        labels = edge_labels(graph, mate_src, mate_des, self.engine.Head, self.engine.Tail)
+        tail_parent = _tail_forest(graph, mate_src, mate_des)
+        head_parent = _head_forest(graph, mate_src, mate_des)
+        comp = None
+        certificates = {}
+        for s in range(1, self.nodeNum + 1):
+            e = self.engine.matchedEdge[s]
+            if e == 0 or labels[e] == CRITICAL:
+                continue
+            d = mate_src[s]
+            copy = next((f for f in graph.out_edges(s) if f != e and graph.des[f] == d), 0)
+            if copy:
+                certificates[e] = ({s, -d}, [copy])
+                continue
+            options = []
+            if tail_parent[s] >= 0:
+                copies, new = set(), []
+                t = s
+                while mate_src[t]:
+                    copies.update((t, -mate_src[t]))
+                    new.append(graph.find_edge(tail_parent[t], mate_src[t]))
+                    t = tail_parent[t]
+                copies.add(t)
+                options.append((copies, new))
+            if head_parent[d] >= 0:
+                copies, new = set(), []
+                h = d
+                while mate_des[h]:
+                    copies.update((-h, mate_des[h]))
+                    new.append(graph.find_edge(mate_des[h], head_parent[h]))
+                    h = head_parent[h]
+                copies.add(-h)
+                options.append((copies, new))
+            if not options:
+                if comp is None:
+                    comp = _cycle_components(graph, mate_src, mate_des)
+                options.append(self._cycle(comp, s))
+            certificates[e] = min(options, key=lambda option: len(option[1]))
+        return certificates
+
+    def _cycle(self, comp: List[int], root: int) -> Tuple[Set[int], List[int]]:
+        """Shortest alternating cycle through the matched pair of source ``root``."""
+
+        offset = self.graph.outOffset
+        target = self.graph.outTarget
+        mate_src = self.engine.markedSrc
+        mate_des = self.engine.markedDes
+        prev = {root: 0}
+        queue = [root]
+        idx = 0
+        while True:
+            s = queue[idx]
+            idx += 1
+            for k in range(offset[s], offset[s + 1]):
+                t = mate_des[target[k]]
+                if t == root and target[k] != mate_src[s]:
+                    cycle = [s]
+                    while cycle[-1] != root:
+                        cycle.append(prev[cycle[-1]])
+                    cycle.reverse()
+                    copies = {c for u in cycle for c in (u, -mate_src[u])}
+                    new = [self.graph.find_edge(cycle[i - 1], mate_src[cycle[i]]) for i in range(1, len(cycle))]
+                    new.append(self.graph.find_edge(cycle[-1], mate_src[root]))
+                    return copies, new
+                if t and t not in prev and comp[t] == comp[root]:
+                    prev[t] = s
+                    queue.append(t)
+
+    def _slack_paths(self) -> Dict[int, Set[int]]:
+        """Node copies on the slack path of every node, see the class docstring."""
+
+        graph = self.graph
+        mate_src = self.engine.markedSrc
+        mate_des = self.engine.markedDes
+        tail_parent = _tail_forest(graph, mate_src, mate_des)
+        head_parent = _head_forest(graph, mate_src, mate_des)
+        offset = graph.inOffset
+        target = graph.inTarget
+        paths = {}
+        for x in range(1, self.nodeNum + 1):
+            path = set()
+            if tail_parent[x] >= 0:
+                t = x
+                while t:
+                    path.add(t)
+                    if mate_src[t]:
+                        path.add(-mate_src[t])
+                    t = tail_parent[t]
+            if head_parent[x] >= 0:
+                h = x
+                while h:
+                    path.add(-h)
+                    if mate_des[h]:
+                        path.add(mate_des[h])
+                    h = head_parent[h]
+            if not path and mate_src[x]:
+                # both copies are matched in every maximum matching: look for
+                # the alternating path from the partner freed by the source
+                # copy to the destination copy
+                prev = {mate_src[x]: 0}
+                queue = [mate_src[x]]
+                idx = 0
+                while idx < len(queue) and x not in prev:
+                    d = queue[idx]
+                    idx += 1
+                    for k in range(offset[d], offset[d + 1]):
+                        s = target[k]
+                        m = mate_src[s]
+                        if s != x and m and m not in prev:
+                            prev[m] = d
+                            queue.append(m)
+                h = x if x in prev else 0
+                while h:
+                    path.update((-h, mate_des[h]))
+                    h = prev[h]
+            paths[x] = path
+        return paths
+
+    def candidates(self) -> List[Pair]:
+        """Return the pairs the screen keeps, see the class docstring.
+
+        With ``exhaustive`` every pair of edges or nodes is kept.
+        """
+
+        if self.exhaustive:
+            limit = self.edgeNum if self.mode == "edge" else self.nodeNum
+            return [(a, b) for a in range(1, limit + 1) for b in range(a + 1, limit + 1)]
+        if self.mode == "edge":
+            certificates = self._edge_certificates()
+            index: Dict[int, List[int]] = {}
+            for e, (copies, _) in certificates.items():
+                for c in copies:
+                    index.setdefault(c, []).append(e)
+            pairs = set()
+            for a, (copies, new) in certificates.items():
+                for b in new:
+                    pairs.add((min(a, b), max(a, b)))
+                for c in copies:
+                    for b in index[c]:
+                        if b != a:
+                            pairs.add((min(a, b), max(a, b)))
+            return sorted(pairs)
+
+        paths = self._slack_paths()
+        mate_src = self.engine.markedSrc
+        mate_des = self.engine.markedDes
+        index = {}
+        for x, path in paths.items():
+            for c in path | {x, -x, -mate_src[x], mate_des[x]}:
+                if c:
+                    index.setdefault(c, []).append(x)
+        pairs = set()
+        for x, path in paths.items():
+            for c in path:
+                for y in index[c]:
+                    if y != x:
+                        pairs.add((min(x, y), max(x, y)))
+        return sorted(pairs)
+
+    def _groups(self, pairs: List[Pair]) -> List[Tuple[int, List[int]]]:
+        """Group the pairs by the half removed first, preferring shared halves."""
+
+        degree: Dict[int, int] = {}
+        for pair in pairs:
+            for i in pair:
+                degree[i] = degree.get(i, 0) + 1
+        groups: Dict[int, List[int]] = {}
+        for a, b in pairs:
+            if degree[b] > degree[a]:
+                a, b = b, a
+            groups.setdefault(a, []).append(b)
+        return sorted(groups.items())
+
+    def _evaluate(self, groups: List[Tuple[int, List[int]]]) -> Tuple[int, List[Tuple[Pair, List[int]]]]:
+        """Evaluate grouped pairs; returns their number and the harmful ones."""
+
+        evaluated = 0
+        found = []
+        for first, seconds in groups:
+            if self.mode == "edge":
+                after = self.engine.without(edges=(first,))
+            else:
+                after = self.engine.without(nodes=(first,))
+            for second in seconds:
+                if self.mode == "edge":
+                    lost = after.lost_hubs(second - (second > first))
+                else:
+                    lost = after.knockout(second)
+                evaluated += 1
+                lost &= self.robust
+                if lost:
+                    found.append(((min(first, second), max(first, second)), sorted(lost)))
+        return evaluated, found
+
+    def _chunks_in_pool(self, groups: List[Tuple[int, List[int]]]):
+        """Yield the evaluation of chunks of ``groups`` from a process pool."""
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("fork")
+        else:  # pragma: no cover - platform dependent
+            ctx = multiprocessing.get_context()
+        # small chunks keep the stream flowing
+        n_chunks = min(len(groups), self.workers * 16)
+        chunks = [groups[i::n_chunks] for i in range(n_chunks)]
+        with ctx.Pool(self.workers, initializer=_init_worker, initargs=(self,)) as pool:
+            yield from pool.imap_unordered(_pairs_in_chunk, chunks)
+
+    def _keep(self, pair: Pair, hubs: List[int]) -> None:
+        """Record a harmful pair in the top-``top`` heap."""
+
+        self.pairs_found += 1
+        self.control_hubs.update(hubs)
+        item = (len(hubs), -pair[0], -pair[1], hubs)
+        if self.top is None or len(self._heap) < self.top:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def find(self):
+        """Screen and evaluate the pairs."""
+
+        key = None
+        cached = None
+        if self.cache is not None:
+            key = self.cache.key(self.graph, "pairwise_knockout", mode=self.mode, pairs=self.pairs, top=self.top,
+                                 exhaustive=self.exhaustive)
+            cached = self.cache.get(key)
+        if cached is not None:
+            for pair, hubs in cached["pairs"]:
+                self._heap.append((len(hubs), -pair[0], -pair[1], hubs))
+            self.control_hubs.update(cached["control_hubs"])
+            self.pairs_found = cached["pairs_found"]
+            self.pairs_evaluated = cached["pairs_evaluated"]
+        else:
+            with timed(self.metrics, "pairwise.singles"):
+                if self.mode == "edge":
+                    impact = self.engine.sweep()
+                else:
+                    impact = self.engine.knockout_sweep()
+                self.robust = self.engine.Control_hub.difference(*impact.values())
+            with timed(self.metrics, "pairwise.candidates"):
+                pairs = self.pairs if self.pairs is not None else self.candidates()
+                groups = self._groups(pairs) if self.robust else []
+            with timed(self.metrics, "pairwise.sweep"):
+                stream = open(self.stream_file, "w") if self.stream_file is not None else None
+                try:
+                    if self.workers > 1 and len(groups) > 1:
+                        chunks = self._chunks_in_pool(groups)
+                    else:
+                        chunks = (self._evaluate([group]) for group in groups)
+                    for evaluated, found in chunks:
+                        self.pairs_evaluated += evaluated
+                        for pair, hubs in found:
+                            self._keep(pair, hubs)
+                            if stream is not None:
+                                stream.write(f"{pair[0]},{pair[1]}: {' '.join(str(h) for h in hubs)}\n")
+                        if stream is not None and found:
+                            stream.flush()
+                finally:
+                    if stream is not None:
+                        stream.close()
+            if self.metrics is not None:
+                self.metrics.count("pairs_evaluated", self.pairs_evaluated)
+            if key is not None:
+                self.cache.put(key, self.result().to_dict())
+
+        if self.output_file is not None:
+            with timed(self.metrics, "pairwise.report"):
+                write_report(self.result(), self.output_file, self.report_format)
+
+    def result(self) -> PairwiseResult:
+        """Return the most harmful pairs and every hub lost to a pair."""
+
+        ranked = sorted(self._heap, reverse=True)
+        return PairwiseResult(self.mode, [((-a, -b), hubs) for _, a, b, hubs in ranked], set(self.control_hubs),
+                              self.pairs_found, self.pairs_evaluated)
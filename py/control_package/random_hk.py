@@ -2,98 +2,120 @@ from __future__ import annotations
 
 """Simplified Hopcroft–Karp maximum matching implementation."""
 
-from typing import List, Set
+from array import array
+from typing import TYPE_CHECKING, List, Optional, Set
+import random
 
-from .node import Node
-from .edge import Edge
+from .augmenting import augment_from
+from .graph import CSRGraph
+from .layering import layer
+from .metrics import Metrics, timed
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .matching import Matching
 
 
 class RandomHK:
     """Simplified Hopcroft–Karp maximum matching."""
 
-    def __init__(self, node_src: List[Node], node_des: List[Node], edge: List[Edge | None]):
-        """Create a matcher for the bipartite graph defined by ``edge``.
+    def __init__(self, graph: CSRGraph, rng: Optional[random.Random] = None, matching: Optional["Matching"] = None, metrics: Optional[Metrics] = None):
+        """Create a matcher for the bipartite split of ``graph``.
 
         Parameters
         ----------
-        node_src, node_des : list[Node]
-            Node containers for the two bipartite sides. Index ``0`` is unused
-            so that nodes are 1-indexed.
-        edge : list[Edge | None]
-            Array of edges where index corresponds to an ``Edge`` object.
+        graph : CSRGraph
+            Network whose source and destination copies form the two
+            bipartite sides.
+        rng : :class:`random.Random`, optional
+            If given, the order in which nodes and their edges are tried is
+            shuffled, as in the Java ``randomHK``, so that different maximum
+            matchings are found. Otherwise the input order is used.
+        matching : Matching, optional
+            Matching to start from instead of the empty one. It is copied,
+            and if it is already maximum :meth:`find` only re-checks it.
+        metrics : Metrics, optional
+            Collects the Hopcroft–Karp counters and the stage times of
+            :meth:`find`.
         """
 
-        self.nodeSrc = node_src
-        self.nodeDes = node_des
-        self.edge = edge
-        self.nodeNum = len(node_src) - 1
-        self.markedSrc = [0] * (self.nodeNum + 1)
-        self.markedDes = [0] * (self.nodeNum + 1)
-        self.distSrc = [0] * (self.nodeNum + 1)
-        self.distDes = [0] * (self.nodeNum + 1)
+        self.graph = graph
+        self.nodeNum = graph.nodeNum
+        self.order = list(range(1, self.nodeNum + 1))
+        self.inTarget = graph.inTarget
+        if rng is not None:
+            rng.shuffle(self.order)
+            self.inTarget = array("i", graph.inTarget)
+            offset = graph.inOffset
+            for des in range(1, self.nodeNum + 1):
+                seg = self.inTarget[offset[des]:offset[des + 1]].tolist()
+                rng.shuffle(seg)
+                self.inTarget[offset[des]:offset[des + 1]] = array("i", seg)
+        if matching is None:
+            self.markedSrc = [0] * (self.nodeNum + 1)
+            self.markedDes = [0] * (self.nodeNum + 1)
+        else:
+            self.markedSrc = list(matching.markedSrc)
+            self.markedDes = list(matching.markedDes)
+        self.distSrc = array("q", bytes(8 * (self.nodeNum + 1)))
+        self.distDes = array("q", bytes(8 * (self.nodeNum + 1)))
+        self.arcDes: List[int] = list(graph.inOffset)
         self.unMatchedNode: List[int] = []
         self.matchedEdgeList: Set[int] = set()
         self.driverNode: Set[int] = set()
         self.tailNode: Set[int] = set()
+        self.metrics = metrics
 
     def bfs(self) -> bool:
         """Breadth-first search step of Hopcroft–Karp.
 
-        Returns ``True`` if an augmenting path is found.
+        Layers the graph from the unmatched destinations with
+        :func:`layer`. Returns ``True`` if an augmenting path is found.
         """
 
-        flag = False
-        self.unMatchedNode = []
-        for i in range(1, self.nodeNum + 1):
-            self.distSrc[i] = 0
-            self.distDes[i] = 0
-            if self.markedDes[i] == 0:
-                self.unMatchedNode.append(i)
-        idx = 0
-        while idx < len(self.unMatchedNode):
-            des = self.unMatchedNode[idx]
-            idx += 1
-            for edg in self.nodeDes[des].node_edges:
-                src = self.edge[edg].src
-                if self.distSrc[src] == 0:
-                    self.distSrc[src] = self.distDes[des] + 1
-                    if self.markedSrc[src] == 0:
-                        flag = True
-                    else:
-                        if self.distDes[self.markedSrc[src]] == 0:
-                            self.distDes[self.markedSrc[src]] = self.distSrc[src] + 1
-                            self.unMatchedNode.append(self.markedSrc[src])
+        self.arcDes = list(self.graph.inOffset)
+        flag, self.unMatchedNode = layer(self.graph.inOffset, self.inTarget, self.markedDes, self.markedSrc,
+                                         self.distDes, self.distSrc)
         return flag
 
     def dfs(self, des: int) -> bool:
-        """Depth-first search step used to build augmenting paths."""
-
-        for edg in self.nodeDes[des].node_edges:
-            src = self.edge[edg].src
-            if self.distSrc[src] == self.distDes[des] + 1:
-                self.distSrc[src] = 0
-                if self.markedSrc[src] == 0 or self.dfs(self.markedSrc[src]):
-                    self.markedSrc[src] = des
-                    self.markedDes[des] = src
-                    return True
-        return False
+        """Depth-first search step used to build augmenting paths.
+
+        Runs without recursion and resumes every node's edge scan where the
+        previous search of the phase stopped.
+        """
+
+        return augment_from(des, self.graph.inOffset, self.inTarget, self.arcDes,
+                            self.distDes, self.distSrc, self.markedDes, self.markedSrc)
+
+    def augment(self):
+        """Run Hopcroft–Karp phases until the matching is maximum."""
+
+        metrics = self.metrics
+        while True:
+            more = self.bfs()
+            if metrics is not None:
+                metrics.record_layering(self.unMatchedNode, self.graph.inOffset)
+            if not more:
+                break
+            calls = found = 0
+            for des in self.order:
+                if self.markedDes[des] == 0:
+                    calls += 1
+                    found += self.dfs(des)
+            if metrics is not None:
+                metrics.record_augmentation(calls, found, self.arcDes, self.graph.inOffset)
 
     def find(self):
         """Run the Hopcroft–Karp algorithm."""
 
-        while self.bfs():
-            for des in range(1, self.nodeNum + 1):
-                if self.markedDes[des] == 0:
-                    self.dfs(des)
-
-        for i in range(1, self.nodeNum + 1):
-            if self.markedDes[i] == 0:
-                self.driverNode.add(i)
-            if self.markedSrc[i] == 0:
-                self.tailNode.add(i)
-            if self.markedDes[i] != 0:
-                src = self.markedDes[i]
-                for e in self.nodeDes[i].node_edges:
-                    if self.edge[e].src == src:
-                        self.matchedEdgeList.add(e)
-                        break
+        with timed(self.metrics, "random_hk.augment"):
+            self.augment()
+
+        with timed(self.metrics, "random_hk.collect"):
+            for i in range(1, self.nodeNum + 1):
+                if self.markedDes[i] == 0:
+                    self.driverNode.add(i)
+                if self.markedSrc[i] == 0:
+                    self.tailNode.add(i)
+                if self.markedDes[i] != 0:
+                    self.matchedEdgeList.add(self.graph.find_edge(self.markedDes[i], i))
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+"""Content-addressed on-disk cache for analysis results."""
+
+from array import array
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from .graph import CSRGraph
+
+#: Bumped whenever the stored results change shape.
+FORMAT_VERSION = 2
+
+
+def network_digest(graph: CSRGraph) -> str:
+    """Return a SHA-256 digest of the node count and the edge list.
+
+    Edges are hashed in id order, because edge ids and their order decide
+    which maximum matching the routines report. Node labels are ignored.
+    """
+
+    h = hashlib.sha256()
+    h.update(f"{graph.nodeNum}:{graph.edgeNum}:".encode())
+    for arr in (graph.src, graph.des):
+        data = array("i", arr)
+        if sys.byteorder != "little":  # pragma: no cover - platform dependent
+            data.byteswap()
+        h.update(data.tobytes())
+    return h.hexdigest()
+
+
+def default_cache_dir() -> str:
+    """Directory used when :class:`ResultCache` is given none.
+
+    ``$CONTROL_HUB_CACHE`` if set, otherwise ``control_hubs`` under
+    ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+
+    path = os.environ.get("CONTROL_HUB_CACHE")
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "control_hubs")
+
+
+class ResultCache:
+    """Store JSON results under a hash of the network, analysis and parameters.
+
+    Every entry is one file ``<key>.json``. Reading an entry refreshes its
+    modification time, so eviction drops entries older than ``max_age``
+    seconds first and then the least recently used ones until the cache fits
+    in ``max_bytes``.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024, max_age: Optional[float] = 30 * 24 * 3600):
+        """Open (and create) a cache directory.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Where entries are stored. Defaults to :func:`default_cache_dir`.
+        max_bytes : int, optional
+            Upper bound on the total size of the entries.
+        max_age : float, optional
+            Entries unused for longer than this many seconds are dropped.
+            ``None`` keeps them regardless of age.
+        """
+
+        self.directory = directory if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, graph: Optional[CSRGraph], kind: str, **params: Any) -> str:
+        """Return the cache key of analysis ``kind`` with ``params`` on ``graph``.
+
+        ``graph`` may be ``None`` for results that do not depend on a network.
+        """
+
+        payload = json.dumps(
+            {
+                "version": FORMAT_VERSION,
+                "network": network_digest(graph) if graph is not None else None,
+                "kind": kind,
+                "params": params,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result for ``key`` or ``None``."""
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:  # pragma: no cover - concurrent eviction
+            pass
+        return value
+
+    def put(self, key: str, value: Dict[str, Any], evict: bool = True) -> None:
+        """Store ``value`` under ``key`` and evict old entries if needed.
+
+        Eviction lists the whole directory. Callers storing many entries in a
+        row pass ``evict=False`` and call :meth:`evict` once at the end.
+        """
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if evict:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond ``max_bytes``."""
+
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:  # pragma: no cover - concurrent eviction
+                continue
+            if self.max_age is not None and now - st.st_mtime > self.max_age:
+                self._remove(path)
+            else:
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every entry."""
+
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:  # pragma: no cover - concurrent eviction
+            pass
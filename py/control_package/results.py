@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+"""Structured results returned by the analyses.
+
+Every result offers the same three views used by :mod:`.writers`:
+``to_text()`` (the legacy report), ``to_dict()`` (JSON-ready) and
+``to_rows()`` (a CSV header and rows).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Set, Tuple, Union
+
+
+@dataclass
+class ClassificationResult:
+    """Node roles computed by :class:`NodeClassification`.
+
+    Attributes
+    ----------
+    nodeNum : int
+        Number of nodes.
+    Head, Tail, Control_hub : set[int]
+        Nodes of each category; a node can be both head and tail.
+    """
+
+    nodeNum: int
+    Head: Set[int]
+    Tail: Set[int]
+    Control_hub: Set[int]
+
+    def role(self, node: int) -> str:
+        """Label of ``node`` in the legacy report.
+
+        Raises
+        ------
+        ValueError
+            If ``node`` is not in ``1..nodeNum``.
+        """
+
+        if not isinstance(node, int) or not 1 <= node <= self.nodeNum:
+            raise ValueError(f"no node {node!r}")
+        head = node in self.Head
+        tail = node in self.Tail
+        if head and tail:
+            return "Head,Tail"
+        if head:
+            return "head"
+        if tail:
+            return "Tail"
+        return "Control_hub"
+
+    def to_text(self) -> str:
+        return "".join(f"{i}: {self.role(i)}\n" for i in range(1, self.nodeNum + 1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nodeNum": self.nodeNum,
+            "Head": sorted(self.Head),
+            "Tail": sorted(self.Tail),
+            "Control_hub": sorted(self.Control_hub),
+        }
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        return ("node", "role"), [(i, self.role(i)) for i in range(1, self.nodeNum + 1)]
+
+
+@dataclass
+class SensitivityResult:
+    """Control hubs lost by deleting some single edge."""
+
+    sensitive_control_hub: Set[int]
+
+    def to_text(self) -> str:
+        return "sensitive control hub id:\n" + "".join(f"{h}\n" for h in sorted(self.sensitive_control_hub))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"sensitive_control_hub": sorted(self.sensitive_control_hub)}
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        return ("control_hub",), [(h,) for h in sorted(self.sensitive_control_hub)]
+
+
+@dataclass
+class KnockoutResult:
+    """Control hubs lost by every screened knockout.
+
+    Attributes
+    ----------
+    targets : list
+        Screened node ids, or tuples of node ids knocked out together.
+    impact : dict
+        Lost control hubs of every target that costs any.
+    """
+
+    targets: List[Union[int, Tuple[int, ...]]]
+    impact: Dict[Union[int, Tuple[int, ...]], Set[int]] = field(default_factory=dict)
+
+    @staticmethod
+    def _label(target: Union[int, Tuple[int, ...]]) -> str:
+        return str(target) if isinstance(target, int) else ",".join(str(n) for n in target)
+
+    def _items(self):
+        for target in self.targets:
+            hubs = self.impact.get(target)
+            if hubs:
+                yield target, sorted(hubs)
+
+    def to_text(self) -> str:
+        lines = ["knocked-out node id: lost control hub id\n"]
+        for target, hubs in self._items():
+            lines.append(f"{self._label(target)}: {' '.join(str(h) for h in hubs)}\n")
+        return "".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"knockout_impact": [[target, hubs] for target, hubs in self._items()]}
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        rows = [(self._label(target), h) for target, hubs in self._items() for h in hubs]
+        return ("knocked_out", "control_hub"), rows
+
+
+@dataclass
+class CriticalityResult:
+    """Edge labels computed by :class:`EdgeCriticality`.
+
+    Attributes
+    ----------
+    src, des : sequence of int
+        Endpoints of every edge id, slot ``0`` unused.
+    labels : sequence of int
+        Label of every edge id: ``2`` critical, ``1`` ordinary, ``0``
+        redundant.
+    """
+
+    src: Sequence[int]
+    des: Sequence[int]
+    labels: Sequence[int]
+
+    NAMES = ("redundant", "ordinary", "critical")
+
+    def _edges(self, label: int) -> List[int]:
+        return [e for e in range(1, len(self.labels)) if self.labels[e] == label]
+
+    def to_text(self) -> str:
+        return "edge id: source target label\n" + "".join(
+            f"{e}: {self.src[e]} {self.des[e]} {self.NAMES[self.labels[e]]}\n" for e in range(1, len(self.labels)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self._edges(label) for label, name in enumerate(self.NAMES)}
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        rows = [(e, self.src[e], self.des[e], self.NAMES[self.labels[e]]) for e in range(1, len(self.labels))]
+        return ("edge", "source", "target", "label"), rows
+
+
+@dataclass
+class PairwiseResult:
+    """Control hubs lost only to a pair of edge deletions or node knockouts.
+
+    Attributes
+    ----------
+    mode : str
+        ``"edge"`` for pairs of edge ids, ``"node"`` for pairs of node ids.
+    pairs : list
+        ``(pair, hubs)`` of the pairs that cost the most hubs, most harmful
+        first; ``hubs`` survive every single deletion of the same kind.
+    control_hubs : set[int]
+        Every such hub lost to any screened pair, also beyond ``pairs``.
+    pairs_found, pairs_evaluated : int
+        Number of harmful pairs and of pairs evaluated.
+    """
+
+    mode: str
+    pairs: List[Tuple[Tuple[int, int], List[int]]]
+    control_hubs: Set[int] = field(default_factory=set)
+    pairs_found: int = 0
+    pairs_evaluated: int = 0
+
+    HEADERS = {"edge": "deleted edge ids", "node": "knocked-out node ids"}
+
+    def to_text(self) -> str:
+        lines = [f"{self.HEADERS[self.mode]}: lost control hub id\n"]
+        for (first, second), hubs in self.pairs:
+            lines.append(f"{first},{second}: {' '.join(str(h) for h in hubs)}\n")
+        return "".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pairs": [[list(pair), list(hubs)] for pair, hubs in self.pairs],
+            "control_hubs": sorted(self.control_hubs),
+            "pairs_found": self.pairs_found,
+            "pairs_evaluated": self.pairs_evaluated,
+        }
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        rows = [(first, second, h) for (first, second), hubs in self.pairs for h in hubs]
+        return ("first", "second", "control_hub"), rows
+
+
+@dataclass
+class ApproximateSensitivityResult:
+    """Estimated share of the edges whose deletion costs each control hub.
+
+    Attributes
+    ----------
+    estimates : dict[int, tuple[float, float, float]]
+        ``(estimate, low, high)`` of every control hub lost to some sampled
+        edge, as shares of all edges.
+    bound : float
+        Upper confidence bound of the control hubs never lost in the
+        sample; their estimate is ``0``.
+    confidence : float
+        Confidence level of the intervals.
+    edges_evaluated, edges_total : int
+        Number of sampled edges and of the edges they were drawn from.
+    """
+
+    estimates: Dict[int, Tuple[float, float, float]]
+    bound: float
+    confidence: float
+    edges_evaluated: int
+    edges_total: int
+
+    def to_text(self) -> str:
+        lines = [f"sampled {self.edges_evaluated} of {self.edges_total} edges, "
+                 f"{self.confidence:.0%} confidence\n",
+                 "control hub id: estimated share of edges [low, high]\n"]
+        for hub, (estimate, low, high) in sorted(self.estimates.items()):
+            lines.append(f"{hub}: {estimate:.6g} [{low:.6g}, {high:.6g}]\n")
+        lines.append(f"other control hubs: 0 [0, {self.bound:.6g}]\n")
+        return "".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "estimates": [[hub, *values] for hub, values in sorted(self.estimates.items())],
+            "bound": self.bound,
+            "confidence": self.confidence,
+            "edges_evaluated": self.edges_evaluated,
+            "edges_total": self.edges_total,
+        }
+
+    def to_rows(self) -> Tuple[Sequence[str], List[Sequence[Any]]]:
+        rows = [(hub, *values) for hub, values in sorted(self.estimates.items())]
+        return ("control_hub", "estimate", "low", "high"), rows
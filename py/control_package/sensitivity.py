@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+"""Incremental evaluation of edge deletions and node knockouts on control hubs."""
+
+from bisect import bisect_left
+from typing import AbstractSet, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .edge_criticality import CRITICAL, edge_labels
+from .graph import CSRGraph
+from .matching import Matching
+from .node_classification import NodeClassification
+
+
+def _augment(graph: CSRGraph, node: int, mate_src: List[int], mate_des: List[int], source: bool) -> bool:
+    """Augment the matching in place along a shortest path from ``node``.
+
+    ``node`` is an unmatched source copy if ``source`` is set, else an
+    unmatched destination copy. Returns whether a path was found.
+    """
+
+    if source:
+        offset, target, mate_root, mate_other = graph.outOffset, graph.outTarget, mate_src, mate_des
+    else:
+        offset, target, mate_root, mate_other = graph.inOffset, graph.inTarget, mate_des, mate_src
+    # other-side node -> root-side node it was reached from
+    prev = {}
+    queue = [node]
+    idx = 0
+    while idx < len(queue):
+        r = queue[idx]
+        idx += 1
+        for k in range(offset[r], offset[r + 1]):
+            o = target[k]
+            if o in prev:
+                continue
+            prev[o] = r
+            m = mate_other[o]
+            if m == 0:
+                while o:
+                    r = prev[o]
+                    nxt = mate_root[r]
+                    mate_root[r] = o
+                    mate_other[o] = r
+                    o = nxt
+                return True
+            queue.append(m)
+    return False
+
+
+class SensitivityEngine:
+    """Evaluate single edge deletions against one baseline classification.
+
+    Head and tail nodes are the nodes that are unmatched on the
+    destination/source side in *some* maximum matching, so they can be read
+    off any maximum matching by alternating-path reachability.  Deleting an
+    edge therefore never has to rebuild the network:
+
+    * an edge outside the baseline matching leaves the matching maximum and
+      can only shrink the reachable sets, so no control hub is lost;
+    * deleting a matched edge ``u -> v`` frees ``u`` and ``v``.  If an
+      augmenting path exists afterwards the matching size is unchanged and
+      again no hub is lost.  Otherwise the new tails are the old tails plus
+      everything reachable from ``u`` and the new heads the old heads plus
+      everything reachable from ``v``.
+
+    One bounded search from each endpoint of a matched edge is all that is
+    needed, nodes that are already heads or tails are never expanded again.
+
+    Knocking out a node ``x`` removes its source copy and its destination
+    copy from the bipartite split, one after the other.  Removing a copy
+    that is unmatched in some maximum matching (``x`` is a tail for the
+    source copy, a head for the destination copy) can only shrink the heads
+    and tails.  Removing a copy that is matched in every maximum matching
+    frees its partner and, exactly as for a matched edge, adds everything
+    reachable from the partner.  :meth:`knockout` orders the two removals so
+    that both steps stay exact and again only searches from the partners.
+    """
+
+    def __init__(self, classification: NodeClassification):
+        """Prepare the engine from a finished :class:`NodeClassification`.
+
+        Parameters
+        ----------
+        classification : NodeClassification
+            Baseline classification. Its graph and the maximum matching left
+            in ``markedSrc``/``markedDes`` are shared, not copied, and must
+            not be modified while the engine is in use.
+        """
+
+        self._adopt(classification)
+        # edge id realising the matched pair of every source node
+        self.matchedEdge = [0] * (self.nodeNum + 1)
+        for src in range(1, self.nodeNum + 1):
+            if self.markedSrc[src] != 0:
+                self.matchedEdge[src] = self.graph.find_edge(src, self.markedSrc[src])
+
+    def _adopt(self, classification: NodeClassification) -> None:
+        """Share the graph, matching and roles of ``classification``."""
+
+        self.graph = classification.graph
+        self.nodeNum = classification.nodeNum
+        self.edgeNum = classification.edgeNum
+        self.markedSrc = classification.markedSrc
+        self.markedDes = classification.markedDes
+        self.matching = classification.matching
+        self.Head: Set[int] = set(classification.Head)
+        self.Tail: Set[int] = set(classification.Tail)
+        self.Control_hub: Set[int] = set(classification.Control_hub)
+
+    def matched_edges(self) -> List[int]:
+        """Return the ids of the edges in the baseline matching."""
+
+        return [e for e in self.matchedEdge if e != 0]
+
+    def critical_edges(self) -> List[int]:
+        """Return the ids of the edges in every maximum matching.
+
+        Only their deletion can cost control hubs: any other matched edge
+        starts at a tail, ends at a head or lies on an alternating cycle, and
+        :meth:`lost_hubs` finds nothing for it. See :func:`edge_labels`.
+        Labelling the edges takes a pass over the whole graph, which only
+        pays off when every evaluation is expensive.
+        """
+
+        labels = edge_labels(self.graph, self.markedSrc, self.markedDes, self.Head, self.Tail)
+        return [e for e in self.matchedEdge if e != 0 and labels[e] == CRITICAL]
+
+    def _grow_tail(self, src: int, des: int, edge_idx: int) -> Optional[Set[int]]:
+        """Tails gained once ``src`` and ``des`` are unmatched.
+
+        Returns ``None`` when an augmenting path exists, i.e. the matching
+        size survives the deletion of ``edge_idx``.
+        """
+
+        offset = self.graph.outOffset
+        target = self.graph.outTarget
+        edge_ids = self.graph.outEdge
+        found = {src}
+        queue = [src]
+        idx = 0
+        while idx < len(queue):
+            s = queue[idx]
+            idx += 1
+            for k in range(offset[s], offset[s + 1]):
+                if edge_ids[k] == edge_idx:
+                    continue
+                d = target[k]
+                if d == des:
+                    return None
+                m = self.markedDes[d]
+                if m == 0:
+                    return None
+                if m not in found and m not in self.Tail:
+                    found.add(m)
+                    queue.append(m)
+        return found
+
+    def _grow_head(self, src: int, des: int, edge_idx: int) -> Set[int]:
+        """Heads gained once ``src`` and ``des`` are unmatched."""
+
+        offset = self.graph.inOffset
+        target = self.graph.inTarget
+        edge_ids = self.graph.inEdge
+        found = {des}
+        queue = [des]
+        idx = 0
+        while idx < len(queue):
+            d = queue[idx]
+            idx += 1
+            for k in range(offset[d], offset[d + 1]):
+                if edge_ids[k] == edge_idx:
+                    continue
+                s = target[k]
+                if s == src:
+                    continue
+                m = self.markedSrc[s]
+                if m != 0 and m not in found and m not in self.Head:
+                    found.add(m)
+                    queue.append(m)
+        return found
+
+    def lost_hubs(self, edge_idx: int) -> Set[int]:
+        """Return the control hubs that lose their status without ``edge_idx``.
+
+        Parameters
+        ----------
+        edge_idx : int
+            1-indexed id of the deleted edge.
+        """
+
+        src = self.graph.src[edge_idx]
+        des = self.graph.des[edge_idx]
+        if self.matchedEdge[src] != edge_idx:
+            return set()
+        if src in self.Tail or des in self.Head:
+            return set()
+        tails = self._grow_tail(src, des, edge_idx)
+        if tails is None:
+            return set()
+        heads = self._grow_head(src, des, edge_idx)
+        return {n for n in tails | heads if n in self.Control_hub}
+
+    def sweep(self, edges: Optional[Iterable[int]] = None) -> Dict[int, Set[int]]:
+        """Map every edge in ``edges`` that costs hubs to the hubs it costs.
+
+        Parameters
+        ----------
+        edges : iterable of int, optional
+            Edge ids to evaluate. Defaults to the baseline matched edges, the
+            only ones whose deletion can change the control hubs.
+            :meth:`critical_edges` narrows them further.
+        """
+
+        if edges is None:
+            edges = self.matched_edges()
+        impact: Dict[int, Set[int]] = {}
+        for idx in edges:
+            lost = self.lost_hubs(idx)
+            if lost:
+                impact[idx] = lost
+        return impact
+
+    def _reach_tail(self, roots: List[int], mate_des: List[int], prune: AbstractSet[int], gone: int) -> Optional[Set[int]]:
+        """Sources reachable from the unmatched sources ``roots``.
+
+        The destination copy of ``gone`` is ignored. Returns ``None`` when an
+        augmenting path exists.
+        """
+
+        offset = self.graph.outOffset
+        target = self.graph.outTarget
+        found = set(roots)
+        queue = list(roots)
+        idx = 0
+        while idx < len(queue):
+            s = queue[idx]
+            idx += 1
+            for k in range(offset[s], offset[s + 1]):
+                d = target[k]
+                if d == gone:
+                    continue
+                m = mate_des[d]
+                if m == 0:
+                    return None
+                if m not in found and m not in prune:
+                    found.add(m)
+                    queue.append(m)
+        return found
+
+    def _reach_head(self, roots: List[int], mate_src: List[int], prune: AbstractSet[int], gone: int, gone_des: bool) -> Optional[Set[int]]:
+        """Destinations reachable from the unmatched destinations ``roots``.
+
+        Mirror image of :meth:`_reach_tail`: the source copy of ``gone`` is
+        ignored, and so is its destination copy if ``gone_des`` is set.
+        """
+
+        offset = self.graph.inOffset
+        target = self.graph.inTarget
+        found = set(roots)
+        queue = list(roots)
+        idx = 0
+        while idx < len(queue):
+            d = queue[idx]
+            idx += 1
+            for k in range(offset[d], offset[d + 1]):
+                s = target[k]
+                if s == gone:
+                    continue
+                m = mate_src[s]
+                if m == 0 or (gone_des and m == gone):
+                    return None
+                if m not in found and m not in prune:
+                    found.add(m)
+                    queue.append(m)
+        return found
+
+    def _free_source(self, node: int, mate_src: List[int], mate_des: List[int]) -> None:
+        """Rearrange the matching in place so that source ``node`` is free.
+
+        ``node`` must be a tail: the alternating path reaching it from an
+        unmatched source is flipped.
+        """
+
+        if mate_src[node] == 0:
+            return
+        offset = self.graph.inOffset
+        target = self.graph.inTarget
+        nxt = {node: 0}
+        queue = [node]
+        idx = 0
+        start = 0
+        while not start:
+            x = queue[idx]
+            idx += 1
+            d = mate_src[x]
+            for k in range(offset[d], offset[d + 1]):
+                s = target[k]
+                if s in nxt:
+                    continue
+                nxt[s] = x
+                if mate_src[s] == 0:
+                    start = s
+                    break
+                queue.append(s)
+        s = start
+        while s != node:
+            x = nxt[s]
+            d = mate_src[x]
+            mate_src[s] = d
+            mate_des[d] = s
+            s = x
+        mate_src[node] = 0
+
+    def _free_destination(self, node: int, mate_src: List[int], mate_des: List[int]) -> None:
+        """Rearrange the matching in place so that destination ``node`` is free.
+
+        Mirror image of :meth:`_free_source`; ``node`` must be a head.
+        """
+
+        if mate_des[node] == 0:
+            return
+        offset = self.graph.outOffset
+        target = self.graph.outTarget
+        prev = {node: 0}
+        queue = [node]
+        idx = 0
+        end = 0
+        while not end:
+            x = queue[idx]
+            idx += 1
+            s = mate_des[x]
+            for k in range(offset[s], offset[s + 1]):
+                d = target[k]
+                if d in prev:
+                    continue
+                prev[d] = x
+                if mate_des[d] == 0:
+                    end = d
+                    break
+                queue.append(d)
+        d = end
+        while d != node:
+            x = prev[d]
+            s = mate_des[x]
+            mate_src[s] = d
+            mate_des[d] = s
+            d = x
+        mate_des[node] = 0
+
+    def knockout(self, nodes: Union[int, Iterable[int]]) -> Set[int]:
+        """Return the control hubs that lose their status when ``nodes`` go.
+
+        Parameters
+        ----------
+        nodes : int or iterable of int
+            Node, or batch of nodes, whose edges are all deleted. Knocked-out
+            nodes are never reported themselves.
+        """
+
+        if not isinstance(nodes, int):
+            batch = set(nodes)
+            if len(batch) != 1:
+                return self._knockout_batch(batch)
+            nodes = batch.pop()
+        x = nodes
+
+        if x in self.Tail or x in self.Head:
+            # one copy can be left unmatched: drop it first from a matching
+            # that leaves it free, which loses nothing, then check whether the
+            # other copy became indispensable
+            mate_src = list(self.markedSrc)
+            mate_des = list(self.markedDes)
+            if x in self.Tail:
+                self._free_source(x, mate_src, mate_des)
+                partner = mate_des[x]
+                found = self._reach_tail([partner], mate_des, (), x) if partner else None
+            else:
+                self._free_destination(x, mate_src, mate_des)
+                partner = mate_src[x]
+                found = self._reach_head([partner], mate_src, (), x, True) if partner else None
+            if found is None:
+                return set()
+        else:
+            # both copies are matched in every maximum matching: dropping the
+            # source copy frees its partner and grows the heads
+            found = self._reach_head([self.markedSrc[x]], self.markedSrc, self.Head, x, False)
+            if x not in found:
+                found |= self._reach_tail([self.markedDes[x]], self.markedDes, self.Tail, x)
+            else:
+                # the destination copy is no longer indispensable, so the
+                # second removal shrinks the grown sets again; read them off
+                # the repaired matching instead
+                mate_src = list(self.markedSrc)
+                mate_des = list(self.markedDes)
+                mate_des[mate_src[x]] = 0
+                mate_src[x] = 0
+                self._free_destination(x, mate_src, mate_des)
+                free_src = [s for s in range(1, self.nodeNum + 1) if mate_src[s] == 0 and s != x]
+                free_des = [d for d in range(1, self.nodeNum + 1) if mate_des[d] == 0 and d != x]
+                found = self._reach_tail(free_src, mate_des, (), x) | self._reach_head(free_des, mate_src, (), x, True)
+        found.discard(x)
+        return found & self.Control_hub
+
+    def _knockout_batch(self, nodes: Set[int]) -> Set[int]:
+        """Reclassify the network without ``nodes``, warm-started."""
+
+        after = self.without(nodes)
+        return {h for h in self.Control_hub if h not in nodes and h not in after.Control_hub}
+
+    def knockout_sweep(self, targets: Optional[Iterable[Union[int, Iterable[int]]]] = None) -> Dict[Union[int, Tuple[int, ...]], Set[int]]:
+        """Map every knockout in ``targets`` that costs hubs to the hubs it costs.
+
+        Parameters
+        ----------
+        targets : iterable, optional
+            Node ids, or tuples of node ids knocked out together. Defaults to
+            every node of the network.
+        """
+
+        if targets is None:
+            targets = range(1, self.nodeNum + 1)
+        impact: Dict[Union[int, Tuple[int, ...]], Set[int]] = {}
+        for target in targets:
+            if not isinstance(target, int):
+                target = tuple(target)
+            lost = self.knockout(target)
+            if lost:
+                impact[target] = lost
+        return impact
+
+    def without(self, nodes: Iterable[int] = (), edges: Iterable[int] = ()) -> "SensitivityEngine":
+        """Return the engine of the network without ``nodes`` and ``edges``.
+
+        The baseline matching is repaired instead of recomputed: every pair
+        it loses frees up to two copies, and one augmenting path search from
+        each of them usually restores a maximum matching, which the
+        classification of the smaller network then only has to confirm.
+        Node ids are kept, edge ids change as in :meth:`CSRGraph.without`.
+
+        Parameters
+        ----------
+        nodes : iterable of int, optional
+            Nodes whose edges are all deleted.
+        edges : iterable of int, optional
+            Ids of further edges to delete.
+        """
+
+        nodes = set(nodes)
+        edges = set(edges)
+        g = self.graph
+        drop = set(edges)
+        for x in nodes:
+            drop.update(g.out_edges(x))
+            drop.update(g.in_edges(x))
+        reduced = g.without(edges=drop)
+        mate_src = list(self.markedSrc)
+        mate_des = list(self.markedDes)
+        freed = []
+        for s in {g.src[e] for e in drop}:
+            d = mate_src[s]
+            if d and not reduced.find_edge(s, d):
+                mate_src[s] = mate_des[d] = 0
+                freed.extend(((s, True), (d, False)))
+        for node, source in freed:
+            if node not in nodes and (mate_src if source else mate_des)[node] == 0:
+                _augment(reduced, node, mate_src, mate_des, source)
+        classification = NodeClassification(graph=reduced, output_file=None,
+                                            matching=Matching(reduced, mate_src, mate_des))
+
+        engine = SensitivityEngine.__new__(SensitivityEngine)
+        engine._adopt(classification)
+        # pairs that kept their edge only need its new id
+        dropped = sorted(drop)
+        engine.matchedEdge = [0] * (self.nodeNum + 1)
+        for s in range(1, self.nodeNum + 1):
+            d = engine.markedSrc[s]
+            e = self.matchedEdge[s]
+            if d == 0:
+                continue
+            if d == self.markedSrc[s] and e not in drop:
+                engine.matchedEdge[s] = e - bisect_left(dropped, e)
+            else:
+                engine.matchedEdge[s] = reduced.find_edge(s, d)
+        return engine
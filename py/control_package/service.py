@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+"""Local analysis service that keeps networks, matchings and roles warm.
+
+:class:`AnalysisService` loads every network once and keeps its graph,
+maximum matching and classification in memory, evicting the least recently
+used networks when a memory budget is exceeded. :class:`AnalysisServer`
+answers JSON-RPC 2.0 requests for it over HTTP on localhost, one thread
+per request, and :class:`ServiceClient` turns the answers back into the
+result objects of the in-process API::
+
+    python py/main/serve.py --port 8765 --memory 1G net/blca.net
+
+    client = ServiceClient("http://127.0.0.1:8765")
+    roles = client.classification("net/blca.net")  # a ClassificationResult
+"""
+
+from array import array
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+import inspect
+import json
+import os
+import sys
+import threading
+import urllib.request
+
+from .control_schemes import ControlScheme, ControlSchemes
+from .node_classification import NodeClassification
+from .result_cache import ResultCache
+from .results import ClassificationResult
+from .sensitivity import SensitivityEngine
+
+#: Methods answered by :meth:`AnalysisService.call`.
+METHODS = ("load", "networks", "evict", "classification", "roles", "hubs", "names", "scheme",
+           "sample_schemes", "what_if")
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+def _footprint(objects: Iterable[Any], seen: Set[int]) -> int:
+    """Approximate bytes held by ``objects`` and the items of their containers.
+
+    Buffers count their data: ``sys.getsizeof`` of a memoryview into a
+    memory-mapped sidecar is only its header. Objects whose id is in
+    ``seen`` are skipped, so structures shared between analyses count once.
+    Every int in a list or set is counted as a separate object, which
+    overestimates the small ints Python shares.
+    """
+
+    total = 0
+    for obj in objects:
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, memoryview):
+            total += obj.nbytes
+        elif isinstance(obj, array):
+            total += sys.getsizeof(obj) + len(obj) * obj.itemsize
+        elif hasattr(obj, "nbytes"):  # numpy arrays
+            total += sys.getsizeof(obj) + int(obj.nbytes)
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(obj)
+            for item in obj:
+                if isinstance(item, int):
+                    total += 28
+                elif item is not None:
+                    total += _footprint((item,), seen)
+        else:
+            total += sys.getsizeof(obj)
+    return total
+
+
+class _Network:
+    """One warm network and the analyses built on it so far."""
+
+    def __init__(self, path: str, stamp: Tuple[int, int], classification: NodeClassification):
+        self.path = path
+        self.stamp = stamp
+        self.classification = classification
+        self.graph = classification.graph
+        self.lock = threading.Lock()
+        self._engine: Optional[SensitivityEngine] = None
+        self._schemes: Optional[ControlSchemes] = None
+        self.bytes = self.measure()
+
+    def measure(self) -> int:
+        """Estimate the bytes held by the network and everything built on it."""
+
+        g = self.graph
+        c = self.classification
+        parts: List[Any] = [g.src, g.des, g.outOffset, g.outTarget, g.outEdge, g.inOffset, g.inTarget, g.inEdge,
+                            g.names, c.markedSrc, c.markedDes, c.Head, c.Tail, c.Control_hub]
+        # scratch lists of the search, absent when the roles came from the cache
+        parts += [getattr(c, name, None) for name in ("distSrc", "distDes", "arcSrc", "arcDes", "unMatchedNode")]
+        for matching in (g._matching, getattr(c, "matching", None)):
+            if matching is not None:
+                parts += [matching.markedSrc, matching.markedDes]
+        if g._components is not None:
+            parts += [g._components.componentEdges, g._components.srcComponent, g._components.desComponent]
+        if self._engine is not None:
+            e = self._engine
+            parts += [e.matchedEdge, e.Head, e.Tail, e.Control_hub]
+        if self._schemes is not None:
+            s = self._schemes
+            parts += [s.driverCount, s.tailCount, s.middleCount, s.scheme.matchedEdgeList, s.scheme.driverNode,
+                      s.scheme.tailNode]
+        return _footprint(parts, set())
+
+    def engine(self) -> SensitivityEngine:
+        with self.lock:
+            if self._engine is None:
+                self._engine = SensitivityEngine(self.classification)
+                self.bytes = self.measure()
+            return self._engine
+
+    def schemes(self) -> ControlSchemes:
+        # callers hold ``lock``: sampling updates the counters of the instance
+        if self._schemes is None:
+            self._schemes = ControlSchemes(graph=self.graph, output_file=None)
+            self.bytes = self.measure()
+        return self._schemes
+
+    def result(self) -> ClassificationResult:
+        return self.classification.result()
+
+
+class AnalysisService:
+    """Keep analysed networks in memory and answer queries about them.
+
+    Networks are named by their file path and loaded on first use; the
+    parsing, the maximum matching and the classification are paid once per
+    network, and again only if its file changes. The service is safe to use
+    from many threads: concurrent first requests for the same network wait
+    for a single load.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, cache: Optional[ResultCache] = None, backend: str = "python"):
+        """Create an empty service.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            Memory budget of the networks kept warm, estimated from their
+            arrays and role sets. The least recently used networks are
+            dropped when it is exceeded; the most recent one is always kept.
+        cache : ResultCache, optional
+            On-disk cache the classifications are served from, so a
+            restarted service warms up faster.
+        backend : {"python", "scipy"}, optional
+            Matching solver, see :class:`NodeClassification`.
+        """
+
+        self.max_bytes = max_bytes
+        self.cache = cache
+        self.backend = backend
+        self._networks: "OrderedDict[str, _Network]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # network registry
+
+    def _lookup(self, path: str, stamp: Tuple[int, int]) -> Optional[_Network]:
+        with self._lock:
+            entry = self._networks.get(path)
+            if entry is None or entry.stamp != stamp:
+                return None
+            self._networks.move_to_end(path)
+            return entry
+
+    def network(self, path: str) -> _Network:
+        """Return the warm network stored at ``path``, loading it if needed."""
+
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        entry = self._lookup(path, stamp)
+        if entry is not None:
+            return entry
+        with self._lock:
+            loading = self._loading.setdefault(path, threading.Lock())
+        with loading:
+            entry = self._lookup(path, stamp)
+            if entry is None:
+                classification = NodeClassification(path, output_file=None, cache=self.cache, backend=self.backend)
+                entry = _Network(path, stamp, classification)
+                with self._lock:
+                    self._networks[path] = entry
+                    self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        """Drop least recently used networks until the budget holds; needs ``_lock``."""
+
+        while len(self._networks) > 1 and sum(e.bytes for e in self._networks.values()) > self.max_bytes:
+            self._networks.popitem(last=False)
+
+    def _grown(self) -> None:
+        with self._lock:
+            self._evict()
+
+    # ------------------------------------------------------------------
+    # queries
+
+    def load(self, network: str) -> Dict[str, Any]:
+        """Warm up ``network`` and describe it."""
+
+        entry = self.network(network)
+        return {"path": entry.path, "nodeNum": entry.graph.nodeNum, "edgeNum": entry.graph.edgeNum,
+                "bytes": entry.bytes}
+
+    def networks(self) -> List[Dict[str, Any]]:
+        """Describe the warm networks, least recently used first."""
+
+        with self._lock:
+            entries = list(self._networks.values())
+        return [{"path": e.path, "nodeNum": e.graph.nodeNum, "edgeNum": e.graph.edgeNum, "bytes": e.bytes}
+                for e in entries]
+
+    def evict(self, network: str) -> bool:
+        """Drop ``network`` from memory; returns whether it was warm."""
+
+        with self._lock:
+            return self._networks.pop(os.path.abspath(network), None) is not None
+
+    def classification(self, network: str) -> Dict[str, Any]:
+        """Node roles, as :meth:`ClassificationResult.to_dict`."""
+
+        return self.network(network).result().to_dict()
+
+    def roles(self, network: str, nodes: Optional[Iterable[int]] = None) -> Dict[str, str]:
+        """Role label of ``nodes`` (default: every node), keyed by node id.
+
+        Raises
+        ------
+        ValueError
+            If a node id is not in ``1..nodeNum``.
+        """
+
+        result = self.network(network).result()
+        if nodes is None:
+            nodes = range(1, result.nodeNum + 1)
+        return {str(n): result.role(n) for n in nodes}
+
+    def hubs(self, network: str) -> List[int]:
+        """Ids of the control hubs."""
+
+        return sorted(self.network(network).classification.Control_hub)
+
+    def names(self, network: str) -> List[Optional[str]]:
+        """Node labels indexed by node id, slot ``0`` unused."""
+
+        return list(self.network(network).graph.names)
+
+    def scheme(self, network: str) -> Dict[str, Any]:
+        """The control scheme of the maximum matching, as :meth:`ControlScheme.to_dict`."""
+
+        entry = self.network(network)
+        with entry.lock:
+            scheme = entry.schemes().scheme
+        self._grown()
+        return scheme.to_dict()
+
+    def sample_schemes(self, network: str, n: int, seed: Optional[int] = None, swaps: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Draw ``n`` random control schemes, see :meth:`ControlSchemes.sample`."""
+
+        entry = self.network(network)
+        with entry.lock:
+            schemes = [s.to_dict() for s in entry.schemes().sample(n, seed=seed, swaps=swaps)]
+        self._grown()
+        return schemes
+
+    def what_if(self, network: str, edges: Sequence[Union[int, Sequence[int]]]) -> Dict[str, Any]:
+        """Roles after deleting ``edges``, without changing the warm network.
+
+        Parameters
+        ----------
+        network : str
+            Path of the network.
+        edges : sequence
+            Edge ids, or ``[src, des]`` pairs naming the first such edge.
+
+        Returns
+        -------
+        dict
+            ``lost`` and ``gained`` control hubs, and the new ``roles`` of
+            the nodes whose role changed.
+
+        Raises
+        ------
+        ValueError
+            If an edge does not exist.
+        """
+
+        entry = self.network(network)
+        g = entry.graph
+        ids = set()
+        for edge in edges:
+            if isinstance(edge, int):
+                if not 1 <= edge <= g.edgeNum:
+                    raise ValueError(f"no edge {edge}")
+                ids.add(edge)
+            else:
+                src, des = edge
+                idx = g.find_edge(src, des) if 1 <= src <= g.nodeNum else 0
+                if not idx:
+                    raise ValueError(f"no edge {src} -> {des}")
+                ids.add(idx)
+        engine = entry.engine()
+        self._grown()
+        after = engine.without(edges=ids)
+        before = entry.result()
+        now = ClassificationResult(g.nodeNum, after.Head, after.Tail, after.Control_hub)
+        return {
+            "lost": sorted(before.Control_hub - now.Control_hub),
+            "gained": sorted(now.Control_hub - before.Control_hub),
+            "roles": {str(n): now.role(n) for n in range(1, g.nodeNum + 1) if now.role(n) != before.role(n)},
+        }
+
+    # ------------------------------------------------------------------
+    # JSON-RPC
+
+    def call(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Answer one JSON-RPC 2.0 request object.
+
+        Returns the response object, or ``None`` for a notification.
+        """
+
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "invalid request"}}
+        rid = request.get("id")
+        method = request["method"]
+        params = request.get("params", {})
+        if method not in METHODS:
+            error: Dict[str, Any] = {"code": METHOD_NOT_FOUND, "message": f"unknown method: {method}"}
+            return {"jsonrpc": "2.0", "id": rid, "error": error} if "id" in request else None
+        func = getattr(self, method)
+        try:
+            if isinstance(params, list):
+                args, kwargs = params, {}
+            elif isinstance(params, dict):
+                args, kwargs = [], params
+            else:
+                raise TypeError("params must be an array or an object")
+            inspect.signature(func).bind(*args, **kwargs)
+        except TypeError as exc:
+            error = {"code": INVALID_PARAMS, "message": str(exc)}
+            return {"jsonrpc": "2.0", "id": rid, "error": error} if "id" in request else None
+        try:
+            response: Dict[str, Any] = {"jsonrpc": "2.0", "id": rid, "result": func(*args, **kwargs)}
+        except ValueError as exc:
+            response = {"jsonrpc": "2.0", "id": rid, "error": {"code": INVALID_PARAMS, "message": str(exc)}}
+        except Exception as exc:
+            response = {"jsonrpc": "2.0", "id": rid,
+                        "error": {"code": SERVER_ERROR, "message": f"{type(exc).__name__}: {exc}"}}
+        return response if "id" in request else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request = json.loads(body)
+        except ValueError:
+            response: Any = {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": "parse error"}}
+        else:
+            service = self.server.service
+            if isinstance(request, list):
+                response = [r for r in map(service.call, request) if r is not None] or None
+            else:
+                response = service.call(request)
+        if response is None:
+            self.send_response(204)
+            self.end_headers()
+            return
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """JSON-RPC 2.0 over HTTP front end of an :class:`AnalysisService`.
+
+    Requests are ``POST``\\ ed to any path and answered in their own thread;
+    batches are supported. Bind it to a loopback address: there is no
+    authentication.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 8765), service: Optional[AnalysisService] = None, verbose: bool = False):
+        """Bind the server; call :meth:`serve_forever` to start answering.
+
+        Parameters
+        ----------
+        address : tuple, optional
+            Host and port. Port ``0`` picks a free one, see
+            ``server_address``.
+        service : AnalysisService, optional
+            Service to answer with. A new one with the default budget if not
+            given.
+        verbose : bool, optional
+            Log every request to stderr.
+        """
+
+        self.service = service if service is not None else AnalysisService()
+        self.verbose = verbose
+        super().__init__(address, _Handler)
+
+
+class ServiceError(RuntimeError):
+    """Error answer of an :class:`AnalysisServer`."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class ServiceClient:
+    """Query an :class:`AnalysisServer` and rebuild the package's result objects.
+
+    Network paths are made absolute before they are sent, as client and
+    server share the machine but not the working directory.
+    """
+
+    def __init__(self, url: str = "http://127.0.0.1:8765", timeout: Optional[float] = None):
+        """Point the client at a server.
+
+        Parameters
+        ----------
+        url : str, optional
+            Address of the server.
+        timeout : float, optional
+            Seconds to wait for every answer.
+        """
+
+        self.url = url
+        self.timeout = timeout
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Send one request and return its result.
+
+        Raises
+        ------
+        ServiceError
+            If the server answers with an error.
+        """
+
+        with self._lock:
+            self._next_id += 1
+            rid = self._next_id
+        if "network" in params:
+            params["network"] = os.path.abspath(params["network"])
+        body = json.dumps({"jsonrpc": "2.0", "id": rid, "method": method, "params": params}).encode()
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as answer:
+            response = json.loads(answer.read())
+        if "error" in response:
+            raise ServiceError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    def load(self, network: str) -> Dict[str, Any]:
+        """Warm up ``network`` on the server."""
+
+        return self.call("load", network=network)
+
+    def classification(self, network: str) -> ClassificationResult:
+        """Node roles, as :meth:`NodeClassification.result` returns them."""
+
+        r = self.call("classification", network=network)
+        return ClassificationResult(r["nodeNum"], set(r["Head"]), set(r["Tail"]), set(r["Control_hub"]))
+
+    def roles(self, network: str, nodes: Optional[Iterable[int]] = None) -> Dict[int, str]:
+        """Role label of ``nodes`` (default: every node)."""
+
+        params: Dict[str, Any] = {"network": network}
+        if nodes is not None:
+            params["nodes"] = list(nodes)
+        return {int(n): role for n, role in self.call("roles", **params).items()}
+
+    def hubs(self, network: str) -> Set[int]:
+        """Ids of the control hubs."""
+
+        return set(self.call("hubs", network=network))
+
+    def names(self, network: str) -> List[Optional[str]]:
+        """Node labels indexed by node id."""
+
+        return self.call("names", network=network)
+
+    def scheme(self, network: str) -> ControlScheme:
+        """The control scheme ``ControlSchemes.scheme`` would hold."""
+
+        return self._scheme(self.call("scheme", network=network))
+
+    def sample_schemes(self, network: str, n: int, seed: Optional[int] = None, swaps: Optional[int] = None) -> List[ControlScheme]:
+        """Draw ``n`` random control schemes, see :meth:`ControlSchemes.sample`."""
+
+        return [self._scheme(s) for s in self.call("sample_schemes", network=network, n=n, seed=seed, swaps=swaps)]
+
+    def what_if(self, network: str, edges: Iterable[Union[int, Sequence[int]]]) -> Dict[str, Any]:
+        """Role changes after deleting ``edges``, see :meth:`AnalysisService.what_if`."""
+
+        r = self.call("what_if", network=network, edges=[e if isinstance(e, int) else list(e) for e in edges])
+        return {"lost": set(r["lost"]), "gained": set(r["gained"]),
+                "roles": {int(n): role for n, role in r["roles"].items()}}
+
+    @staticmethod
+    def _scheme(r: Dict[str, Any]) -> ControlScheme:
+        return ControlScheme(r["index"], set(r["matchedEdgeList"]), set(r["driverNode"]), set(r["tailNode"]))
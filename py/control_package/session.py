@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+"""Long-lived classification session with incremental graph edits."""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import networkx as nx  # type: ignore
+except Exception:  # pragma: no cover
+    nx = None
+
+from .graph import CSRGraph
+from .metrics import Metrics
+from .node_classification import NodeClassification
+
+ROLE_HEAD = "head"
+ROLE_TAIL = "tail"
+ROLE_HEAD_TAIL = "head,tail"
+ROLE_CONTROL_HUB = "control_hub"
+ROLE_REMOVED = "removed"
+
+
+class _Forest:
+    """Alternating-path reachability of one bipartite side, kept as a BFS forest.
+
+    ``members`` are the nodes reachable from the unmatched nodes of the side:
+    the tails for the source copies, the heads for the destination copies.
+    Every member remembers the member it was reached from, ``0`` for the
+    unmatched roots. The link runs over an unmatched edge into the partner
+    of the node, so it stays valid as long as the node keeps its partner,
+    that edge exists and the parent stays a member.
+    """
+
+    def __init__(self, members: Set[int], fwd: List[Dict[int, int]], back: List[Dict[int, int]], mine: List[int], other: List[int], touched: Set[int], metrics: Optional[Metrics]):
+        self.members = members
+        # fwd[x]: neighbours on the other side; back: the reverse adjacency;
+        # mine[x]: partner of x; other[y]: partner of a node of the other side
+        self.fwd = fwd
+        self.back = back
+        self.mine = mine
+        self.other = other
+        self.touched = touched
+        self.metrics = metrics
+        self.parent: List[int] = [0] * len(mine)
+        self.children: Dict[int, Set[int]] = {}
+        members.clear()
+        roots = [x for x in range(1, len(mine)) if mine[x] == 0]
+        for x in roots:
+            self._attach(x, 0)
+        self._expand(roots)
+
+    def add_node(self) -> None:
+        """Register a new unmatched node with the next id."""
+
+        self.parent.append(0)
+        self._attach(len(self.parent) - 1, 0)
+
+    def _attach(self, x: int, p: int) -> None:
+        self.parent[x] = p
+        if p:
+            self.children.setdefault(p, set()).add(x)
+        self.members.add(x)
+        self.touched.add(x)
+
+    def _detach(self, x: int) -> None:
+        kids = self.children.get(self.parent[x])
+        if kids is not None:
+            kids.discard(x)
+        self.parent[x] = 0
+
+    def _expand(self, queue: List[int]) -> None:
+        """Attach everything reachable from the members in ``queue``."""
+
+        fwd, mine, other, members = self.fwd, self.mine, self.other, self.members
+        for x in queue:
+            own = mine[x]
+            for y in fwd[x]:
+                if y == own:
+                    continue
+                m = other[y]
+                if m and m not in members:
+                    self._attach(m, x)
+                    queue.append(m)
+        if self.metrics is not None:
+            self.metrics.count("reach_visits", len(queue))
+
+    def grow(self, x: int, p: int) -> None:
+        """Add ``x``, reached from the member ``p``, and everything it reaches."""
+
+        if x not in self.members:
+            self._attach(x, p)
+            self._expand([x])
+
+    def root(self, x: int) -> None:
+        """Make ``x``, which just lost its partner, a root."""
+
+        if x in self.members:
+            self._detach(x)
+        else:
+            self._attach(x, 0)
+            self._expand([x])
+
+    def cut(self, broken: Iterable[int]) -> None:
+        """Re-check the members whose link to their parent may be gone.
+
+        Only valid when the members can only shrink. The subtrees below
+        ``broken`` are detached, and every node in them that an unmatched
+        node or a remaining member still reaches is attached again.
+        """
+
+        region: Set[int] = set()
+        stack = [x for x in broken if x in self.members]
+        while stack:
+            x = stack.pop()
+            if x not in region:
+                region.add(x)
+                stack.extend(self.children.get(x, ()))
+        if not region:
+            return
+        for x in region:
+            self._detach(x)
+            self.children.pop(x, None)
+        self.members -= region
+        self.touched |= region
+
+        back, mine, members = self.back, self.mine, self.members
+        queue = []
+        for x in region:
+            own = mine[x]
+            if own == 0:
+                queue.append(x)
+                self._attach(x, 0)
+                continue
+            for y in back[own]:
+                if y != x and y in members:
+                    queue.append(x)
+                    self._attach(x, y)
+                    break
+        if self.metrics is not None:
+            self.metrics.count("reach_visits", len(region))
+        self._expand(queue)
+
+
+class ControlSession:
+    """Keep a network, its maximum matching and its node roles up to date.
+
+    The session starts from a :class:`NodeClassification` and then accepts
+    edits. Tails are the source copies reachable along alternating paths
+    from unmatched sources, heads the destination copies reachable from
+    unmatched destinations, and both are kept as BFS forests over those
+    paths. An edit only looks at the nodes around it:
+
+    * an edge joins a tail to a head exactly when it opens an augmenting
+      path, which is then flipped. The heads and tails can only shrink,
+      and only the subtrees hanging off nodes whose partner changed are
+      re-checked. Any other new edge only extends the forests;
+    * deleting an unmatched edge can only cut the one link it realised;
+    * deleting a matched edge ``u -> v`` leaves an augmenting path when
+      ``u`` was a tail, ``v`` a head or the edge lies on an alternating
+      cycle. One search from ``u`` (or to ``v``) finds it, and it is handled
+      like an augmenting new edge. Otherwise ``u`` and ``v`` become roots
+      and the forests only grow.
+
+    Edges are identified by their ``(src, des)`` pair; parallel edges are
+    counted but never change the roles. Removed nodes keep their id, lose
+    all their edges and are reported with the role ``"removed"`` until an
+    edge is added to them again.
+    """
+
+    def __init__(self, input_file: Optional[str] = None, *, graph: Optional[Union['nx.Graph', CSRGraph]] = None, classification: Optional[NodeClassification] = None, metrics: Optional[Metrics] = None):
+        """Open a session on a network.
+
+        Parameters
+        ----------
+        input_file : str, optional
+            Path to a ``.net`` file describing the network.
+        graph : :class:`networkx.Graph` or CSRGraph, optional
+            Graph object to use instead of ``input_file``.
+        classification : NodeClassification, optional
+            Finished classification to start from instead of loading the
+            network again. Its marker lists are copied.
+        metrics : Metrics, optional
+            Counts in ``reach_visits`` the nodes whose reachability the
+            edits re-examined.
+        """
+
+        if classification is None:
+            classification = NodeClassification(input_file, graph=graph, output_file=None)
+        g = classification.graph
+        self.nodeNum = g.nodeNum
+        self.names = list(g.names)
+        self.out: List[Dict[int, int]] = [{} for _ in range(self.nodeNum + 1)]
+        self.inn: List[Dict[int, int]] = [{} for _ in range(self.nodeNum + 1)]
+        for k in range(1, g.edgeNum + 1):
+            s, d = g.src[k], g.des[k]
+            self.out[s][d] = self.out[s].get(d, 0) + 1
+            self.inn[d][s] = self.inn[d].get(s, 0) + 1
+
+        self.markedSrc = list(classification.markedSrc)
+        self.markedDes = list(classification.markedDes)
+        self.Head: Set[int] = set(classification.Head)
+        self.Tail: Set[int] = set(classification.Tail)
+        self.Control_hub: Set[int] = set(classification.Control_hub)
+        self.removed: Set[int] = set()
+
+        self._touched: Set[int] = set()
+        # nodes whose partner changed during the current edit
+        self._moved_src: List[int] = []
+        self._moved_des: List[int] = []
+        self.tails = _Forest(self.Tail, self.out, self.inn, self.markedSrc, self.markedDes, self._touched, metrics)
+        self.heads = _Forest(self.Head, self.inn, self.out, self.markedDes, self.markedSrc, self._touched, metrics)
+        self._touched.clear()
+        self._roles = [self._role(i) for i in range(self.nodeNum + 1)]
+
+    # ------------------------------------------------------------------
+    # queries
+
+    def _role(self, node: int) -> str:
+        if node in self.removed:
+            return ROLE_REMOVED
+        head = node in self.Head
+        tail = node in self.Tail
+        if head and tail:
+            return ROLE_HEAD_TAIL
+        if head:
+            return ROLE_HEAD
+        if tail:
+            return ROLE_TAIL
+        return ROLE_CONTROL_HUB
+
+    def role(self, node: int) -> str:
+        """Current role of ``node``, classifying first if needed."""
+
+        self.classify()
+        return self._roles[node]
+
+    def has_edge(self, src: int, des: int) -> bool:
+        """Return ``True`` if at least one edge ``src -> des`` exists."""
+
+        return 1 <= src <= self.nodeNum and des in self.out[src]
+
+    def matching_size(self) -> int:
+        """Number of matched pairs in the current maximum matching."""
+
+        return sum(1 for d in self.markedSrc if d != 0)
+
+    # ------------------------------------------------------------------
+    # augmenting searches
+
+    def _match(self, src: int, des: int) -> None:
+        self.markedSrc[src] = des
+        self.markedDes[des] = src
+        self._moved_src.append(src)
+        self._moved_des.append(des)
+
+    def _augment_from_src(self, root: int) -> bool:
+        """Augment along a path from the unmatched source ``root``."""
+
+        parent: Dict[int, int] = {}
+        seen = {root}
+        queue = [root]
+        for s in queue:
+            for d in self.out[s]:
+                if d in parent:
+                    continue
+                parent[d] = s
+                m = self.markedDes[d]
+                if m == 0:
+                    while True:
+                        s = parent[d]
+                        nxt = self.markedSrc[s]
+                        self._match(s, d)
+                        if s == root:
+                            return True
+                        d = nxt
+                if m not in seen:
+                    seen.add(m)
+                    queue.append(m)
+        return False
+
+    def _augment_from_des(self, root: int) -> bool:
+        """Augment along a path ending at the unmatched destination ``root``."""
+
+        parent: Dict[int, int] = {}
+        seen = {root}
+        queue = [root]
+        for d in queue:
+            for s in self.inn[d]:
+                if s in parent:
+                    continue
+                parent[s] = d
+                m = self.markedSrc[s]
+                if m == 0:
+                    while True:
+                        d = parent[s]
+                        nxt = self.markedDes[d]
+                        self._match(s, d)
+                        if d == root:
+                            return True
+                        s = nxt
+                if m not in seen:
+                    seen.add(m)
+                    queue.append(m)
+        return False
+
+    def _augment_through(self, src: int, des: int) -> bool:
+        """Augment along a path that uses the edge between two matched nodes.
+
+        Searches backwards from ``src`` to an unmatched source and forwards
+        from ``des`` to an unmatched destination. The two halves of such a
+        path are always disjoint because the matching was maximum without the
+        edge.
+        """
+
+        # backwards: which source can hand its way down to ``src``
+        forward_of: Dict[int, int] = {src: 0}
+        queue = [src]
+        start = 0
+        for x in queue:
+            for s in self.inn[self.markedSrc[x]]:
+                if s in forward_of:
+                    continue
+                forward_of[s] = x
+                if self.markedSrc[s] == 0:
+                    start = s
+                    break
+                queue.append(s)
+            if start:
+                break
+        if not start:
+            return False
+
+        # forwards: which destination can be reached from ``des``
+        parent: Dict[int, int] = {des: 0}
+        queue = [des]
+        end = 0
+        for d in queue:
+            for d2 in self.out[self.markedDes[d]]:
+                if d2 in parent:
+                    continue
+                parent[d2] = d
+                if self.markedDes[d2] == 0:
+                    end = d2
+                    break
+                queue.append(d2)
+            if end:
+                break
+        if not end:
+            return False
+
+        pairs: List[Tuple[int, int]] = [(src, des)]
+        s = start
+        while s != src:
+            x = forward_of[s]
+            pairs.append((s, self.markedSrc[x]))
+            s = x
+        d = end
+        while d != des:
+            p = parent[d]
+            pairs.append((self.markedDes[p], d))
+            d = p
+        for s, d in pairs:
+            self._match(s, d)
+        return True
+
+    # ------------------------------------------------------------------
+    # incremental role updates
+
+    def _repair(self) -> None:
+        """Re-check the roles after an augmentation, which can only shrink them."""
+
+        self.tails.cut(self._moved_src)
+        self.heads.cut(self._moved_des)
+        # unmatched nodes are roots; they were tails or heads already
+        for s in self._moved_src:
+            if self.markedSrc[s] == 0 and s not in self.Tail:  # pragma: no cover - defensive
+                self.tails.root(s)
+        for d in self._moved_des:
+            if self.markedDes[d] == 0 and d not in self.Head:  # pragma: no cover - defensive
+                self.heads.root(d)
+        self._moved_src = []
+        self._moved_des = []
+
+    def _ensure_node(self, node: int) -> None:
+        """Grow the node arrays so that ``node`` exists."""
+
+        if node < 1:
+            raise ValueError(f"invalid node id: {node}")
+        while self.nodeNum < node:
+            self.nodeNum += 1
+            self.out.append({})
+            self.inn.append({})
+            self.markedSrc.append(0)
+            self.markedDes.append(0)
+            self.names.append(None)
+            self._roles.append(ROLE_HEAD_TAIL)
+            self.tails.add_node()
+            self.heads.add_node()
+
+    # ------------------------------------------------------------------
+    # edits
+
+    def add_edge(self, src: int, des: int) -> None:
+        """Insert the edge ``src -> des``, creating missing nodes."""
+
+        self._ensure_node(max(src, des))
+        for n in (src, des):
+            if n in self.removed:
+                self.removed.discard(n)
+                self._touched.add(n)
+        count = self.out[src].get(des, 0)
+        self.out[src][des] = count + 1
+        self.inn[des][src] = count + 1
+        if count:
+            return
+
+        if src in self.Tail and des in self.Head:
+            # the edge closes an augmenting path
+            if self.markedSrc[src] == 0:
+                self._augment_from_src(src)
+            elif self.markedDes[des] == 0:
+                self._augment_from_des(des)
+            else:
+                self._augment_through(src, des)
+            self._repair()
+            return
+        # the old maximum matchings stay maximum: roles can only grow
+        if src in self.Tail and self.markedDes[des]:
+            self.tails.grow(self.markedDes[des], src)
+        if des in self.Head and self.markedSrc[src]:
+            self.heads.grow(self.markedSrc[src], des)
+
+    def remove_edge(self, src: int, des: int) -> None:
+        """Delete one edge ``src -> des``.
+
+        Raises
+        ------
+        KeyError
+            If the edge does not exist.
+        """
+
+        if not self.has_edge(src, des):
+            raise KeyError((src, des))
+        count = self.out[src][des] - 1
+        if count:
+            self.out[src][des] = count
+            self.inn[des][src] = count
+            return
+        del self.out[src][des]
+        del self.inn[des][src]
+
+        if self.markedSrc[src] != des:
+            # an unmatched edge realises at most one link of either forest
+            m = self.markedDes[des]
+            if m and self.tails.parent[m] == src:
+                self.tails.cut([m])
+            m = self.markedSrc[src]
+            if m and self.heads.parent[m] == des:
+                self.heads.cut([m])
+            return
+
+        tail = src in self.Tail
+        head = des in self.Head
+        self.markedSrc[src] = 0
+        self.markedDes[des] = 0
+        # a head ``des`` leaves a path from ``src`` to an unmatched
+        # destination, a tail ``src`` one from an unmatched source to ``des``;
+        # otherwise only an alternating cycle through the edge can close one
+        if tail and not head:
+            found = self._augment_from_des(des)
+        else:
+            found = self._augment_from_src(src)
+        if found:
+            self._moved_src.append(src)
+            self._moved_des.append(des)
+            self._repair()
+        else:
+            # no augmenting path: the matching shrinks and roles only grow
+            self.tails.root(src)
+            self.heads.root(des)
+
+    def remove_node(self, node: int) -> None:
+        """Knock out ``node`` by deleting all of its edges."""
+
+        if not 1 <= node <= self.nodeNum:
+            raise KeyError(node)
+        for des, count in list(self.out[node].items()):
+            for _ in range(count):
+                self.remove_edge(node, des)
+        for src, count in list(self.inn[node].items()):
+            for _ in range(count):
+                self.remove_edge(src, node)
+        self.removed.add(node)
+        self._touched.add(node)
+
+    # ------------------------------------------------------------------
+    # classification
+
+    def classify(self) -> Dict[int, Tuple[str, str]]:
+        """Report the nodes whose role changed.
+
+        The roles are always up to date; this only compares the nodes the
+        edits touched with their previously reported role.
+
+        Returns
+        -------
+        dict
+            ``{node: (old_role, new_role)}`` for every node whose role changed
+            since the previous call (or since the session was opened).
+        """
+
+        candidates = sorted(self._touched)
+        self._touched.clear()
+
+        changes: Dict[int, Tuple[str, str]] = {}
+        for i in candidates:
+            new = self._role(i)
+            if new == ROLE_CONTROL_HUB:
+                self.Control_hub.add(i)
+            else:
+                self.Control_hub.discard(i)
+            if new != self._roles[i]:
+                changes[i] = (self._roles[i], new)
+                self._roles[i] = new
+        return changes
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+"""SciPy sparse-matrix views of a graph and the SciPy matching backend."""
+
+try:
+    import numpy as np  # type: ignore
+    from scipy.sparse import csr_array  # type: ignore
+    from scipy.sparse.csgraph import maximum_bipartite_matching  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+    csr_array = None
+    maximum_bipartite_matching = None
+
+from .graph import CSRGraph
+from .matching import Matching
+
+
+def is_sparse_matrix(obj) -> bool:
+    """Whether ``obj`` looks like a ``scipy.sparse`` matrix or array."""
+
+    return hasattr(obj, "tocoo") and hasattr(obj, "shape")
+
+
+def to_scipy(graph: CSRGraph) -> "csr_array":
+    """Return the adjacency of ``graph`` as an ``nodeNum`` square CSR array.
+
+    Row ``i`` and column ``j`` stand for nodes ``i + 1`` and ``j + 1``;
+    parallel edges are summed into one entry.
+    """
+
+    if csr_array is None:
+        raise ImportError("scipy is required to build sparse matrices")
+    n = graph.nodeNum
+    # copied, as sum_duplicates rewrites the index arrays in place
+    indptr = np.array(np.frombuffer(graph.outOffset, dtype=np.intc)[1:n + 2])
+    indices = np.frombuffer(graph.outTarget, dtype=np.intc) - 1
+    matrix = csr_array((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def scipy_matching(graph: CSRGraph) -> Matching:
+    """Maximum matching of the bipartite split computed by SciPy.
+
+    Uses the C implementation of Hopcroft–Karp in
+    ``scipy.sparse.csgraph.maximum_bipartite_matching``. The matching has
+    the same size as :meth:`Matching.maximize` but may pair other nodes, so
+    it suits the analyses that only depend on the size and the reachable
+    sets, such as :class:`NodeClassification`.
+    """
+
+    if maximum_bipartite_matching is None:
+        raise ImportError("scipy is required for the scipy matching backend")
+    n = graph.nodeNum
+    if n == 0:
+        return Matching(graph)
+    mate = maximum_bipartite_matching(to_scipy(graph), perm_type="column")
+    mate_src = np.zeros(n + 1, dtype=np.int64)
+    mate_src[1:] = np.where(mate >= 0, mate + 1, 0)
+    mate_des = np.zeros(n + 1, dtype=np.int64)
+    matched = np.flatnonzero(mate_src)
+    mate_des[mate_src[matched]] = matched
+    return Matching(graph, mate_src.tolist(), mate_des.tolist())
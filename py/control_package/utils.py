@@ -1,5 +1,6 @@
-"""Utility helpers for reading network data."""
+"""Utility helpers for reading and writing network data."""
 
+from array import array
 from typing import List, Tuple, Optional, Any
 
 try:
@@ -9,9 +10,13 @@ except Exception:  # pragma: no cover - optional dependency
 
 from .node import Node
 from .edge import Edge
+from .graph import CSRGraph
+from .binary_network import read_binary_network, sidecar_path, write_binary_network
+from .metrics import Metrics, timed
+from .sparse import is_sparse_matrix
 
 
-def load_network(filename: Optional[str] = None, graph: Optional['nx.Graph'] = None) -> Tuple[int, List[Edge], List[Optional[str]]]:
+def load_network(filename: Optional[str] = None, graph: Optional['nx.Graph'] = None, metrics: Optional[Metrics] = None) -> Tuple[int, List[Edge], List[Optional[str]]]:
     """Load a network from a Pajek ``.net`` file or a ``networkx`` graph.
 
     Parameters
@@ -21,6 +26,9 @@ def load_network(filename: Optional[str] = None, graph: Optional['nx.Graph'] = N
     graph : :class:`networkx.Graph`, optional
         Graph instance where nodes are 1-indexed integers. If given, ``filename``
         is ignored. Node attribute ``name`` will be used if present.
+    metrics : Metrics, optional
+        Times parsing (``load.parse``) and building the edge list
+        (``load.edges``).
 
     Returns
     -------
@@ -32,39 +40,199 @@ def load_network(filename: Optional[str] = None, graph: Optional['nx.Graph'] = N
     if graph is not None:
         if nx is None:
             raise ImportError("networkx is required to use the graph parameter")
-        node_num = graph.number_of_nodes()
-        names: List[Optional[str]] = [None] * (node_num + 1)
-        for n, data in graph.nodes(data=True):
-            if isinstance(n, int) and 1 <= n <= node_num:
-                names[n] = data.get("name")
-        edges = [Edge(int(u), int(v)) for u, v in graph.edges()]
+        with timed(metrics, "load.networkx"):
+            node_num = graph.number_of_nodes()
+            names: List[Optional[str]] = [None] * (node_num + 1)
+            for n, data in graph.nodes(data=True):
+                if isinstance(n, int) and 1 <= n <= node_num:
+                    names[n] = data.get("name")
+            edges = [Edge(int(u), int(v)) for u, v in graph.edges()]
         return node_num, edges, names
 
     if filename is None:
         raise ValueError("either filename or graph must be provided")
 
-    lines = [line.strip() for line in open(filename) if line.strip()]
-    if not lines or not lines[0].startswith("*Vertices"):
+    with timed(metrics, "load.parse"):
+        node_num, src, des, names = read_pajek(filename)
+    with timed(metrics, "load.edges"):
+        edges = [Edge(s, d) for s, d in zip(src, des)]
+    return node_num, edges, names
+
+
+def _label(line: bytes) -> Optional[str]:
+    """Return the label of a Pajek vertex line, without quotes."""
+
+    parts = line.split(None, 1)
+    if len(parts) < 2:
+        return None
+    rest = parts[1]
+    if rest[:1] == b'"':
+        end = rest.find(b'"', 1)
+        label = rest[1:end] if end > 0 else rest[1:]
+    else:
+        label = rest.split(None, 1)[0]
+    return label.decode("utf-8", "replace")
+
+
+def read_pajek(filename: str, buffer_size: int = 1 << 20) -> Tuple[int, array, array, List[Optional[str]]]:
+    """Stream a Pajek ``.net`` file into integer edge arrays.
+
+    The file is read in buffered chunks and every edge goes straight into
+    two ``array('i')`` buffers, so peak memory stays close to the size of the
+    result. Supported sections:
+
+    * ``*Vertices N``: optional vertex lines ``id [label ...]``. Labels may be
+      quoted to contain spaces; omitted vertices have no label. After ``N``
+      vertex lines the edge lines may follow without a section header, as
+      the original reader accepted.
+    * ``*Arcs`` / ``*Edges``: lines ``src des [weight ...]``.
+    * ``*Arcslist`` / ``*Edgeslist``: lines ``src des1 des2 ...``.
+
+    ``*Edges`` entries are read as directed ``src -> des`` like ``*Arcs``,
+    which is how the bundled networks are meant. Lines starting with ``%``
+    are comments.
+
+    Returns
+    -------
+    tuple
+        ``(node_num, src, des, names)`` with ``src[k]``/``des[k]`` the
+        endpoints of edge ``k + 1``.
+
+    Raises
+    ------
+    ValueError
+        If the file is malformed, including a vertex line whose id is not
+        in ``1..N``.
+    """
+
+    node_num = -1
+    names: List[Optional[str]] = []
+    src = array("i")
+    des = array("i")
+    section = None
+    vertex_lines = 0
+    with open(filename, "rb", buffering=buffer_size) as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line[:1] == b"%":
+                continue
+            if line[:1] == b"*":
+                head = line.split(None, 1)
+                keyword = head[0].lower()
+                if keyword == b"*vertices":
+                    if len(head) < 2:
+                        raise ValueError("Invalid network file")
+                    node_num = int(head[1].split()[0])
+                    names = [None] * (node_num + 1)
+                    vertex_lines = 0
+                    section = "vertices" if node_num > 0 else "pairs"
+                elif keyword in (b"*arcs", b"*edges"):
+                    section = "pairs"
+                elif keyword in (b"*arcslist", b"*edgeslist"):
+                    section = "lists"
+                elif keyword == b"*network":
+                    section = None
+                    continue
+                else:
+                    raise ValueError(f"unsupported Pajek section: {keyword.decode()}")
+                if node_num < 0:
+                    raise ValueError("Invalid network file")
+                continue
+            if section == "pairs":
+                parts = line.split(None, 2)
+                if len(parts) >= 2:
+                    src.append(int(parts[0]))
+                    des.append(int(parts[1]))
+            elif section == "lists":
+                parts = line.split()
+                s = int(parts[0])
+                for d in parts[1:]:
+                    src.append(s)
+                    des.append(int(d))
+            elif section == "vertices":
+                try:
+                    idx = int(line.split(None, 1)[0])
+                except ValueError:
+                    raise ValueError(f"invalid vertex line: {line.decode('utf-8', 'replace')}") from None
+                if not 1 <= idx <= node_num:
+                    raise ValueError(f"vertex {idx} outside 1..{node_num}")
+                names[idx] = _label(line)
+                vertex_lines += 1
+                if vertex_lines == node_num:
+                    # headerless edge lines may follow the vertex block
+                    section = "pairs"
+            else:
+                raise ValueError("Invalid network file")
+    if node_num < 0:
         raise ValueError("Invalid network file")
+    return node_num, src, des, names
+
+
+def load_graph(filename: Optional[str] = None, graph: Optional['nx.Graph'] = None, cache: bool = True, metrics: Optional[Metrics] = None) -> CSRGraph:
+    """Load a network as a :class:`CSRGraph`.
 
-    node_num = int(lines[0].split()[1])
-    names: List[Optional[str]] = [None] * (node_num + 1)
+    Accepts the same arguments as :func:`load_network`; node labels are kept
+    in :attr:`CSRGraph.names`. A :class:`CSRGraph` passed as ``graph`` is
+    returned as is, so analyses can share one graph and its cached
+    maximum matching. ``graph`` may also be a square ``scipy.sparse``
+    adjacency matrix (see :meth:`CSRGraph.from_scipy`) or a ``(src, des)``
+    pair of integer arrays with one-based node ids (see
+    :meth:`CSRGraph.from_arrays`); neither creates per-edge objects.
 
-    idx = 1
-    for i in range(1, node_num + 1):
-        parts = lines[idx].split()
-        if len(parts) > 1:
-            names[i] = parts[1]
-        idx += 1
+    Parameters
+    ----------
+    cache : bool, optional
+        For ``.net`` files, reuse the binary sidecar written next to the file
+        (see :mod:`control_package.binary_network`) when it was built from
+        the current version of the source, and write or refresh it
+        otherwise. Failures to write the sidecar are ignored.
+    metrics : Metrics, optional
+        Times reading the sidecar (``load.sidecar``), parsing
+        (``load.parse``), building the graph (``load.graph``) and writing the
+        sidecar (``load.write_sidecar``).
+    """
 
-    if idx < len(lines) and (lines[idx].startswith("*Edges") or lines[idx].startswith("*Arcs")):
-        idx += 1
+    if isinstance(graph, CSRGraph):
+        return graph
+    if isinstance(graph, tuple):
+        return CSRGraph.from_arrays(*graph)
+    if is_sparse_matrix(graph):
+        return CSRGraph.from_scipy(graph)
+    if graph is None and filename is not None and cache:
+        sidecar = sidecar_path(filename)
+        try:
+            with timed(metrics, "load.sidecar"):
+                return read_binary_network(sidecar, source=filename)
+        except (OSError, ValueError):
+            pass
+        result = load_graph(filename, cache=False, metrics=metrics)
+        try:
+            with timed(metrics, "load.write_sidecar"):
+                write_binary_network(result, sidecar, source=filename)
+        except OSError:
+            pass
+        return result
 
-    edges: List[Edge] = []
-    for line in lines[idx:]:
-        parts = line.split()
-        if len(parts) >= 2:
-            src, des = int(parts[0]), int(parts[1])
-            edges.append(Edge(src, des))
+    if graph is None and filename is not None:
+        with timed(metrics, "load.parse"):
+            parsed = read_pajek(filename)
+        with timed(metrics, "load.graph"):
+            return CSRGraph(*parsed)
+    node_num, edges, names = load_network(filename, graph, metrics)
+    with timed(metrics, "load.graph"):
+        return CSRGraph.from_edges(node_num, edges, names)
 
-    return node_num, edges, names
+
+def write_pajek(graph: CSRGraph, filename: str) -> None:
+    """Write ``graph`` as a Pajek ``.net`` file readable by :func:`read_pajek`."""
+
+    with open(filename, "w") as f:
+        f.write(f"*Vertices {graph.nodeNum}\n")
+        names = graph.names
+        f.writelines(
+            f"{i}\t{names[i]}\n" if i < len(names) and names[i] is not None else f"{i}\n"
+            for i in range(1, graph.nodeNum + 1)
+        )
+        f.write("*Edges\n")
+        src, des = graph.src, graph.des
+        f.writelines(f"{src[k]}\t{des[k]}\n" for k in range(1, graph.edgeNum + 1))
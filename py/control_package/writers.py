@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+"""Pluggable report writers for analysis results."""
+
+from typing import Any, Callable, Dict
+import csv
+import json
+
+#: Writer called as ``writer(result, path)``, by format name.
+WRITERS: Dict[str, Callable[[Any, str], None]] = {}
+
+
+def register_writer(name: str, writer: Callable[[Any, str], None]) -> None:
+    """Make ``writer`` available as report format ``name``."""
+
+    WRITERS[name] = writer
+
+
+def write_text(result: Any, path: str) -> None:
+    """Write the legacy text report."""
+
+    with open(path, "w") as f:
+        f.write(result.to_text())
+
+
+def write_json(result: Any, path: str) -> None:
+    """Write the result as a JSON object."""
+
+    with open(path, "w") as f:
+        json.dump(result.to_dict(), f, indent=1)
+        f.write("\n")
+
+
+def write_csv(result: Any, path: str) -> None:
+    """Write the result as CSV with a header row."""
+
+    header, rows = result.to_rows()
+    with open(path, "w", newline="") as f:
+        out = csv.writer(f)
+        out.writerow(header)
+        out.writerows(rows)
+
+
+register_writer("text", write_text)
+register_writer("json", write_json)
+register_writer("csv", write_csv)
+
+
+def write_report(result: Any, path: str, format: str = "text") -> None:
+    """Write ``result`` to ``path`` with the writer registered as ``format``.
+
+    Raises
+    ------
+    ValueError
+        If no writer is registered under ``format``.
+    """
+
+    try:
+        writer = WRITERS[format]
+    except KeyError:
+        raise ValueError(f"unknown report format: {format}") from None
+    writer(result, path)
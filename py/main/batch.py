@@ -0,0 +1,273 @@
+"""Run the analyses on many networks in one process pool.
+
+Usage::
+
+    python py/main/batch.py net/ --output-dir result/batch --workers 4
+    python py/main/batch.py --manifest networks.txt --analyses classify sensitive
+
+Inputs are ``.net`` files, directories (every ``.net`` file in them) and
+manifests listing one network per line, optionally preceded by a name::
+
+    # name  path
+    blca    net/blca.net
+    net/HI-union.net
+
+Every network is parsed once and shared by its analyses, and its reports go
+to a directory of its own under ``--output-dir``. Finished networks are
+appended to ``progress.jsonl`` there; a rerun skips the ones whose file and
+options are unchanged, so a killed batch resumes where it stopped.
+``index.json`` summarises all networks and is rewritten as they finish.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from control_package import (  # noqa: E402
+    ControlSchemes,
+    EdgeCriticality,
+    FindSensitiveControlHub,
+    Metrics,
+    NodeClassification,
+    ResultCache,
+)
+from control_package.edge_criticality import CRITICAL, REDUNDANT  # noqa: E402
+from control_package.utils import load_graph  # noqa: E402
+
+ANALYSES = ["classify", "schemes", "sensitive", "knockout", "criticality"]
+EXTENSIONS = {"text": "txt", "json": "json", "csv": "csv"}
+
+
+def check_name(name):
+    """Return ``name`` if it can serve as a directory name, else raise ``ValueError``.
+
+    Names become directories under ``--output-dir``, so path separators and
+    ``.``/``..`` are rejected.
+    """
+    if name in ("", ".", "..") or os.path.basename(name) != name or (os.altsep and os.altsep in name):
+        raise ValueError(f"invalid network name: {name!r}")
+    return name
+
+
+def output_path(output_dir, name):
+    """Return the report directory of network ``name``, which must stay under ``output_dir``."""
+    root = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(root, check_name(name)))
+    if os.path.dirname(path) != root:
+        raise ValueError(f"invalid network name: {name!r}")
+    return path
+
+
+def read_manifest(path):
+    """Return ``(name, path)`` of every network listed in ``path``.
+
+    Relative paths are resolved against the directory of the manifest.
+    Names are checked with :func:`check_name`.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split(None, 1)
+            name, file = (parts[0], parts[1]) if len(parts) == 2 else (None, parts[0])
+            entries.append((name if name is None else check_name(name), os.path.join(base, file)))
+    return entries
+
+
+def collect(inputs, manifest):
+    """Return the networks to process as ``(name, path)`` with unique names."""
+    entries = []
+    for item in inputs:
+        if os.path.isdir(item):
+            entries.extend((None, os.path.join(item, f)) for f in sorted(os.listdir(item)) if f.endswith(".net"))
+        else:
+            entries.append((None, item))
+    if manifest:
+        entries.extend(read_manifest(manifest))
+
+    seen = set()
+    networks = []
+    for name, path in entries:
+        base = name or os.path.splitext(os.path.basename(path))[0]
+        name, k = base, 1
+        while name in seen:
+            k += 1
+            name = f"{base}-{k}"
+        seen.add(name)
+        networks.append({"name": name, "path": os.path.abspath(path)})
+    return networks
+
+
+def fingerprint(network, options):
+    """Identify a network file version together with the options that shape its reports."""
+    st = os.stat(network["path"])
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "analyses": options["analyses"], "format": options["format"]}
+
+
+def process(task):
+    """Run the analyses of one network; executed in the pool workers."""
+    network, options, out_dir = task
+    ext = EXTENSIONS.get(options["format"], options["format"])
+    analyses = options["analyses"]
+    cache = ResultCache(options["cache"]) if options["cache"] else None
+    metrics = Metrics() if options["timings"] else None
+    entry = {"name": network["name"], "path": network["path"], "outputs": {}}
+    start = time.perf_counter()
+    try:
+        entry["fingerprint"] = fingerprint(network, options)
+        os.makedirs(out_dir, exist_ok=True)
+
+        def output(kind):
+            path = os.path.join(out_dir, f"{kind}.{ext}")
+            entry["outputs"][kind] = os.path.relpath(path, os.path.dirname(out_dir))
+            return path
+
+        graph = load_graph(network["path"], metrics=metrics)
+        entry["nodes"] = graph.nodeNum
+        entry["edges"] = graph.edgeNum
+        node_type_file = output("nodeType") if "classify" in analyses else None
+        roles = None
+        if "sensitive" in analyses or "knockout" in analyses:
+            # the finder classifies the network itself
+            finder = FindSensitiveControlHub(
+                graph=graph,
+                output_file=output("sensitive_control_hub") if "sensitive" in analyses else None,
+                knockout="knockout" in analyses,
+                knockout_file=output("knockout_control_hub") if "knockout" in analyses else None,
+                node_type_file=node_type_file,
+                cache=cache, report_format=options["format"], metrics=metrics)
+            roles = finder.engine
+            if "sensitive" in analyses:
+                entry["sensitive_control_hubs"] = len(finder.sensitive_control_hub)
+            if "knockout" in analyses:
+                entry["harmful_knockouts"] = len(finder.knockout_impact)
+        elif "classify" in analyses or "criticality" in analyses:
+            roles = NodeClassification(graph=graph, output_file=node_type_file, cache=cache,
+                                       report_format=options["format"], metrics=metrics)
+        if "criticality" in analyses:
+            criticality = EdgeCriticality(graph=graph, output_file=output("edge_criticality"), classification=roles,
+                                          cache=cache, report_format=options["format"], metrics=metrics)
+            entry["critical_edges"] = len(criticality.edges(CRITICAL))
+            entry["redundant_edges"] = len(criticality.edges(REDUNDANT))
+        if roles is not None:
+            entry["heads"] = len(roles.Head)
+            entry["tails"] = len(roles.Tail)
+            entry["control_hubs"] = len(roles.Control_hub)
+        if "schemes" in analyses:
+            scheme = ControlSchemes(graph=graph, output_file=output("find_schemes"), cache=cache,
+                                    report_format=options["format"], metrics=metrics).scheme
+            entry["driver_nodes"] = len(scheme.driverNode)
+        entry["status"] = "ok"
+    except Exception as exc:
+        entry["status"] = "error"
+        entry["error"] = f"{type(exc).__name__}: {exc}"
+        entry["traceback"] = traceback.format_exc()
+    entry["seconds"] = round(time.perf_counter() - start, 4)
+    if metrics is not None:
+        entry["metrics"] = metrics.to_dict()
+    return entry
+
+
+def load_progress(path):
+    """Return the last recorded entry of every network in ``progress.jsonl``."""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # line cut short by a killed run
+                done[entry["name"]] = entry
+    return done
+
+
+def write_index(path, networks, done):
+    index = {"networks": [done.get(n["name"], {"name": n["name"], "path": n["path"], "status": "pending"})
+                          for n in networks]}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help=".net files or directories containing them")
+    parser.add_argument("--manifest", help="file listing one network per line")
+    parser.add_argument("--analyses", nargs="+", default=["classify", "schemes", "sensitive"], choices=ANALYSES)
+    parser.add_argument("--output-dir", default="./result/batch")
+    parser.add_argument("--workers", type=int, default=1, help="networks processed at the same time")
+    parser.add_argument("--format", default="text", help="report format, see control_package.writers")
+    parser.add_argument("--cache", help="ResultCache directory shared by the workers")
+    parser.add_argument("--timings", action="store_true", help="record stage times and counters in the index")
+    parser.add_argument("--restart", action="store_true", help="ignore the progress of earlier runs")
+    args = parser.parse_args()
+    if not args.inputs and not args.manifest:
+        parser.error("no networks given")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    try:
+        networks = collect(args.inputs, args.manifest)
+    except ValueError as exc:
+        parser.error(str(exc))
+    options = {"analyses": sorted(args.analyses), "format": args.format, "cache": args.cache,
+               "timings": args.timings}
+    os.makedirs(args.output_dir, exist_ok=True)
+    progress_file = os.path.join(args.output_dir, "progress.jsonl")
+    index_file = os.path.join(args.output_dir, "index.json")
+    if args.restart and os.path.exists(progress_file):
+        os.remove(progress_file)
+    done = load_progress(progress_file)
+
+    todo = []
+    for network in networks:
+        entry = done.get(network["name"])
+        try:
+            current = fingerprint(network, options)
+        except OSError:
+            current = None
+        if entry is not None and entry.get("status") == "ok" and entry.get("fingerprint") == current:
+            continue
+        done.pop(network["name"], None)
+        try:
+            out_dir = output_path(args.output_dir, network["name"])
+        except ValueError as exc:
+            parser.error(str(exc))
+        todo.append((network, options, out_dir))
+    print(f"{len(networks)} networks, {len(networks) - len(todo)} already done", flush=True)
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("fork")
+    else:  # pragma: no cover - platform dependent
+        ctx = multiprocessing.get_context()
+    failed = 0
+    with open(progress_file, "a") as progress, ctx.Pool(min(args.workers, max(len(todo), 1))) as pool:
+        for entry in pool.imap_unordered(process, todo):
+            progress.write(json.dumps(entry) + "\n")
+            progress.flush()
+            os.fsync(progress.fileno())
+            done[entry["name"]] = entry
+            write_index(index_file, networks, done)
+            failed += entry["status"] != "ok"
+            print(f"{entry['name']}: {entry['status']} ({entry['seconds']:.2f}s)"
+                  + (f" {entry['error']}" if entry["status"] != "ok" else ""), flush=True)
+    write_index(index_file, networks, done)
+    if failed:
+        print(f"{failed} network(s) failed, see {index_file}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Benchmark suite for the control hub routines.
+
+Usage::
+
+    python py/main/benchmark.py run --output bench.json
+    python py/main/benchmark.py compare old.json new.json
+
+``run`` times every task on the bundled networks and on seeded scale-free
+and Erdős–Rényi networks, each case in a fresh process so that its peak RSS
+is its own. One extra run per case collects the stage times and
+Hopcroft–Karp counters of :class:`control_package.Metrics`: BFS phases,
+DFS calls, the arcs the DFS scanned and the augmenting paths it found.
+``compare`` lists the cases that became slower or larger than a
+threshold and exits with status 1 if there are any.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from control_package import ControlSchemes, FindSensitiveControlHub, Metrics, NodeClassification  # noqa: E402
+from control_package.generators import erdos_renyi_network, scale_free_network  # noqa: E402
+from control_package.utils import load_graph, load_network, write_pajek  # noqa: E402
+
+NET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "net")
+BUNDLED = ["sample_network", "blca", "HI-union"]
+TASKS = ["load_network", "load_graph", "NodeClassification", "ControlSchemes", "FindSensitiveControlHub"]
+
+
+def _task(task, path, metrics=None):
+    """Return a callable running ``task`` on the network at ``path``."""
+    if task == "load_network":
+        return lambda: load_network(path, metrics=metrics)
+    if task == "load_graph":
+        return lambda: load_graph(path, cache=False, metrics=metrics)
+    graph = load_graph(path)
+    if task == "NodeClassification":
+        return lambda: NodeClassification(graph=graph, output_file=None, metrics=metrics)
+    if task == "ControlSchemes":
+        return lambda: ControlSchemes(graph=graph, output_file=None, metrics=metrics)
+    if task == "FindSensitiveControlHub":
+        return lambda: FindSensitiveControlHub(graph=graph, output_file=None, knockout_file=None, node_type_file=None,
+                                               metrics=metrics)
+    raise ValueError(f"unknown task: {task}")
+
+
+def _run_case(spec):
+    """Run one case in a worker process and return its measurements."""
+    import resource
+
+    walls = []
+    for _ in range(spec["repeat"]):
+        run = _task(spec["task"], spec["path"])
+        start = time.perf_counter()
+        run()
+        walls.append(time.perf_counter() - start)
+
+    metrics = Metrics()
+    _task(spec["task"], spec["path"], metrics)()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024
+    return {"wall": min(walls), "walls": walls, "peak_rss_kb": rss,
+            "hk_phases": metrics.counters.get("hk_phases", 0),
+            "dfs_calls": metrics.counters.get("dfs_calls", 0),
+            "dfs_arcs": metrics.counters.get("dfs_arcs", 0),
+            "augmenting_paths": metrics.counters.get("augmenting_paths", 0),
+            "edges_scanned": metrics.counters.get("edges_scanned", 0),
+            "stages": metrics.timings}
+
+
+def _networks(args):
+    """Yield ``(name, path)`` of every network to benchmark."""
+    for name in args.bundled:
+        yield name, os.path.join(NET_DIR, f"{name}.net")
+    os.makedirs(args.workdir, exist_ok=True)
+    for kind in args.synthetic:
+        for size in args.sizes:
+            name = f"{kind}-{size}-seed{args.seed}"
+            path = os.path.join(args.workdir, f"{name}.net")
+            if not os.path.exists(path):
+                if kind == "sf":
+                    graph = scale_free_network(size, seed=args.seed)
+                else:
+                    graph = erdos_renyi_network(size, seed=args.seed)
+                write_pajek(graph, path)
+            yield name, path
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name, path in _networks(args):
+        graph = load_graph(path)
+        for task in args.tasks:
+            if task == "FindSensitiveControlHub" and graph.nodeNum > args.sensitivity_limit:
+                continue
+            spec = {"network": name, "path": path, "task": task, "repeat": args.repeat}
+            with ctx.Pool(1) as pool:
+                measured = pool.apply(_run_case, (spec,))
+            entry = {"network": name, "task": task, "nodes": graph.nodeNum, "edges": graph.edgeNum, **measured}
+            results.append(entry)
+            print(f"{name:28s} {task:24s} {entry['wall']:9.3f}s {entry['peak_rss_kb'] / 1024:8.1f} MiB "
+                  f"phases={entry['hk_phases']} dfs={entry['dfs_calls']} arcs={entry['dfs_arcs']} "
+                  f"paths={entry['augmenting_paths']} scanned={entry['edges_scanned']}", flush=True)
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"results written to {args.output}")
+
+
+def compare(args):
+    with open(args.old) as f:
+        old = {(r["network"], r["task"]): r for r in json.load(f)["results"]}
+    with open(args.new) as f:
+        new = {(r["network"], r["task"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"{'network':28s} {'task':24s} {'old':>9s} {'new':>9s} {'ratio':>6s}  rss ratio")
+    for key in sorted(old.keys() & new.keys()):
+        a, b = old[key], new[key]
+        ratio = b["wall"] / a["wall"] if a["wall"] > 0 else float("inf")
+        rss_ratio = b["peak_rss_kb"] / a["peak_rss_kb"] if a["peak_rss_kb"] > 0 else float("inf")
+        flags = []
+        if ratio > 1 + args.threshold and b["wall"] - a["wall"] > args.min_delta:
+            flags.append("SLOWER")
+        if rss_ratio > 1 + args.threshold:
+            flags.append("LARGER")
+        regressions += bool(flags)
+        print(f"{key[0]:28s} {key[1]:24s} {a['wall']:9.3f} {b['wall']:9.3f} {ratio:6.2f}  {rss_ratio:6.2f} {' '.join(flags)}")
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"{key[0]:28s} {key[1]:24s} only in {'old' if key in old else 'new'}")
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run the benchmarks")
+    p.add_argument("--output", default="benchmark.json", help="JSON file for the results")
+    p.add_argument("--tasks", nargs="+", default=TASKS, choices=TASKS)
+    p.add_argument("--bundled", nargs="*", default=BUNDLED, help="bundled networks in net/")
+    p.add_argument("--synthetic", nargs="*", default=["sf", "er"], choices=["sf", "er"],
+                   help="scale-free and/or Erdős–Rényi networks")
+    p.add_argument("--sizes", nargs="*", type=int, default=[1000, 10000, 100000],
+                   help="node counts of the synthetic networks, e.g. 1000 ... 1000000")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--repeat", type=int, default=3, help="timed runs per case, the fastest is kept")
+    p.add_argument("--sensitivity-limit", type=int, default=100000,
+                   help="skip the sensitivity sweep on networks with more nodes")
+    p.add_argument("--workdir", default="./result/benchmark_networks",
+                   help="where generated networks are kept between runs")
+    p.set_defaults(func=run)
+
+    p = sub.add_parser("compare", help="flag regressions between two result files")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10, help="relative slowdown that counts as a regression")
+    p.add_argument("--min-delta", type=float, default=0.01, help="ignore slowdowns below this many seconds")
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
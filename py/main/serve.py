@@ -0,0 +1,64 @@
+"""Serve the analyses of many networks from one long-running process.
+
+Usage::
+
+    python py/main/serve.py --port 8765 --memory 1G net/blca.net net/HI-union.net
+
+The networks given on the command line are loaded before the server starts
+answering; every other network is loaded the first time it is asked about.
+Requests are JSON-RPC 2.0 objects ``POST``\\ ed to the server::
+
+    curl -s localhost:8765 -d '{"jsonrpc": "2.0", "id": 1, "method": "hubs",
+                                "params": {"network": "/abs/path/blca.net"}}'
+
+See ``control_package.service`` for the methods, and ``ServiceClient`` for
+a Python client returning the usual result objects.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from control_package import AnalysisServer, AnalysisService, ResultCache  # noqa: E402
+
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """Return the number of bytes in ``text`` such as ``512M`` or ``2G``."""
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * UNITS[unit])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("preload", nargs="*", help="networks to load before serving")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind; keep it local")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--memory", type=parse_size, default="512M", help="budget of the warm networks, e.g. 2G")
+    parser.add_argument("--cache", help="ResultCache directory the classifications are kept in")
+    parser.add_argument("--backend", choices=["python", "scipy"], default="python", help="matching solver")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    service = AnalysisService(max_bytes=args.memory, cache=ResultCache(args.cache) if args.cache else None,
+                              backend=args.backend)
+    for path in args.preload:
+        info = service.load(path)
+        print(f"loaded {info['path']}: {info['nodeNum']} nodes, {info['edgeNum']} edges", flush=True)
+    server = AnalysisServer((args.host, args.port), service, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"serving on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from control_package import ApproximateSensitivity, CSRGraph, FindSensitiveControlHub, NodeClassification
+from control_package import erdos_renyi_network
+
+NET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "net", "HI-union.net")
+
+
+def test_same_seed_same_estimates():
+    runs = [ApproximateSensitivity(NET, stratify=True, seed=7, max_edges=300, output_file=None).result()
+            for _ in range(2)]
+    assert runs[0] == runs[1]
+
+
+@pytest.mark.parametrize("stratify", [False, True])
+@pytest.mark.parametrize("max_edges", [1, 5, 50, 257])
+def test_max_edges_is_honoured(stratify, max_edges):
+    approx = ApproximateSensitivity(NET, precision=0, stratify=stratify, seed=1, batch_size=64,
+                                    max_edges=max_edges, output_file=None)
+    assert approx.edges_evaluated == max_edges
+    approx.refine(0, max_edges + 3)
+    assert approx.edges_evaluated == max_edges + 3
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_at_zero_precision(seed):
+    graph = erdos_renyi_network(40, mean_degree=2.0, seed=seed)
+    approx = ApproximateSensitivity(graph=graph, precision=0, stratify=seed % 2 == 0, seed=seed, batch_size=7,
+                                    output_file=None)
+    result = approx.result()
+    assert result.edges_evaluated == result.edges_total
+
+    exact = FindSensitiveControlHub(graph=graph, method="rebuild", output_file=None, node_type_file=None)
+    assert set(result.estimates) == exact.sensitive_control_hub
+
+    hubs = NodeClassification(graph=graph, output_file=None).Control_hub
+    counts = dict.fromkeys(hubs, 0)
+    for e in range(1, graph.edgeNum + 1):
+        keep = [k for k in range(1, graph.edgeNum + 1) if k != e]
+        without = CSRGraph.from_arrays([graph.src[k] for k in keep], [graph.des[k] for k in keep],
+                                       node_num=graph.nodeNum)
+        left = NodeClassification(graph=without, output_file=None, mode="legacy").Control_hub
+        for hub in hubs - left:
+            counts[hub] += 1
+    for hub, (estimate, low, high) in result.estimates.items():
+        assert estimate == low == high == pytest.approx(counts[hub] / graph.edgeNum)
+    assert result.bound == 0
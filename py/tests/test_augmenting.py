@@ -0,0 +1,64 @@
+import sys
+
+import pytest
+
+from control_package import CSRGraph, erdos_renyi_network, scale_free_network
+from control_package.augmenting import augment_from
+from control_package.layering import layer
+
+
+def _recursive(root, offset, target, arc, dist_root, dist_other, mate_root, mate_other):
+    """The recursive layered DFS that augment_from replaced."""
+    level = dist_root[root] + 1
+    while arc[root] < offset[root + 1]:
+        other = target[arc[root]]
+        arc[root] += 1
+        if dist_other[other] == level:
+            dist_other[other] = 0
+            nxt = mate_other[other]
+            if nxt == 0 or _recursive(nxt, offset, target, arc, dist_root, dist_other, mate_root, mate_other):
+                mate_other[other] = root
+                mate_root[root] = other
+                return True
+    return False
+
+
+def _hopcroft_karp(graph, search, mate_src=None, mate_des=None):
+    n = graph.nodeNum
+    mate_src = list(mate_src or [0] * (n + 1))
+    mate_des = list(mate_des or [0] * (n + 1))
+    dist_src, dist_des = [0] * (n + 1), [0] * (n + 1)
+    while True:
+        more, _ = layer(graph.outOffset, graph.outTarget, mate_src, mate_des, dist_src, dist_des)
+        if not more:
+            return mate_src, mate_des
+        arc = list(graph.outOffset)
+        for s in range(1, n + 1):
+            if mate_src[s] == 0:
+                search(s, graph.outOffset, graph.outTarget, arc, dist_src, dist_des, mate_src, mate_des)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_same_matching_as_the_recursive_search(seed):
+    graph = [erdos_renyi_network, scale_free_network][seed % 2](400, seed=seed)
+    iterative = _hopcroft_karp(graph, augment_from)
+    assert iterative == _hopcroft_karp(graph, _recursive)
+    mate_src, mate_des = iterative
+    for s, d in enumerate(mate_src):
+        if d:
+            assert mate_des[d] == s
+            assert d in [graph.outTarget[k] for k in range(graph.outOffset[s], graph.outOffset[s + 1])]
+
+
+def test_paths_longer_than_the_recursion_limit():
+    # i -> i and i -> i + 1, matched along i -> i + 1: the only augmenting
+    # path runs from source n through every node back to destination 1
+    n = 3 * sys.getrecursionlimit()
+    src = [i for i in range(1, n + 1) for _ in (0, 1)][:-1]
+    des = [d for i in range(1, n + 1) for d in (i, i + 1)][:-1]
+    graph = CSRGraph.from_arrays(src, des, node_num=n)
+    mate_src = [0] + [i + 1 for i in range(1, n)] + [0]
+    mate_des = [0, 0] + list(range(1, n))
+    mate_src, mate_des = _hopcroft_karp(graph, augment_from, mate_src, mate_des)
+    assert mate_src == list(range(n + 1))
+    assert mate_des == list(range(n + 1))
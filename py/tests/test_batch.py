@@ -0,0 +1,19 @@
+import pytest
+
+from main.batch import output_path, read_manifest
+
+
+@pytest.mark.parametrize("name", ["../evil", "/tmp/evil", "a/b", "..", "."])
+def test_names_outside_the_output_dir_are_rejected(tmp_path, name):
+    with pytest.raises(ValueError):
+        output_path(str(tmp_path), name)
+
+
+def test_manifest_names_are_checked(tmp_path):
+    manifest = tmp_path / "networks.txt"
+    manifest.write_text("blca net/blca.net\n")
+    assert read_manifest(str(manifest)) == [("blca", str(tmp_path / "net/blca.net"))]
+    manifest.write_text("../blca net/blca.net\n")
+    with pytest.raises(ValueError):
+        read_manifest(str(manifest))
+    assert output_path(str(tmp_path), "blca") == str((tmp_path / "blca").resolve())
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from control_package import CSRGraph, erdos_renyi_network
+from control_package.binary_network import read_binary_network, sidecar_path, write_binary_network
+from control_package.utils import load_graph, write_pajek
+
+FIELDS = ("src", "des", "outOffset", "outTarget", "outEdge", "inOffset", "inTarget", "inEdge")
+
+
+def _same(a, b):
+    assert a.nodeNum == b.nodeNum and a.edgeNum == b.edgeNum
+    for field in FIELDS:
+        assert list(getattr(a, field)) == list(getattr(b, field)), field
+    assert list(a.names[1:]) == list(b.names[1:])
+
+
+def test_round_trip(tmp_path):
+    graph = CSRGraph.from_arrays([1, 2, 2, 4, 4], [2, 3, 3, 1, 4], node_num=5,
+                                 names=[None, "a", None, "gène β", "", "e e"])
+    path = str(tmp_path / "g.netb")
+    write_binary_network(graph, path)
+    back = read_binary_network(path)
+    assert isinstance(back.src, memoryview)
+    assert back.names == [None, "a", None, "gène β", None, "e e"]
+    graph.names[4] = None
+    _same(graph, back)
+
+
+def test_sidecar_is_written_and_reused(tmp_path):
+    path = str(tmp_path / "g.net")
+    write_pajek(erdos_renyi_network(300, seed=1), path)
+    parsed = load_graph(path)
+    assert os.path.exists(sidecar_path(path))
+    cached = load_graph(path)
+    assert isinstance(cached.src, memoryview)
+    _same(parsed, cached)
+    _same(load_graph(path, cache=False), cached)
+
+
+def test_sidecar_is_rebuilt_when_the_network_changes(tmp_path):
+    path = str(tmp_path / "g.net")
+    write_pajek(erdos_renyi_network(300, seed=1), path)
+    load_graph(path)
+    stale = os.stat(sidecar_path(path)).st_mtime_ns
+    changed = erdos_renyi_network(300, seed=2)
+    write_pajek(changed, path)
+    with pytest.raises(ValueError):
+        read_binary_network(sidecar_path(path), source=path)
+    _same(load_graph(path), load_graph(path, cache=False))
+    assert os.stat(sidecar_path(path)).st_mtime_ns != stale
+    read_binary_network(sidecar_path(path), source=path)
+
+
+def test_corrupt_files_are_rejected(tmp_path):
+    path = str(tmp_path / "g.netb")
+    write_binary_network(erdos_renyi_network(50, seed=1), path)
+    with open(path, "rb") as f:
+        data = f.read()
+    for bad in (data[:-4], b"XXXX" + data[4:], data[:10]):
+        with open(path, "wb") as f:
+            f.write(bad)
+        with pytest.raises(ValueError):
+            read_binary_network(path)
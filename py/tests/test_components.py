@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from control_package import CSRGraph, NodeClassification, erdos_renyi_network, scale_free_network
+from control_package import components
+from control_package.matching import Matching
+from control_package.utils import load_graph
+
+BLCA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "net", "blca.net")
+
+
+def _graphs():
+    return [erdos_renyi_network(300, mean_degree=1.0, seed=1), erdos_renyi_network(300, mean_degree=2.0, seed=2),
+            scale_free_network(300, seed=3), load_graph(BLCA)]
+
+
+def _fresh(graph):
+    return CSRGraph.from_arrays(graph.src[1:], graph.des[1:], node_num=graph.nodeNum)
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+@pytest.mark.parametrize("batch_limit", [1, 8, 1024])
+@pytest.mark.parametrize("graph", _graphs())
+def test_component_split_matches_the_whole_graph(graph, batch_limit, vectorized, monkeypatch):
+    if not vectorized:
+        monkeypatch.setattr(components, "np", None)
+    whole = Matching(_fresh(graph)).maximize()
+    split = _fresh(graph).components().maximum_matching(workers=2, batch_limit=batch_limit)
+    assert split.markedSrc == whole.markedSrc
+    assert split.markedDes == whole.markedDes
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_subgraphs_agree_with_the_plain_path(graph, monkeypatch):
+    decomposition = _fresh(graph).components()
+    groups = [[c] for c in range(1, decomposition.componentNum + 1, 7)] + [range(1, decomposition.componentNum + 1)]
+    vectorized = [decomposition.subgraph(group) for group in groups]
+    monkeypatch.setattr(components, "np", None)
+    for group, (sub, nodes) in zip(groups, vectorized):
+        plain, plain_nodes = decomposition.subgraph(group)
+        assert nodes == plain_nodes
+        assert list(sub.src) == list(plain.src) and list(sub.des) == list(plain.des)
+        assert list(sub.outOffset) == list(plain.outOffset) and list(sub.outTarget) == list(plain.outTarget)
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_workers_give_the_same_classification(graph):
+    serial = NodeClassification(graph=_fresh(graph), output_file=None).result()
+    assert NodeClassification(graph=_fresh(graph), output_file=None, workers=2).result() == serial
+    assert _fresh(graph).maximum_matching(workers=2).size() == _fresh(graph).maximum_matching().size()
@@ -0,0 +1,43 @@
+import pytest
+
+from control_package import ControlSchemes, erdos_renyi_network, scale_free_network
+
+
+def _graphs():
+    return [erdos_renyi_network(200, mean_degree=1.5, seed=1), erdos_renyi_network(150, mean_degree=3.0, seed=2),
+            scale_free_network(200, seed=3)]
+
+
+def _check(graph, scheme, size):
+    sources = [graph.src[e] for e in scheme.matchedEdgeList]
+    targets = [graph.des[e] for e in scheme.matchedEdgeList]
+    assert len(set(sources)) == len(set(targets)) == len(scheme.matchedEdgeList) == size
+    nodes = set(range(1, graph.nodeNum + 1))
+    assert scheme.driverNode == nodes - set(targets)
+    assert scheme.tailNode == nodes - set(sources)
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_sampled_schemes_are_maximum_matchings(graph):
+    schemes = ControlSchemes(graph=graph, output_file=None)
+    size = len(schemes.scheme.matchedEdgeList)
+    assert size == sum(1 for d in graph.maximum_matching().markedSrc if d)
+    drawn = list(schemes.sample(20, seed=5, swaps=50))
+    assert [s.index for s in drawn] == list(range(1, 21))
+    for scheme in drawn:
+        _check(graph, scheme, size)
+    assert schemes.sampleNum == 20
+    for i in range(1, graph.nodeNum + 1):
+        assert schemes.driverCount[i] == sum(i in s.driverNode for s in drawn)
+        assert schemes.tailCount[i] == sum(i in s.tailNode for s in drawn)
+        assert schemes.middleCount[i] == sum(i not in s.driverNode and i not in s.tailNode for s in drawn)
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_sampling_is_reproducible(graph):
+    schemes = ControlSchemes(graph=graph, output_file=None)
+    first = list(schemes.sample(10, seed=7))
+    assert list(schemes.sample(10, seed=7)) == first
+    assert list(schemes.sample(10, seed=8)) != first
+    # the starting matching already depends on the seed
+    assert list(schemes.sample(1, seed=1, swaps=0)) != list(schemes.sample(1, seed=2, swaps=0))
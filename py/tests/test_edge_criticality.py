@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from control_package import CSRGraph, EdgeCriticality
+from control_package.edge_criticality import CRITICAL, ORDINARY, REDUNDANT
+
+
+def _matching_size(edges, skip_src=None, skip_des=None):
+    """Size of a maximum matching of the bipartite split, by Kuhn's algorithm."""
+    adj = {}
+    for s, d in edges:
+        if s != skip_src and d != skip_des:
+            adj.setdefault(s, []).append(d)
+    mate = {}
+
+    def augment(s, seen):
+        for d in adj[s]:
+            if d not in seen:
+                seen.add(d)
+                if d not in mate or augment(mate[d], seen):
+                    mate[d] = s
+                    return True
+        return False
+
+    return sum(augment(s, set()) for s in adj)
+
+
+def _brute_force(edges):
+    size = _matching_size(edges)
+    labels = []
+    for e, (s, d) in enumerate(edges):
+        rest = edges[:e] + edges[e + 1:]
+        if _matching_size(rest) < size:
+            labels.append(CRITICAL)
+        elif _matching_size(rest, s, d) + 1 == size:
+            labels.append(ORDINARY)
+        else:
+            labels.append(REDUNDANT)
+    return labels
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_labels_match_brute_force(seed):
+    rng = random.Random(seed)
+    n = rng.randint(2, 12)
+    # parallel edges and self-loops included
+    edges = [(rng.randint(1, n), rng.randint(1, n)) for _ in range(rng.randint(1, 3 * n))]
+    graph = CSRGraph.from_arrays([s for s, _ in edges], [d for _, d in edges], node_num=n)
+    labels = EdgeCriticality(graph=graph, output_file=None).labels
+    assert list(labels[1:]) == _brute_force(edges)
@@ -0,0 +1,51 @@
+import random
+from array import array
+
+import pytest
+
+from control_package import CSRGraph, NodeClassification, erdos_renyi_network, scale_free_network
+from control_package import layering
+
+np = pytest.importorskip("numpy")
+
+
+def _random_matching(graph, rng):
+    mate_src = [0] * (graph.nodeNum + 1)
+    mate_des = [0] * (graph.nodeNum + 1)
+    for k in rng.sample(range(1, graph.edgeNum + 1), graph.edgeNum):
+        s, d = graph.src[k], graph.des[k]
+        if not mate_src[s] and not mate_des[d] and rng.random() < 0.7:
+            mate_src[s], mate_des[d] = d, s
+    return mate_src, mate_des
+
+
+def _layer(graph, mate_src, mate_des, vectorized, monkeypatch):
+    monkeypatch.setattr(layering, "VECTORIZE_MIN_NODES", 0 if vectorized else 10 ** 9)
+    n = graph.nodeNum + 1
+    # stale distances from an earlier phase must be overwritten
+    dist_src, dist_des = array("q", bytes(8 * n)), array("q", [0] + [7] * (n - 1))
+    flag, queue = layering.layer(graph.outOffset, graph.outTarget, mate_src, mate_des, dist_src, dist_des)
+    return flag, sorted(queue, key=lambda s: (dist_src[s], s)), list(dist_src), list(dist_des)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_vectorized_layers_match_the_loop(seed, monkeypatch):
+    rng = random.Random(seed)
+    graph = (scale_free_network if seed % 2 else erdos_renyi_network)(3000, seed=seed)
+    mate_src, mate_des = _random_matching(graph, rng)
+    plain = _layer(graph, mate_src, mate_des, False, monkeypatch)
+    assert plain == _layer(graph, mate_src, mate_des, True, monkeypatch)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_vectorized_classification_matches_the_loop(seed, monkeypatch):
+    runs = []
+    for threshold in (0, 10 ** 9):
+        monkeypatch.setattr(layering, "VECTORIZE_MIN_NODES", threshold)
+        # a fresh graph per run: the maximum matching is cached on the graph
+        base = scale_free_network(3000, seed=seed)
+        graph = CSRGraph.from_arrays(base.src[1:], base.des[1:], node_num=base.nodeNum)
+        for mode in ("alternating", "legacy"):
+            nc = NodeClassification(graph=graph, output_file=None, mode=mode)
+            runs.append((nc.Head, nc.Tail, nc.Control_hub, sum(1 for d in nc.markedSrc if d)))
+    assert runs[0] == runs[1] == runs[2] == runs[3]
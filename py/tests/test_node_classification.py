@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from control_package import CSRGraph, NodeClassification, erdos_renyi_network, scale_free_network
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+
+
+def _roles(nc):
+    return nc.Head, nc.Tail, nc.Control_hub
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_alternating_matches_legacy(seed):
+    for graph in (erdos_renyi_network(60, mean_degree=[0.7, 1.4, 3.0][seed % 3], seed=seed),
+                  scale_free_network(80, seed=seed)):
+        # separate graphs, so the legacy mode cannot reuse a cached matching
+        alternating = NodeClassification(graph=graph, output_file=None)
+        copy = CSRGraph.from_arrays(graph.src[1:], graph.des[1:], node_num=graph.nodeNum)
+        legacy = NodeClassification(graph=copy, output_file=None, mode="legacy")
+        assert _roles(alternating) == _roles(legacy)
+
+
+def test_blca_matches_the_legacy_report():
+    expected = {}
+    with open(os.path.join(ROOT, "result", "blca_nodeType.txt")) as f:
+        for line in f:
+            node, role = line.strip().split(": ")
+            expected[int(node)] = role
+    for mode in ("alternating", "legacy"):
+        nc = NodeClassification(os.path.join(ROOT, "net", "blca.net"), output_file=None, mode=mode)
+        result = nc.result()
+        assert {i: result.role(i) for i in range(1, nc.nodeNum + 1)} == expected
@@ -0,0 +1,64 @@
+import pytest
+
+from control_package import CSRGraph, NodeClassification, PairwiseKnockout, erdos_renyi_network
+
+
+def _hubs(graph, gone_edges=(), gone_nodes=()):
+    keep = [k for k in range(1, graph.edgeNum + 1) if k not in gone_edges
+            and graph.src[k] not in gone_nodes and graph.des[k] not in gone_nodes]
+    reduced = CSRGraph.from_arrays([graph.src[k] for k in keep], [graph.des[k] for k in keep], node_num=graph.nodeNum)
+    return NodeClassification(graph=reduced, output_file=None, mode="legacy").Control_hub - set(gone_nodes)
+
+
+def _brute_force(graph, mode):
+    hubs = _hubs(graph)
+    n = graph.edgeNum if mode == "edge" else graph.nodeNum
+
+    def lost(*items):
+        after = _hubs(graph, gone_edges=items) if mode == "edge" else _hubs(graph, gone_nodes=items)
+        return hubs - set(items if mode == "node" else ()) - after
+
+    robust = hubs.difference(*(lost(i) for i in range(1, n + 1)))
+    harmful = {}
+    for a in range(1, n + 1):
+        for b in range(a + 1, n + 1):
+            gone = lost(a, b) & robust
+            if gone:
+                harmful[(a, b)] = sorted(gone)
+    return harmful
+
+
+def _graphs():
+    # all have harmful pairs; the node screen misses some on seeds 20, 27 and 43
+    return [erdos_renyi_network(n, mean_degree=degree, seed=seed)
+            for seed, n, degree in [(9, 18, 1.6), (20, 18, 1.6), (27, 14, 1.3), (31, 18, 1.6), (43, 18, 1.6),
+                                    (44, 14, 1.3)]]
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_edge_screen_finds_every_harmful_pair(graph):
+    screen = PairwiseKnockout(graph=graph, mode="edge", top=None, output_file=None)
+    assert dict(screen.result().pairs) == _brute_force(graph, "edge")
+
+
+@pytest.mark.parametrize("graph", _graphs())
+def test_exhaustive_node_mode_finds_every_harmful_pair(graph):
+    expected = _brute_force(graph, "node")
+    exhaustive = PairwiseKnockout(graph=graph, mode="node", top=None, exhaustive=True, output_file=None)
+    assert dict(exhaustive.result().pairs) == expected
+    # the default screen only reports harmful pairs, with their exact losses
+    screened = PairwiseKnockout(graph=graph, mode="node", top=None, output_file=None)
+    assert dict(screened.result().pairs).items() <= expected.items()
+
+
+def test_top_keeps_the_most_harmful_pairs_in_order():
+    graph = erdos_renyi_network(60, mean_degree=1.5, seed=4)
+    full = PairwiseKnockout(graph=graph, mode="edge", top=None, output_file=None).result()
+    ranked = sorted(full.pairs, key=lambda item: (-len(item[1]), item[0]))
+    assert full.pairs == ranked
+    assert len(ranked) > 5 and len({len(h) for _, h in ranked}) > 1
+    for top in (1, 3, 5):
+        result = PairwiseKnockout(graph=graph, mode="edge", top=top, output_file=None).result()
+        assert result.pairs == ranked[:top]
+        assert result.pairs_found == full.pairs_found
+        assert result.control_hubs == full.control_hubs
@@ -0,0 +1,30 @@
+import pytest
+
+from control_package.utils import read_pajek
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "net.net"
+    path.write_text(text)
+    return str(path)
+
+
+def test_edges_without_section_header(tmp_path):
+    path = _write(tmp_path, "*Vertices 3\n1 a\n2 b\n3 c\n1 2\n2 3\n")
+    node_num, src, des, names = read_pajek(path)
+    assert node_num == 3
+    assert list(zip(src, des)) == [(1, 2), (2, 3)]
+    assert names == [None, "a", "b", "c"]
+
+
+def test_edges_after_section_header(tmp_path):
+    path = _write(tmp_path, '*Vertices 3\n1 "gene a"\n*Arcs\n1 2\n3 1 1.5\n')
+    node_num, src, des, names = read_pajek(path)
+    assert list(zip(src, des)) == [(1, 2), (3, 1)]
+    assert names == [None, "gene a", None, None]
+
+
+def test_vertex_outside_declared_range(tmp_path):
+    path = _write(tmp_path, "*Vertices 3\n1 a\n7 b\n*Arcs\n1 2\n")
+    with pytest.raises(ValueError):
+        read_pajek(path)
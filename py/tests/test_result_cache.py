@@ -0,0 +1,63 @@
+import os
+import time
+
+import pytest
+
+from control_package import NodeClassification, ResultCache, erdos_renyi_network
+from control_package import result_cache
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    graph = erdos_renyi_network(50, seed=1)
+    key = cache.key(graph, "kind", a=1)
+    assert cache.get(key) is None
+    cache.put(key, {"x": [1, 2]})
+    assert cache.get(key) == {"x": [1, 2]}
+    assert cache.get(cache.key(graph, "kind", a=2)) is None
+    assert cache.get(cache.key(erdos_renyi_network(50, seed=2), "kind", a=1)) is None
+    assert ResultCache(str(tmp_path)).get(key) == {"x": [1, 2]}
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 6)
+    value = {"x": "a" * 1000}
+    keys = [cache.key(None, "kind", i=i) for i in range(5)]
+    now = time.time()
+    for i, key in enumerate(keys):
+        cache.put(key, value)
+        os.utime(os.path.join(str(tmp_path), key + ".json"), (now - 100 + i, now - 100 + i))
+    cache.get(keys[0])  # now the most recently used
+    cache.max_bytes = 3 * 1100
+    cache.evict()
+    assert [cache.get(k) is not None for k in keys] == [True, False, False, True, True]
+
+
+def test_age_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_age=3600)
+    old, new = cache.key(None, "old"), cache.key(None, "new")
+    cache.put(old, {})
+    past = time.time() - 7200
+    os.utime(os.path.join(str(tmp_path), old + ".json"), (past, past))
+    cache.put(new, {})
+    assert cache.get(old) is None
+    assert cache.get(new) == {}
+
+
+def test_format_version_bump_invalidates(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key(None, "kind")
+    cache.put(key, {"x": 1})
+    monkeypatch.setattr(result_cache, "FORMAT_VERSION", result_cache.FORMAT_VERSION + 1)
+    assert cache.key(None, "kind") != key
+    assert cache.get(cache.key(None, "kind")) is None
+
+
+def test_classification_backends_are_cached_apart(tmp_path):
+    pytest.importorskip("scipy")
+    cache = ResultCache(str(tmp_path))
+    graph = erdos_renyi_network(200, seed=3)
+    NodeClassification(graph=graph, output_file=None, cache=cache)
+    assert len(os.listdir(str(tmp_path))) == 1
+    NodeClassification(graph=graph, output_file=None, cache=cache, backend="scipy")
+    assert len(os.listdir(str(tmp_path))) == 2
@@ -0,0 +1,48 @@
+import pytest
+
+from control_package import CSRGraph, FindSensitiveControlHub, NodeClassification, SensitivityEngine
+from control_package import erdos_renyi_network, scale_free_network
+
+
+def _graphs():
+    for seed in range(6):
+        yield erdos_renyi_network(30, mean_degree=[0.8, 1.5, 2.5][seed % 3], seed=seed)
+    for seed in range(3):
+        yield scale_free_network(40, seed=seed)
+
+
+def _without(graph, gone):
+    keep = [k for k in range(1, graph.edgeNum + 1) if k not in gone]
+    return CSRGraph.from_arrays([graph.src[k] for k in keep], [graph.des[k] for k in keep], node_num=graph.nodeNum)
+
+
+def _find(graph, **kwargs):
+    return FindSensitiveControlHub(graph=graph, output_file=None, knockout_file=None, node_type_file=None, **kwargs)
+
+
+@pytest.mark.parametrize("graph", list(_graphs()))
+def test_incremental_matches_rebuild(graph):
+    incremental = _find(graph).sensitive_control_hub
+    assert incremental == _find(graph, method="rebuild").sensitive_control_hub
+    assert incremental == _find(graph, workers=2).sensitive_control_hub
+    assert incremental == _find(graph, method="rebuild", workers=2).sensitive_control_hub
+
+
+@pytest.mark.parametrize("graph", list(_graphs())[:4])
+def test_every_deletion_matches_a_fresh_classification(graph):
+    nc = NodeClassification(graph=graph, output_file=None)
+    lost = SensitivityEngine(nc).sweep(range(1, graph.edgeNum + 1))
+    for e in range(1, graph.edgeNum + 1):
+        left = NodeClassification(graph=_without(graph, {e}), output_file=None, mode="legacy").Control_hub
+        assert lost.get(e, set()) == nc.Control_hub - left
+
+
+@pytest.mark.parametrize("graph", list(_graphs()))
+def test_knockouts_match_rebuild(graph):
+    n = graph.nodeNum
+    targets = list(range(1, n + 1)) + [(a, b) for a in range(1, n + 1, 3) for b in range(a + 1, n + 1, 4)]
+    targets += [(1, 2, 3), (n - 2, n - 1, n), (5,)]
+    incremental = _find(graph, knockout=targets)
+    rebuild = _find(graph, knockout=targets, method="rebuild")
+    assert incremental.knockout_impact == rebuild.knockout_impact
+    assert _find(graph, knockout=targets, workers=2).knockout_impact == rebuild.knockout_impact
@@ -0,0 +1,43 @@
+from control_package import AnalysisService, erdos_renyi_network
+from control_package.utils import load_graph, write_pajek
+
+
+def _network(tmp_path, name, seed):
+    path = str(tmp_path / f"{name}.net")
+    write_pajek(erdos_renyi_network(2000, mean_degree=4.0, seed=seed), path)
+    load_graph(path)  # writes the binary sidecar
+    return path
+
+
+def test_sidecar_buffers_are_counted(tmp_path):
+    path = _network(tmp_path, "a", 1)
+    service = AnalysisService()
+    service.load(path)
+    g = service.network(path).graph
+    assert isinstance(g.src, memoryview)
+    data = sum(x.nbytes for x in (g.src, g.des, g.outOffset, g.outTarget, g.outEdge,
+                                  g.inOffset, g.inTarget, g.inEdge))
+    assert service.load(path)["bytes"] > data
+
+
+def test_least_recently_used_network_is_evicted(tmp_path):
+    first = _network(tmp_path, "a", 1)
+    second = _network(tmp_path, "b", 2)
+    service = AnalysisService()
+    size = service.load(first)["bytes"]
+    service.max_bytes = size + size // 2
+    service.load(second)
+    assert [n["path"] for n in service.networks()] == [second]
+
+
+def test_rpc_errors(tmp_path):
+    path = _network(tmp_path, "a", 1)
+    service = AnalysisService()
+
+    def error(method, params):
+        return service.call({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})["error"]["code"]
+
+    assert error("roles", {"network": path, "nodes": [99999]}) == -32602
+    assert error("roles", {"network": path, "nodes": [0]}) == -32602
+    assert error("roles", {"net": path}) == -32602
+    assert error("nope", {}) == -32601
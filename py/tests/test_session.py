@@ -0,0 +1,65 @@
+import random
+
+from control_package import ControlSession, CSRGraph, Metrics, NodeClassification
+from control_package.generators import erdos_renyi_network
+
+
+def _edges(session):
+    src, des = [], []
+    for s in range(1, session.nodeNum + 1):
+        for d, count in session.out[s].items():
+            src += [s] * count
+            des += [d] * count
+    return src, des
+
+
+def _assert_fresh(session):
+    src, des = _edges(session)
+    nc = NodeClassification(graph=CSRGraph.from_arrays(src, des, node_num=session.nodeNum), output_file=None)
+    assert session.matching_size() == sum(1 for d in nc.markedSrc if d)
+    for s, d in enumerate(session.markedSrc):
+        if d:
+            assert session.markedDes[d] == s and d in session.out[s]
+    assert session.Tail == set(nc.Tail)
+    assert session.Head == set(nc.Head)
+
+
+def test_random_edits_match_a_fresh_classification():
+    for seed in range(20):
+        rng = random.Random(seed)
+        n = rng.choice([6, 12, 30])
+        graph = erdos_renyi_network(n, rng.choice([0.8, 1.5, 2.5]), seed=seed)
+        session = ControlSession(graph=graph)
+        edges = [(graph.src[k], graph.des[k]) for k in range(1, graph.edgeNum + 1)]
+        for _ in range(60):
+            r = rng.random()
+            if r < 0.45 and edges:
+                session.remove_edge(*edges.pop(rng.randrange(len(edges))))
+            elif r < 0.95:
+                edge = (rng.randint(1, n + 2), rng.randint(1, n + 2))
+                session.add_edge(*edge)
+                edges.append(edge)
+            else:
+                node = rng.randint(1, session.nodeNum)
+                session.remove_node(node)
+                edges = [e for e in edges if node not in e]
+            session.classify()
+            _assert_fresh(session)
+
+
+def test_edits_only_revisit_nearby_nodes():
+    graph = erdos_renyi_network(5000, 3.0, seed=1)
+    nc = NodeClassification(graph=graph, output_file=None)
+    metrics = Metrics()
+    session = ControlSession(classification=nc, metrics=metrics)
+    matched = [(s, d) for s, d in enumerate(nc.markedSrc) if d]
+    rng = random.Random(0)
+    metrics.counters.clear()
+    for _ in range(200):
+        s, d = matched[rng.randrange(len(matched))]
+        session.remove_edge(s, d)
+        session.add_edge(s, d)
+        session.classify()
+    # a rebuild would revisit every node on every edit
+    assert metrics.counters.get("reach_visits", 0) < 200 * graph.nodeNum // 10
+    _assert_fresh(session)
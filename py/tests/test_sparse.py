@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from control_package import CSRGraph, NodeClassification, erdos_renyi_network, scale_free_network
+from control_package.utils import load_graph
+
+pytest.importorskip("scipy")
+from control_package.sparse import to_scipy  # noqa: E402
+
+BLCA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "net", "blca.net")
+
+
+def _edges(graph):
+    return [(graph.src[k], graph.des[k]) for k in range(1, graph.edgeNum + 1)]
+
+
+def _graphs():
+    for seed in range(4):
+        yield erdos_renyi_network(300, mean_degree=[0.8, 1.5, 3.0, 5.0][seed], seed=seed)
+        yield scale_free_network(300, seed=seed)
+
+
+@pytest.mark.parametrize("graph", list(_graphs()) + [BLCA])
+def test_scipy_backend_matches_python(graph):
+    if isinstance(graph, str):
+        python = NodeClassification(graph, output_file=None)
+    else:
+        python = NodeClassification(graph=graph, output_file=None)
+    scipy = NodeClassification(graph=python.graph, output_file=None, backend="scipy")
+    assert (scipy.Head, scipy.Tail, scipy.Control_hub) == (python.Head, python.Tail, python.Control_hub)
+    g = python.graph
+    assert sum(1 for d in scipy.markedSrc if d) == sum(1 for d in python.markedSrc if d)
+    for s, d in enumerate(scipy.markedSrc):
+        if d:
+            assert scipy.markedDes[d] == s
+            assert d in {g.outTarget[k] for k in range(g.outOffset[s], g.outOffset[s + 1])}
+
+
+@pytest.mark.parametrize("graph", list(_graphs()))
+def test_from_arrays_round_trip(graph):
+    edges = _edges(graph)
+    copy = CSRGraph.from_arrays([s for s, _ in edges], [d for _, d in edges], node_num=graph.nodeNum)
+    assert copy.nodeNum == graph.nodeNum and _edges(copy) == edges
+    zero = CSRGraph.from_arrays([s - 1 for s, _ in edges], [d - 1 for _, d in edges], graph.nodeNum, base=0)
+    assert _edges(zero) == edges
+    for g in (copy, zero):
+        assert list(g.outOffset) == list(graph.outOffset) and list(g.outTarget) == list(graph.outTarget)
+        assert list(g.inOffset) == list(graph.inOffset) and list(g.inTarget) == list(graph.inTarget)
+
+
+@pytest.mark.parametrize("graph", list(_graphs()))
+def test_from_scipy_round_trip(graph):
+    matrix = to_scipy(graph)
+    assert matrix.shape == (graph.nodeNum, graph.nodeNum)
+    back = CSRGraph.from_scipy(matrix)
+    # parallel edges become one entry, stored row by row
+    assert _edges(back) == sorted(set(_edges(graph)))
+    assert _edges(load_graph(graph=matrix)) == _edges(back)
+    assert (to_scipy(back) != (matrix != 0)).nnz == 0
+
+
+def test_from_array_rejects_bad_input():
+    with pytest.raises(ValueError):
+        CSRGraph.from_arrays([1, 2], [2])
+    with pytest.raises(ValueError):
+        CSRGraph.from_arrays([1, 5], [2, 1], node_num=3)
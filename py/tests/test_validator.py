@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+from control_package import ControlHubValidator, NodeClassification, ResultCache, erdos_renyi_network
+from control_package.utils import write_pajek
+
+STUB = textwrap.dedent("""
+    import os, sys, time
+    model, prompt = sys.argv[1], sys.argv[2]
+    log = os.environ["STUB_LOG"]
+    running = os.path.join(os.path.dirname(log), "running")
+    os.makedirs(running, exist_ok=True)
+    mark = os.path.join(running, str(os.getpid()))
+    open(mark, "w").close()
+    try:
+        with open(os.environ["STUB_OUT"]) as f:
+            written = len(f.readlines())
+    except OSError:
+        written = 0
+    with open(log, "a") as f:
+        f.write(f"{len(os.listdir(running))} {written}\\n")
+    time.sleep(5 if model == "slow" else 0.1)
+    os.remove(mark)
+    print(f"answer of {model}")
+""")
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("result")
+    net = str(tmp_path / "net.net")
+    write_pajek(erdos_renyi_network(60, mean_degree=1.5, seed=3), net)
+    hubs = len(NodeClassification(net, output_file=None).Control_hub)
+    assert hubs >= 4
+    stub = tmp_path / "stub.py"
+    stub.write_text(STUB)
+    log = tmp_path / "calls.log"
+    out = tmp_path / "answers.txt"
+    monkeypatch.setenv("STUB_LOG", str(log))
+    monkeypatch.setenv("STUB_OUT", str(out))
+    return net, hubs, [sys.executable, str(stub)], log, str(out)
+
+
+def _calls(log):
+    return [tuple(map(int, line.split())) for line in log.read_text().splitlines()] if log.exists() else []
+
+
+def test_concurrency_is_bounded(setup):
+    net, hubs, command, log, out = setup
+    ControlHubValidator(net, model="m", output_file=out, concurrency=2, command=command)
+    calls = _calls(log)
+    assert len(calls) == hubs
+    assert max(running for running, _ in calls) <= 2
+
+
+def test_answers_are_streamed_to_the_file(setup):
+    net, hubs, command, log, out = setup
+    ControlHubValidator(net, model="m", output_file=out, concurrency=1, command=command)
+    # every query sees the answers of all the queries before it
+    assert [written for _, written in _calls(log)] == list(range(hubs))
+    with open(out) as f:
+        assert [line.split(": ", 1)[1] for line in f] == ["answer of m\n"] * hubs
+
+
+def test_timeout(setup):
+    net, hubs, command, log, out = setup
+    ControlHubValidator(net, model="slow", output_file=out, concurrency=hubs, timeout=0.5, command=command)
+    with open(out) as f:
+        lines = f.readlines()
+    assert len(lines) == hubs
+    assert all("no answer within 0.5 seconds" in line for line in lines)
+
+
+def test_cached_answers_are_not_asked_again(setup, tmp_path):
+    net, hubs, command, log, out = setup
+    cache = ResultCache(str(tmp_path / "cache"))
+    ControlHubValidator(net, model="m", output_file=out, cache=cache, command=command)
+    assert len(_calls(log)) == hubs
+    ControlHubValidator(net, model="m", output_file=out, cache=cache, command=command)
+    assert len(_calls(log)) == hubs
+    with open(out) as f:
+        assert len(f.readlines()) == hubs
+
+
+def test_running_loop(setup):
+    net, hubs, command, log, out = setup
+
+    async def main():
+        validator = ControlHubValidator(net, model="m", output_file=out, command=command)
+        assert not os.path.exists(out)
+        with pytest.raises(RuntimeError):
+            validator.validate()
+        await validator.validate_async()
+
+    asyncio.run(main())
+    assert len(_calls(log)) == hubs
@@ -0,0 +1,94 @@
+import csv
+import json
+import os
+
+import pytest
+
+from control_package import (ApproximateSensitivity, EdgeCriticality, FindSensitiveControlHub, NodeClassification,
+                             PairwiseKnockout, erdos_renyi_network)
+from control_package.results import ClassificationResult
+from control_package.writers import WRITERS, register_writer, write_report
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+BLCA = os.path.join(ROOT, "net", "blca.net")
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_text_reproduces_the_legacy_files(tmp_path):
+    NodeClassification(BLCA, output_file=str(tmp_path / "nodeType.txt"))
+    # the bundled report was written on Windows; the legacy writer used the
+    # platform's line endings, as write_text does
+    legacy = _read(os.path.join(ROOT, "result", "blca_nodeType.txt")).replace(b"\r\n", b"\n")
+    assert _read(str(tmp_path / "nodeType.txt")) == legacy
+
+    FindSensitiveControlHub(BLCA, output_file=str(tmp_path / "sensitive.txt"), node_type_file=None)
+    assert _read(str(tmp_path / "sensitive.txt")) == _read(os.path.join(ROOT, "result", "blca_sensitive_control_hub.txt"))
+
+
+def _results():
+    graph = erdos_renyi_network(60, mean_degree=1.5, seed=4)
+    finder = FindSensitiveControlHub(graph=graph, output_file=None, node_type_file=None,
+                                     knockout=[1, 2, (3, 4), (5, 6, 7)], knockout_file=None)
+    return [
+        NodeClassification(graph=graph, output_file=None).result(),
+        finder.result(),
+        finder.knockout_result(),
+        EdgeCriticality(graph=graph, output_file=None).result(),
+        PairwiseKnockout(graph=graph, top=None, output_file=None).result(),
+        ApproximateSensitivity(graph=graph, seed=1, max_edges=20, output_file=None).result(),
+    ]
+
+
+@pytest.mark.parametrize("result", _results(), ids=lambda r: type(r).__name__)
+def test_json_round_trip(result, tmp_path):
+    path = str(tmp_path / "out.json")
+    write_report(result, path, "json")
+    with open(path) as f:
+        assert json.load(f) == json.loads(json.dumps(result.to_dict()))
+
+
+@pytest.mark.parametrize("result", _results(), ids=lambda r: type(r).__name__)
+def test_csv_round_trip(result, tmp_path):
+    path = str(tmp_path / "out.csv")
+    write_report(result, path, "csv")
+    header, rows = result.to_rows()
+    assert rows
+    with open(path, newline="") as f:
+        read = list(csv.reader(f))
+    assert read[0] == list(header)
+    assert len(read) == len(rows) + 1
+    for got, row in zip(read[1:], rows):
+        assert [type(x)(y) for x, y in zip(row, got)] == list(row)
+
+
+def test_classification_is_rebuilt_from_its_files(tmp_path):
+    result = NodeClassification(BLCA, output_file=None).result()
+    write_report(result, str(tmp_path / "out.json"), "json")
+    with open(str(tmp_path / "out.json")) as f:
+        data = json.load(f)
+    assert ClassificationResult(data["nodeNum"], set(data["Head"]), set(data["Tail"]), set(data["Control_hub"])) == result
+    write_report(result, str(tmp_path / "out.csv"), "csv")
+    with open(str(tmp_path / "out.csv"), newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [(int(node), role) for node, role in rows] == [(i, result.role(i)) for i in range(1, result.nodeNum + 1)]
+
+
+def test_unknown_and_custom_formats(tmp_path):
+    result = NodeClassification(graph=erdos_renyi_network(10, seed=1), output_file=None).result()
+    with pytest.raises(ValueError):
+        write_report(result, str(tmp_path / "out"), "xml")
+
+    def count(r, path):
+        with open(path, "w") as f:
+            f.write(str(len(r.Control_hub)))
+
+    register_writer("count", count)
+    try:
+        write_report(result, str(tmp_path / "out"), "count")
+        assert (tmp_path / "out").read_text() == str(len(result.Control_hub))
+    finally:
+        del WRITERS["count"]